@@ -0,0 +1,70 @@
+"""
+📊 BENCHMARK DE COMPRESSÃO
+Bytes economizados e custo de CPU por tamanho de payload, para escolher
+COMPRESSION_MIN_BYTES / COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_QUALITY.
+
+    python benchmarks/compression_benchmark.py
+    python benchmarks/compression_benchmark.py --items 1,10,100,1000,5000 --repeat 50
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared import compression
+
+def build_listing(count):
+    """Payload no formato de _build_flat_list (o maior e mais repetitivo da API)"""
+    base_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for i in range(count):
+        key = f"videos/{2025}/{(i % 12) + 1:02d}/{uuid.UUID(int=i * 7919)}-episodio_{i:05d}.mp4"
+        items.append({
+            'key': key,
+            'name': key.split('/')[-1],
+            'size': 50_000_000 + i * 1234,
+            'lastModified': (base_time + timedelta(minutes=i)).isoformat(),
+            'url': f'https://d2we88koy23cl4.cloudfront.net/{key}',
+            'type': 'file'
+        })
+    return json.dumps({'success': True, 'items': items, 'nextCursor': None}).encode('utf-8')
+
+def measure(body, encoding, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        compressed = compression.compress_body(body, encoding)
+    cpu_ms = (time.process_time() - start) * 1000 / repeat
+    # O que realmente trafega pelo API Gateway é o base64 do corpo comprimido
+    wire = len(base64.b64encode(compressed))
+    return len(compressed), wire, cpu_ms
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de compressão das respostas')
+    parser.add_argument('--items', default='1,5,10,50,100,500,1000,5000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    encodings = compression.supported_encodings()
+    if compression.brotli is None:
+        print('brotli não instalado: medindo apenas gzip\n')
+
+    print(f"{'itens':>6} {'bruto':>10} {'enc':>5} {'comprimido':>11} {'base64':>10} {'economia':>9} {'cpu ms':>8}")
+    for count in [int(n) for n in args.items.split(',')]:
+        body = build_listing(count)
+        for encoding in encodings:
+            size, wire, cpu_ms = measure(body, encoding, args.repeat)
+            saved = 100 * (1 - wire / len(body))
+            print(f"{count:>6} {len(body):>10} {encoding:>5} {size:>11} {wire:>10} {saved:>8.1f}% {cpu_ms:>8.3f}")
+
+    print(f"\nLimite atual: COMPRESSION_MIN_BYTES={compression.COMPRESSION_MIN_BYTES} "
+          f"(gzip nível {compression.GZIP_LEVEL}, brotli qualidade {compression.BROTLI_QUALITY})")
+    print('Economia negativa = base64 maior que o corpo original; mantenha o limite acima desse ponto.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import json
+import sys
+import boto3
+
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.catalog_index import CatalogIndex
+from shared.change_journal import append_changes
+from shared.folder_tree import FolderTree, load_folder_tree
+from shared.id_index import rebuild_id_index
+from shared.search_index import SearchIndex, load_search_index
+
+def lambda_handler(event, context):
+    """Index Service Lambda handler
+
+    Subscribed to s3:ObjectCreated:* and s3:ObjectRemoved:* on the videos/ and
+    converted/ prefixes. Run with reserved concurrency 1 so index writes are
+    serialized; CatalogIndex still retries if two writers overlap.
+    Invoke with {"action": "rebuild", "bucket": "<name>"} to bootstrap the index
+    and {"action": "rebuild-ids", "bucket": "<name>"} to backfill the id index.
+    """
+
+    s3_client = boto3.client('s3')
+
+    try:
+        # Manual / scheduled full rebuild
+        if event.get('action') == 'rebuild':
+            bucket_name = event.get('bucket', 'video-streaming-v2-bdc2040d')
+            index = CatalogIndex(s3_client, bucket_name)
+            count = index.rebuild()
+            FolderTree.from_catalog(index).save(s3_client, bucket_name)
+            SearchIndex.from_catalog(index).save(s3_client, bucket_name)
+            print(f"Catalog index rebuilt for {bucket_name}: {count} objects")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'success': True, 'bucket': bucket_name, 'count': count})
+            }
+
+        # Backfill id -> key entries for uploads that predate the id index
+        if event.get('action') == 'rebuild-ids':
+            bucket_name = event.get('bucket', 'video-streaming-v2-bdc2040d')
+            result = rebuild_id_index(s3_client, bucket_name)
+            print(f"Id index rebuilt for {bucket_name}: {json.dumps(result)}")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'success': True, 'bucket': bucket_name, **result})
+            }
+
+        # Group S3 notification records by bucket
+        records_by_bucket = {}
+        for record in event.get('Records', []):
+            bucket_name = record.get('s3', {}).get('bucket', {}).get('name')
+            if bucket_name:
+                records_by_bucket.setdefault(bucket_name, []).append(record)
+
+        changed = 0
+        for bucket_name, records in records_by_bucket.items():
+            index = CatalogIndex(s3_client, bucket_name)
+            bucket_changes = index.update_from_events(records)
+            if not bucket_changes:
+                continue
+            changed += bucket_changes
+
+            # Keep per-folder aggregates in step with the catalog
+            tree = load_folder_tree(s3_client, bucket_name)
+            if tree:
+                tree.apply_changes(index.changes)
+            else:
+                tree = FolderTree.from_catalog(index)
+            tree.save(s3_client, bucket_name)
+
+            # Search postings follow the same changes
+            search = load_search_index(s3_client, bucket_name)
+            if search:
+                search.apply_changes(index.changes)
+            else:
+                search = SearchIndex.from_catalog(index)
+            search.save(s3_client, bucket_name)
+
+            # Journal covers uploads that never call /upload/complete (single PUT presigned URLs)
+            append_changes(s3_client, bucket_name, [
+                {'type': change['type'], 'key': change['key'], 'size': change['size'], 'lastModified': change['lastModified']}
+                for change in index.changes if change['key'].startswith('videos/')
+            ])
+
+        print(f"Catalog index updated: {changed} changes from {len(event.get('Records', []))} records")
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'success': True, 'changes': changed})
+        }
+
+    except Exception as e:
+        print(f"Catalog index error: {str(e)}")
+        raise e
@@ -1,7 +1,14 @@
 import json
+import sys
 import boto3
 import urllib.parse
 
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.change_journal import append_changes
+from shared.exceptions import StorageError
+
 def handler(event, context):
     """Callback quando conversão MediaConvert completa"""
     
@@ -39,8 +46,16 @@ def handler(event, context):
                 s3.delete_object(Bucket=bucket, Key=original_key)
                 
                 print(f"Conversão completa: {original_key} → {final_key}")
+                record_conversion(s3, bucket, original_key, final_key)
                 
             except Exception as e:
                 print(f"Erro no pós-processamento: {e}")
     
-    return {'statusCode': 200}
\ No newline at end of file
+    return {'statusCode': 200}
+
+def record_conversion(s3, bucket, original_key, final_key):
+    """Registra original -> MP4 no journal de mudanças"""
+    try:
+        append_changes(s3, bucket, [{'type': 'converted', 'key': final_key, 'from': original_key}])
+    except StorageError as e:
+        print(f"Erro no journal de mudanças: {e}")
\ No newline at end of file
@@ -1,9 +1,17 @@
 import json
+import sys
 import boto3
 import re
 import unicodedata
 import urllib.parse
 
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.exceptions import ValidationError
+from shared.multipart import UploadNotFoundError, build_completion_parts
+from shared.pagination import list_objects_page
+
 def sanitize_filename(filename):
     """Sanitiza nome do arquivo seguindo regras rigorosas"""
     # Separar nome e extensão
@@ -82,7 +90,7 @@ def handler(event, context):
             if show_hierarchy:
                 return get_hierarchy_view(current_path, headers)
             else:
-                return get_simple_view(headers)
+                return get_simple_view(query_params, headers)
         
         # POST request - upload e outras ações
         elif event['httpMethod'] == 'POST':
@@ -243,6 +251,17 @@ def complete_multipart(body, headers):
         key = body.get('key')
         parts = body.get('parts', [])
         
+        # Partes lidas do S3 (ListParts paginado) quando o cliente não as envia
+        if not parts:
+            parts = build_completion_parts(
+                s3_client,
+                'video-streaming-sstech-eaddf6a1',
+                key,
+                upload_id,
+                body.get('totalParts'),
+                body.get('fileSize')
+            )
+        
         response = s3_client.complete_multipart_upload(
             Bucket='video-streaming-sstech-eaddf6a1',
             Key=key,
@@ -259,6 +278,18 @@ def complete_multipart(body, headers):
             })
         }
         
+    except UploadNotFoundError as e:
+        return {
+            'statusCode': 404,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'message': str(e)})
+        }
+    except ValidationError as e:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'message': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
@@ -329,19 +360,22 @@ def get_hierarchy_view(current_path, headers):
             'body': json.dumps({'success': False, 'message': str(e)})
         }
 
-def get_simple_view(headers):
-    """Retorna visualização simples"""
+def get_simple_view(query_params, headers):
+    """Retorna visualização simples paginada (uma página do S3 por chamada)"""
     try:
         s3_client = boto3.client('s3')
         
-        response = s3_client.list_objects_v2(
-            Bucket='video-streaming-sstech-eaddf6a1',
-            Prefix='videos/'
+        page = list_objects_page(
+            s3_client,
+            'video-streaming-sstech-eaddf6a1',
+            'videos/',
+            page_size=query_params.get('pageSize'),
+            cursor=query_params.get('cursor')
         )
         
         items = []
-        if 'Contents' in response:
-            for obj in response['Contents']:
+        if page['contents']:
+            for obj in page['contents']:
                 if not obj['Key'].endswith('/'):
                     items.append({
                         'key': obj['Key'],
@@ -355,9 +389,15 @@ def get_simple_view(headers):
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps({'success': True, 'items': items})
+            'body': json.dumps({'success': True, 'items': items, 'nextCursor': page['next_cursor']})
         }
         
+    except ValidationError as e:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({'success': False, 'message': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
@@ -401,10 +441,13 @@ def get_part_url_from_params(params, headers):
 def complete_multipart_from_params(params, headers):
     """Processa complete-multipart via GET params"""
     try:
+        # Sem parts, a lista é montada no servidor (só uploadId e key na URL)
         body = {
             'uploadId': params.get('uploadId'),
             'key': params.get('key'),
-            'parts': json.loads(params.get('parts', '[]'))
+            'parts': json.loads(params.get('parts', '[]')),
+            'totalParts': params.get('totalParts'),
+            'fileSize': params.get('fileSize')
         }
         return complete_multipart(body, headers)
     except Exception as e:
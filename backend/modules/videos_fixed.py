@@ -1,8 +1,18 @@
 import json
+import sys
 import boto3
 import os
 from datetime import datetime
 
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.catalog_index import load_catalog_index
+from shared.conversion_join import join_listings
+from shared.name_index import get_name_index
+from shared.streaming import iter_objects
+from shared.upload_tuning import get_profile, load_tuning, plan_upload
+
 def handler(event, context):
     """Handler principal para vídeos com CORS corrigido"""
     
@@ -114,8 +124,10 @@ def generate_upload_url(body, cors_headers):
         s3_client = boto3.client('s3')
         bucket = 'video-streaming-sstech-eaddf6a1'
         
-        # Verifica se precisa multipart (>20MB)
-        if file_size > 20 * 1024 * 1024:
+        # Tamanho de parte e concorrência pelo tamanho do arquivo, limites do S3 e vazão observada
+        plan = plan_upload(file_size, get_profile(load_tuning(s3_client, bucket)))
+        
+        if plan['multipart']:
             # Multipart upload
             response = s3_client.create_multipart_upload(
                 Bucket=bucket,
@@ -131,6 +143,9 @@ def generate_upload_url(body, cors_headers):
                     'multipart': True,
                     'uploadId': response['UploadId'],
                     'key': key,
+                    'partSize': plan['part_size'],
+                    'totalParts': plan['total_parts'],
+                    'concurrency': plan['concurrency'],
                     'message': 'Multipart upload iniciado'
                 })
             }
@@ -171,57 +186,39 @@ def list_videos(event, cors_headers):
         s3_client = boto3.client('s3')
         bucket = 'video-streaming-sstech-eaddf6a1'
         
-        # Lista arquivos originais
-        response_videos = s3_client.list_objects_v2(
-            Bucket=bucket,
-            Prefix='videos/'
-        )
+        # Índice do catálogo: um único GET cobre videos/ e converted/
+        # (sem índice, as duas listagens são paginadas sob demanda)
+        index = load_catalog_index(s3_client, bucket)
         
-        # Lista arquivos convertidos
-        response_converted = s3_client.list_objects_v2(
-            Bucket=bucket,
-            Prefix='converted/'
-        )
+        converted_items = []
+        original_items = []
         
-        items = []
-        converted_files = set()
-        
-        # Mapeia arquivos convertidos
-        if 'Contents' in response_converted:
-            for obj in response_converted['Contents']:
-                if obj['Key'].endswith('.mp4'):
-                    # Extrai nome original sem timestamp
-                    converted_name = obj['Key'].replace('converted/', '')
-                    converted_files.add(converted_name)
-                    
-                    items.append({
-                        'key': obj['Key'],
-                        'name': converted_name,
-                        'size': obj['Size'],
-                        'lastModified': obj['LastModified'].isoformat(),
-                        'url': f"https://d2we88koy23cl4.cloudfront.net/{obj['Key']}",
-                        'type': 'file',
-                        'converted': True
-                    })
+        # Join em streaming: originais e convertidos casados pela mesma chave
+        # normalizada, lidos na ordem das chaves sem materializar as listagens
+        originals = (obj for obj in iter_objects(s3_client, bucket, 'videos/', index=index) if not obj['Key'].endswith('/'))
+        converted = (obj for obj in iter_objects(s3_client, bucket, 'converted/', index=index) if obj['Key'].endswith('.mp4'))
         
-        # Mostra originais até conversão ficar pronta
-        if 'Contents' in response_videos:
-            for obj in response_videos['Contents']:
-                if obj['Key'].endswith('/'):
-                    continue
-                
+        for _, original_objs, converted_objs in join_listings(originals, converted):
+            for obj in converted_objs:
+                converted_items.append({
+                    'key': obj['Key'],
+                    'name': obj['Key'].replace('converted/', ''),
+                    'size': obj['Size'],
+                    'lastModified': obj['LastModified'].isoformat(),
+                    'url': f"https://d2we88koy23cl4.cloudfront.net/{obj['Key']}",
+                    'type': 'file',
+                    'converted': True
+                })
+            
+            for obj in original_objs:
                 file_name = obj['Key'].split('/')[-1]
                 file_ext = file_name.lower().split('.')[-1]
                 
                 # Para arquivos que precisam conversão (.ts, .avi, etc)
                 if file_ext in ['ts', 'avi', 'mov', 'mkv', 'wmv', 'flv']:
-                    # Remove timestamp para comparar com convertido
-                    clean_name = '-'.join(file_name.split('-')[1:]) if '-' in file_name else file_name
-                    converted_name = clean_name.replace(f'.{file_ext}', '.mp4')
-                    
-                    # Só mostra original se conversão ainda não existe
-                    if converted_name not in converted_files:
-                        items.append({
+                    # Só mostra original enquanto a conversão não terminou
+                    if not converted_objs:
+                        original_items.append({
                             'key': obj['Key'],
                             'name': file_name,
                             'size': obj['Size'],
@@ -234,7 +231,7 @@ def list_videos(event, cors_headers):
                 
                 # Para MP4 originais, sempre mostra
                 elif file_ext == 'mp4':
-                    items.append({
+                    original_items.append({
                         'key': obj['Key'],
                         'name': file_name,
                         'size': obj['Size'],
@@ -244,6 +241,8 @@ def list_videos(event, cors_headers):
                         'converted': False
                     })
         
+        items = converted_items + original_items
+        
         return {
             'statusCode': 200,
             'headers': cors_headers,
@@ -383,12 +382,27 @@ def complete_multipart_upload(body, cors_headers):
         }
 
 def check_existing_files(body, cors_headers):
-    """Verifica arquivos existentes (simplificado)"""
-    return {
-        'statusCode': 200,
-        'headers': cors_headers,
-        'body': json.dumps({
-            'success': True,
-            'existingFiles': []  # Por enquanto, não verifica duplicatas
-        })
-    }
\ No newline at end of file
+    """Verifica quais arquivos já existem na pasta (ignora o timestamp da chave)"""
+    try:
+        folder_path = body.get('folderPath', '')
+        names = [file_info['name'] for file_info in body.get('files', [])]
+        
+        s3_client = boto3.client('s3')
+        name_index = get_name_index(s3_client, 'video-streaming-sstech-eaddf6a1', folder_path)
+        
+        return {
+            'statusCode': 200,
+            'headers': cors_headers,
+            'body': json.dumps({
+                'success': True,
+                'existingFiles': name_index.find_existing(names, folder_path)
+            })
+        }
+        
+    except Exception as e:
+        print(f"Check existing error: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': cors_headers,
+            'body': json.dumps({'success': False, 'message': 'Erro ao verificar arquivos'})
+        }
\ No newline at end of file
@@ -7,13 +7,41 @@ import boto3
 import jwt
 import os
 import re
+import sys
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
 
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.cache import TTLCache
+from shared.catalog_index import catalog_etag, load_catalog_index, load_catalog_index_at
+from shared.change_journal import append_changes, parse_change_limit, read_changes
+from shared.compression import compress_response
+from shared.exceptions import StorageError, ValidationError
+from shared.hash_index import check_content_hash, checksum_sha256, parse_content_hash, put_content_hash
+from shared.http_cache import apply_etag, get_request_header
+from shared.multipart import PART_URL_EXPIRES, parse_part_numbers, presign_part_urls
+from shared.pagination import list_objects_page
+from shared.query import QUERY_PARAMS, has_query, query_catalog
+from shared.projection import parse_fields, parse_shape, project, to_columns
+from shared.streaming import NDJSON_CONTENT_TYPE, build_ndjson_body, iter_objects
+from shared.upload_telemetry import (
+    parse_part_timings, record_upload_telemetry, stats_from_summary, summarize_timings, telemetry_report
+)
+from shared.upload_tuning import get_profile, load_tuning, parse_upload_stats, plan_upload, record_upload_stats
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache de listagens do container quente (chave inclui o ETag do índice do catálogo;
+# invalidado ao completar upload e no delete)
+listing_cache = TTLCache(ttl=float(os.environ.get('LISTING_CACHE_TTL', '30')))
+
+# Campos aceitos em ?fields= (mesma ordem das colunas no formato columnar)
+LISTING_FIELDS = ('key', 'name', 'size', 'lastModified', 'url', 'type')
+
 class VideoService:
     def __init__(self):
         self.jwt_secret = 'video-streaming-jwt-super-secret-key-2025'
@@ -53,8 +81,14 @@ class VideoService:
             return {'valid': False, 'message': 'Erro na autenticação'}
     
     def generate_upload_url(self, file_name: str, file_type: str, file_size: int, 
-                          folder_path: str = '', user: Dict = None) -> Dict:
-        """Gera URL pré-assinada para upload"""
+                          folder_path: str = '', user: Dict = None,
+                          content_hash: Optional[str] = None, hash_mode: Optional[str] = None) -> Dict:
+        """Gera URL pré-assinada para upload
+        
+        Com contentHash (SHA-256), um arquivo idêntico já armazenado e
+        verificado pelo S3 é devolvido no lugar da URL e o upload/conversão
+        são pulados.
+        """
         try:
             # Validação e sanitização
             safe_filename = self._sanitize_filename(file_name)
@@ -66,6 +100,21 @@ class VideoService:
             if file_size <= 0:
                 return {'success': False, 'message': 'Tamanho do arquivo inválido'}
             
+            parsed_hash = parse_content_hash(content_hash, hash_mode)
+            hash_check = None
+            if parsed_hash:
+                hash_check = check_content_hash(self.s3_client, self.bucket_name, parsed_hash, file_size)
+                existing = hash_check['existing']
+                if existing:
+                    logger.info(f"Upload duplicado ignorado: {file_name} -> {existing['Key']}")
+                    return {
+                        'success': True,
+                        'duplicate': True,
+                        'key': existing['Key'],
+                        'file': self._build_file_info(existing, existing['Key'].split('/')[-1]),
+                        'message': 'Arquivo idêntico já existe'
+                    }
+            
             # Gera chave única
             timestamp = int(datetime.now().timestamp())
             if clean_path:
@@ -79,71 +128,229 @@ class VideoService:
             user_email = user.get('email', 'unknown') if user else 'unknown'
             logger.info(f"Upload iniciado: {key} por {user_email}")
             
-            # Multipart para arquivos grandes
-            if file_size > 50 * 1024 * 1024:
+            # Tamanho de parte e concorrência pela vazão observada deste usuário
+            plan = plan_upload(file_size, get_profile(load_tuning(self.s3_client, self.bucket_name), user_email))
+            metadata = {
+                'uploaded-by': user_email,
+                'upload-timestamp': str(timestamp)
+            }
+            
+            if plan['multipart']:
                 response = self.s3_client.create_multipart_upload(
                     Bucket=self.bucket_name,
                     Key=key,
                     ContentType=content_type,
-                    Metadata={
-                        'uploaded-by': user_email,
-                        'upload-timestamp': str(timestamp)
-                    }
+                    Metadata=metadata
                 )
                 
-                return {
+                result = {
                     'success': True,
                     'multipart': True,
                     'uploadId': response['UploadId'],
                     'key': key,
+                    'partSize': plan['part_size'],
+                    'totalParts': plan['total_parts'],
+                    'concurrency': plan['concurrency'],
                     'message': 'Multipart upload iniciado'
                 }
             else:
+                params = {
+                    'Bucket': self.bucket_name,
+                    'Key': key,
+                    'ContentType': content_type,
+                    'Metadata': metadata
+                }
+                # Hash do arquivo inteiro: o S3 recusa um corpo diferente
+                checksum = checksum_sha256(parsed_hash)
+                if checksum:
+                    params['ChecksumSHA256'] = checksum
+                
                 # Upload simples
                 upload_url = self.s3_client.generate_presigned_url(
                     'put_object',
-                    Params={
-                        'Bucket': self.bucket_name,
-                        'Key': key,
-                        'ContentType': content_type,
-                        'Metadata': {
-                            'uploaded-by': user_email,
-                            'upload-timestamp': str(timestamp)
-                        }
-                    },
+                    Params=params,
                     ExpiresIn=3600
                 )
                 
-                return {
+                result = {
                     'success': True,
                     'uploadUrl': upload_url,
                     'key': key,
                     'message': 'URL de upload gerada'
                 }
+                if checksum:
+                    result['uploadHeaders'] = {'x-amz-checksum-sha256': checksum}
+            
+            # Reserva do hash só depois do upload criado: falha no início não deixa reserva
+            if hash_check and hash_check['claimable']:
+                try:
+                    put_content_hash(self.s3_client, self.bucket_name, parsed_hash, key, file_size)
+                except Exception:
+                    if plan['multipart']:
+                        self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=result['uploadId'])
+                    raise
+            
+            # Mesmo tamanho, hash não verificado pelo S3: só um aviso
+            if hash_check and hash_check['advisory']:
+                result['possibleDuplicate'] = hash_check['advisory']['Key']
+            
+            return result
         
+        except ValidationError as e:
+            return {'success': False, 'message': str(e)}
         except Exception as e:
             logger.error(f"Erro ao gerar URL: {str(e)}")
             return {'success': False, 'message': 'Erro ao gerar URL de upload'}
     
-    def list_videos(self, show_hierarchy: bool = False) -> Dict:
-        """Lista vídeos com suporte a hierarquia"""
+    def list_videos(self, show_hierarchy: bool = False, page_size: Optional[int] = None,
+                    cursor: Optional[str] = None, fields: Optional[str] = None,
+                    shape: Optional[str] = None, query: Optional[Dict] = None) -> Dict:
+        """Lista vídeos com suporte a hierarquia, uma página do S3 por chamada
+        
+        Com filtros/ordenação (folder, ext, minSize, maxSize, from, to,
+        converting, sort, order) a página vem do motor de consulta em memória.
+        """
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix='videos/'
-            )
+            selected = parse_fields(fields, LISTING_FIELDS)
+            shape = parse_shape(shape)
+            if shape == 'columnar' and show_hierarchy:
+                raise ValidationError('Formato columnar disponível apenas para lista plana')
+            
+            filtered = has_query(query)
+            query_key = tuple((name, str(query[name])) for name in QUERY_PARAMS if filtered and query.get(name))
+            
+            # ETag do índice na chave: uploads simples (PUT direto no S3) invalidam
+            # via evento S3; sem índice construído a frescura fica limitada ao TTL
+            catalog_version = catalog_etag(self.s3_client, self.bucket_name)
+            cache_key = (catalog_version, 'hierarchy' if show_hierarchy else 'items', str(page_size or ''), cursor or '', query_key)
+            cached = listing_cache.get(cache_key)
+            if cached is not None:
+                return self._shape_listing(cached, selected, shape)
+            
+            # O mesmo ETag serve ao cache, ao motor de consulta e ao índice: um HEAD por requisição
+            if filtered:
+                page = query_catalog(self.s3_client, self.bucket_name, catalog_version, query, page_size, cursor)
+            else:
+                page = self._list_page('videos/', page_size, cursor, catalog_version)
+            response = {'Contents': page['contents']}
             
             if show_hierarchy:
                 hierarchy = self._build_hierarchy(response)
-                return {'success': True, 'hierarchy': hierarchy}
+                result = {'success': True, 'hierarchy': hierarchy, 'nextCursor': page['next_cursor']}
             else:
                 items = self._build_flat_list(response)
-                return {'success': True, 'items': items}
+                result = {'success': True, 'items': items, 'nextCursor': page['next_cursor']}
+            if page.get('sorted') is False:
+                # Sem índice do catálogo: filtros por página do S3, ordem das chaves
+                result['sorted'] = False
+            
+            listing_cache.set(cache_key, result)
+            return self._shape_listing(result, selected, shape)
         
+        except ValidationError as e:
+            return {'success': False, 'message': str(e)}
         except Exception as e:
             logger.error(f"Erro ao listar vídeos: {str(e)}")
             return {'success': False, 'message': 'Erro ao listar vídeos'}
     
+    def browse(self, path: str = '', page_size: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
+        """Navegação lazy por pasta: uma página do S3 com Delimiter='/' por chamada"""
+        try:
+            clean_path = self._sanitize_path(path) if path else ''
+            prefix = f'videos/{clean_path}/' if clean_path else 'videos/'
+            
+            cache_key = (catalog_etag(self.s3_client, self.bucket_name), 'browse', prefix, str(page_size or ''), cursor or '')
+            cached = listing_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            page = list_objects_page(
+                self.s3_client,
+                self.bucket_name,
+                prefix,
+                page_size=page_size,
+                cursor=cursor,
+                delimiter='/'
+            )
+            
+            folders = []
+            for folder_prefix in page['common_prefixes']:
+                folders.append({
+                    'key': folder_prefix,
+                    'name': folder_prefix[len(prefix):].rstrip('/'),
+                    'path': folder_prefix[len('videos/'):].rstrip('/'),
+                    'type': 'folder'
+                })
+            
+            files = []
+            for obj in page['contents']:
+                if obj['Key'] == prefix or obj['Key'].endswith('/'):
+                    continue
+                file_info = self._build_file_info(obj, obj['Key'][len(prefix):])
+                file_info['type'] = 'file'
+                files.append(file_info)
+            
+            result = {
+                'success': True,
+                'currentPath': clean_path,
+                'folders': folders,
+                'files': files,
+                'nextCursor': page['next_cursor']
+            }
+            listing_cache.set(cache_key, result)
+            return result
+        
+        except ValidationError as e:
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            logger.error(f"Erro ao navegar pasta: {str(e)}")
+            return {'success': False, 'message': 'Erro ao listar pasta'}
+    
+    def _shape_listing(self, result: Dict, fields: Optional[List[str]], shape: str) -> Dict:
+        """Aplica ?fields= e ?shape= sem alterar o resultado em cache"""
+        if shape == 'columnar':
+            columnar = to_columns(result['items'], fields or LISTING_FIELDS, self.cloudfront_url)
+            return {'success': True, **columnar, 'nextCursor': result['nextCursor']}
+        
+        if not fields:
+            return result
+        
+        if 'hierarchy' in result:
+            hierarchy = {folder: {'files': project(data['files'], fields)}
+                         for folder, data in result['hierarchy'].items()}
+            return {**result, 'hierarchy': hierarchy}
+        return {**result, 'items': project(result['items'], fields)}
+    
+    def stream_videos(self, cursor: Optional[str] = None) -> Dict:
+        """Lista em NDJSON: uma linha por vídeo, sem montar a lista inteira em memória"""
+        try:
+            index = load_catalog_index(self.s3_client, self.bucket_name)
+            body, next_cursor, count = build_ndjson_body(
+                iter_objects(self.s3_client, self.bucket_name, 'videos/', cursor=cursor, index=index),
+                lambda obj: self._build_file_info(obj, obj['Key'].split('/')[-1])
+            )
+            return {'success': True, 'body': body, 'nextCursor': next_cursor, 'count': count}
+            
+        except ValidationError as e:
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            logger.error(f"Erro ao listar vídeos (ndjson): {str(e)}")
+            return {'success': False, 'message': 'Erro ao listar vídeos'}
+    
+    def _list_page(self, prefix: str, page_size: Optional[int], cursor: Optional[str], etag: Optional[str]) -> Dict:
+        """Lê uma página do índice do catálogo (etag do HEAD já feito; o GET só quando mudou) ou, sem índice, do S3"""
+        index = load_catalog_index_at(self.s3_client, self.bucket_name, etag)
+        if index:
+            return index.list_page(prefix, page_size=page_size, cursor=cursor)
+        
+        return list_objects_page(
+            self.s3_client,
+            self.bucket_name,
+            prefix,
+            page_size=page_size,
+            cursor=cursor
+        )
+    
     def delete_item(self, key: str, item_type: str = 'file', user: Dict = None) -> Dict:
         """Deleta vídeo ou pasta"""
         try:
@@ -161,8 +368,10 @@ class VideoService:
                     Prefix=key
                 )
                 
+                deleted_keys = []
                 if 'Contents' in response:
                     objects_to_delete = [{'Key': obj['Key']} for obj in response['Contents']]
+                    deleted_keys = [obj['Key'] for obj in objects_to_delete]
                     
                     if objects_to_delete:
                         self.s3_client.delete_objects(
@@ -175,7 +384,10 @@ class VideoService:
                     Bucket=self.bucket_name,
                     Key=key
                 )
+                deleted_keys = [key]
             
+            listing_cache.invalidate()
+            self._record_changes([{'type': 'remove', 'key': k} for k in deleted_keys])
             return {'success': True, 'message': 'Item deletado com sucesso'}
         
         except Exception as e:
@@ -202,7 +414,31 @@ class VideoService:
             logger.error(f"Erro multipart URL: {str(e)}")
             return {'success': False, 'message': 'Erro ao gerar URL multipart'}
     
-    def complete_multipart_upload(self, upload_id: str, parts: List[Dict], key: str, user: Dict = None) -> Dict:
+    def get_multipart_urls(self, upload_id: str, key: str, start_part=None, end_part=None,
+                           part_numbers: Optional[List] = None) -> Dict:
+        """Gera URLs de várias partes numa só chamada (intervalo ou lista de partes)"""
+        try:
+            urls = presign_part_urls(
+                self.s3_client,
+                self.bucket_name,
+                key,
+                upload_id,
+                parse_part_numbers(start_part, end_part, part_numbers)
+            )
+            return {
+                'success': True,
+                'urls': [{'partNumber': u['part_number'], 'uploadUrl': u['url']} for u in urls],
+                'expiresIn': PART_URL_EXPIRES
+            }
+        
+        except ValidationError as e:
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            logger.error(f"Erro multipart URLs: {str(e)}")
+            return {'success': False, 'message': 'Erro ao gerar URLs multipart'}
+    
+    def complete_multipart_upload(self, upload_id: str, parts: List[Dict], key: str, user: Dict = None,
+                                  upload_stats: Optional[Dict] = None, part_timings: Optional[List[Dict]] = None) -> Dict:
         """Completa multipart upload"""
         try:
             response = self.s3_client.complete_multipart_upload(
@@ -214,6 +450,9 @@ class VideoService:
             
             user_email = user.get('email', 'unknown') if user else 'unknown'
             logger.info(f"Upload concluído: {key} por {user_email}")
+            listing_cache.invalidate()
+            self._record_changes([{'type': 'add', 'key': key}])
+            self._record_upload_stats(upload_stats, user_email, part_timings)
             
             return {
                 'success': True,
@@ -225,6 +464,57 @@ class VideoService:
             logger.error(f"Erro ao completar upload: {str(e)}")
             return {'success': False, 'message': 'Erro ao completar upload'}
     
+    def get_changes(self, since: Optional[str] = None, limit: Optional[str] = None) -> Dict:
+        """Mudanças desde o token (sem token: devolve o token inicial)"""
+        try:
+            # Limite inválido vira ValidationError (400), não erro interno
+            changes = read_changes(self.s3_client, self.bucket_name, since, parse_change_limit(limit))
+            return {'success': True, **changes}
+        except ValidationError as e:
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            logger.error(f"Erro ao ler mudanças: {str(e)}")
+            return {'success': False, 'message': 'Erro ao ler mudanças'}
+    
+    def _record_changes(self, changes: List[Dict]) -> None:
+        """Registra mudanças no journal (falha não desfaz a operação)"""
+        try:
+            append_changes(self.s3_client, self.bucket_name, changes)
+        except StorageError as e:
+            logger.error(f"Erro no journal de mudanças: {str(e)}")
+    
+    def _record_upload_stats(self, upload_stats: Optional[Dict], user_email: str,
+                             part_timings: Optional[List[Dict]] = None) -> None:
+        """Registra a vazão informada pelo cliente (falha não afeta o upload concluído)"""
+        telemetry = None
+        try:
+            timings = parse_part_timings(part_timings)
+            if timings:
+                telemetry = summarize_timings(timings)
+                record_upload_telemetry(self.s3_client, self.bucket_name, telemetry)
+        except (StorageError, ValidationError) as e:
+            logger.error(f"Erro ao registrar telemetria do upload: {str(e)}")
+        
+        try:
+            stats = parse_upload_stats(upload_stats) or stats_from_summary(telemetry)
+            if stats:
+                profile = user_email if user_email != 'unknown' else None
+                record_upload_stats(self.s3_client, self.bucket_name, stats, profile)
+        except (StorageError, ValidationError) as e:
+            logger.error(f"Erro ao registrar vazão do upload: {str(e)}")
+    
+    def get_upload_telemetry(self) -> Dict:
+        """Percentis de vazão dos uploads por faixa de tamanho de arquivo"""
+        try:
+            return {'success': True, **telemetry_report(self.s3_client, self.bucket_name)}
+        except StorageError as e:
+            logger.error(f"Erro ao carregar telemetria de upload: {str(e)}")
+            return {'success': False, 'message': 'Erro ao carregar telemetria de upload'}
+    
+    def get_cache_stats(self) -> Dict:
+        """Estatísticas do cache de listagem deste container"""
+        return {'success': True, 'cache': listing_cache.stats()}
+    
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitiza nome do arquivo"""
         if not filename:
@@ -309,15 +599,14 @@ class VideoService:
                     'type': 'file'
                 })
         
-        # Adiciona pastas
-        for folder in folders:
-            items.insert(0, {
-                'key': f'videos/{folder}/',
-                'name': folder,
-                'type': 'folder'
-            })
+        # Adiciona pastas no início (uma única concatenação)
+        folder_items = [{
+            'key': f'videos/{folder}/',
+            'name': folder,
+            'type': 'folder'
+        } for folder in sorted(folders)]
         
-        return items
+        return folder_items + items
     
     def _build_file_info(self, obj: Dict, name: str) -> Dict:
         """Constrói informações do arquivo"""
@@ -337,8 +626,9 @@ def lambda_handler(event, context):
     
     cors_headers = {
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Requested-With',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Requested-With,If-None-Match',
         'Access-Control-Allow-Methods': 'POST,GET,DELETE,OPTIONS',
+        'Access-Control-Expose-Headers': 'X-Next-Cursor,X-Video-Count,ETag',
         'Content-Type': 'application/json'
     }
     
@@ -356,6 +646,7 @@ def lambda_handler(event, context):
             }
         
         user = auth_result['user']
+        listing = False
         
         # Roteamento
         if event['httpMethod'] == 'POST':
@@ -368,12 +659,22 @@ def lambda_handler(event, context):
                     body.get('partNumber', 0),
                     body.get('key', '')
                 )
+            elif action == 'get-part-urls':
+                result = video_service.get_multipart_urls(
+                    body.get('uploadId', ''),
+                    body.get('key', ''),
+                    body.get('startPart'),
+                    body.get('endPart'),
+                    body.get('partNumbers')
+                )
             elif action == 'complete-multipart':
                 result = video_service.complete_multipart_upload(
                     body.get('uploadId', ''),
                     body.get('parts', []),
                     body.get('key', ''),
-                    user
+                    user,
+                    body.get('uploadStats'),
+                    body.get('partTimings')
                 )
             else:
                 result = video_service.generate_upload_url(
@@ -381,12 +682,46 @@ def lambda_handler(event, context):
                     body.get('fileType', ''),
                     body.get('fileSize', 0),
                     body.get('folderPath', ''),
-                    user
+                    user,
+                    body.get('contentHash'),
+                    body.get('hashMode')
                 )
         
         elif event['httpMethod'] == 'GET':
-            show_hierarchy = event.get('queryStringParameters', {}).get('hierarchy') == 'true' if event.get('queryStringParameters') else False
-            result = video_service.list_videos(show_hierarchy)
+            query_params = event.get('queryStringParameters') or {}
+            if query_params.get('action') == 'cache-stats':
+                result = video_service.get_cache_stats()
+            elif query_params.get('action') == 'changes':
+                result = video_service.get_changes(query_params.get('since'), query_params.get('limit'))
+            elif query_params.get('action') == 'upload-telemetry':
+                result = video_service.get_upload_telemetry()
+            elif query_params.get('format') == 'ndjson':
+                result = video_service.stream_videos(query_params.get('cursor'))
+                if result.get('success'):
+                    ndjson_headers = {**cors_headers, 'Content-Type': NDJSON_CONTENT_TYPE, 'X-Video-Count': str(result['count'])}
+                    if result['nextCursor']:
+                        ndjson_headers['X-Next-Cursor'] = result['nextCursor']
+                    return compress_response(
+                        {'statusCode': 200, 'headers': ndjson_headers, 'body': result['body']},
+                        get_request_header(event.get('headers'), 'Accept-Encoding')
+                    )
+            elif query_params.get('browse') == 'true':
+                listing = True
+                result = video_service.browse(
+                    query_params.get('path', ''),
+                    query_params.get('pageSize'),
+                    query_params.get('cursor')
+                )
+            else:
+                listing = True
+                result = video_service.list_videos(
+                    query_params.get('hierarchy') == 'true',
+                    query_params.get('pageSize'),
+                    query_params.get('cursor'),
+                    query_params.get('fields'),
+                    query_params.get('shape'),
+                    query_params
+                )
         
         elif event['httpMethod'] == 'DELETE':
             body = json.loads(event['body'])
@@ -401,11 +736,16 @@ def lambda_handler(event, context):
         
         status_code = 200 if result.get('success') else 400
         
-        return {
+        response = {
             'statusCode': status_code,
             'headers': cors_headers,
             'body': json.dumps(result)
         }
+        # Listagens levam ETag: polling com If-None-Match recebe 304 sem corpo
+        if listing:
+            response = apply_etag(response, event.get('headers') or {}, result)
+        # Corpo comprimido (gzip/br) quando o cliente aceita
+        return compress_response(response, get_request_header(event.get('headers'), 'Accept-Encoding'))
         
     except Exception as e:
         logger.error(f"Erro no handler: {str(e)}")
@@ -0,0 +1,56 @@
+import time
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Small in-process cache that lives as long as the warm Lambda container.
+
+    Not thread-safe: read and write it from the request thread.
+    """
+
+    def __init__(self, ttl: float = 30, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache: Dict[Hashable, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.cache.get(key)
+        if entry and time.time() - entry['timestamp'] < self.ttl:
+            self.hits += 1
+            return entry['value']
+
+        if entry:
+            del self.cache[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        # Entries stay in write order (a rewrite moves the key to the end),
+        # so the first one is the oldest and eviction is O(1)
+        self.cache.pop(key, None)
+        if len(self.cache) >= self.max_entries:
+            del self.cache[next(iter(self.cache))]
+
+        self.cache[key] = {
+            'value': value,
+            'timestamp': time.time()
+        }
+
+    def invalidate(self) -> None:
+        """Drop every entry (write-through invalidation after a change)"""
+        self.cache.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'entries': len(self.cache),
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'ttlSeconds': self.ttl
+        }
@@ -0,0 +1,301 @@
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import unquote_plus
+
+from botocore.exceptions import ClientError
+
+from .exceptions import StorageError
+from .pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor, parse_page_size
+
+INDEX_KEY = 'index/catalog.json'
+INDEXED_PREFIXES = ('videos/', 'converted/')
+MAX_TOMBSTONES = 5000
+
+
+class IndexConflictError(StorageError):
+    """The index object changed between load and save"""
+    pass
+
+
+def _sequencer_newer(candidate: Optional[str], current: Optional[str]) -> bool:
+    """Compare S3 event sequencers (hex strings, shorter one left-padded with zeros)"""
+    if not candidate or not current:
+        return True
+    width = max(len(candidate), len(current))
+    return candidate.zfill(width) > current.zfill(width)
+
+
+def _to_epoch(value: Any) -> int:
+    """Normalize datetime / ISO string / number to epoch seconds"""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    return int(value or 0)
+
+
+class CatalogIndex:
+    """Compact JSON catalog of the bucket, kept up to date from S3 events.
+
+    Each entry maps an object key to [size, last_modified_epoch, etag, sequencer]
+    so listings cost a single GET instead of one ListObjectsV2 call per 1000 keys.
+    Every applied add/remove is also recorded in `changes` so derived indexes
+    (folder aggregates, search) can be updated from the same events.
+    """
+
+    def __init__(self, s3, bucket_name: str, index_key: str = INDEX_KEY,
+                 prefixes: Iterable[str] = INDEXED_PREFIXES):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.index_key = index_key
+        self.prefixes = tuple(prefixes)
+        self.entries: Dict[str, List[Any]] = {}
+        self.removed: Dict[str, str] = {}
+        self.etag: Optional[str] = None
+        self.loaded = False
+        self.changes: List[Dict[str, Any]] = []
+        self._sorted_keys: Optional[List[str]] = None
+
+    def load(self) -> bool:
+        """Load the index object; returns False when it does not exist yet"""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket_name, Key=self.index_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                self.entries, self.removed, self.etag = {}, {}, None
+                self.loaded = False
+                self.changes = []
+                self._sorted_keys = None
+                return False
+            raise StorageError(f"Failed to load catalog index: {str(e)}")
+
+        data = json.loads(response['Body'].read().decode('utf-8'))
+        self.entries = data.get('objects', {})
+        self.removed = data.get('removed', {})
+        self.etag = response.get('ETag')
+        self.loaded = True
+        self.changes = []
+        self._sorted_keys = None
+        return True
+
+    def save(self, check_conflict: bool = True) -> None:
+        """Write the index back, refusing to overwrite a concurrent update"""
+        if check_conflict:
+            current = self._current_etag()
+            if current != self.etag:
+                raise IndexConflictError('Catalog index changed during update')
+
+        if len(self.removed) > MAX_TOMBSTONES:
+            newest = sorted(self.removed.items(), key=lambda item: item[1].zfill(32))[-MAX_TOMBSTONES:]
+            self.removed = dict(newest)
+
+        body = json.dumps({
+            'version': 1,
+            'updatedAt': datetime.now(timezone.utc).isoformat(),
+            'count': len(self.entries),
+            'objects': self.entries,
+            'removed': self.removed
+        }, separators=(',', ':'))
+
+        response = self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self.index_key,
+            Body=body.encode('utf-8'),
+            ContentType='application/json'
+        )
+        self.etag = response.get('ETag')
+        self.loaded = True
+
+    def _current_etag(self) -> Optional[str]:
+        try:
+            return self.s3.head_object(Bucket=self.bucket_name, Key=self.index_key).get('ETag')
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+                return None
+            raise StorageError(f"Failed to check catalog index: {str(e)}")
+
+    def is_indexed(self, key: str) -> bool:
+        return key.startswith(self.prefixes) and not key.endswith('/')
+
+    def upsert(self, key: str, size: int, last_modified: Any, etag: str = '',
+               sequencer: Optional[str] = None) -> bool:
+        """Add or replace an entry; stale (out of order) events are ignored"""
+        if not self.is_indexed(key):
+            return False
+
+        current = self.entries.get(key)
+        known = current[3] if current and len(current) > 3 else self.removed.get(key)
+        if sequencer and known and not _sequencer_newer(sequencer, known):
+            return False
+
+        if current is None:
+            self._sorted_keys = None
+        else:
+            self.changes.append({'type': 'remove', 'key': key, 'size': current[0], 'lastModified': current[1]})
+        self.entries[key] = [int(size or 0), _to_epoch(last_modified), (etag or '').strip('"'), sequencer or '']
+        self.removed.pop(key, None)
+        self.changes.append({'type': 'add', 'key': key, 'size': self.entries[key][0], 'lastModified': self.entries[key][1]})
+        return True
+
+    def remove(self, key: str, sequencer: Optional[str] = None) -> bool:
+        """Drop an entry, remembering the sequencer so late creates are ignored"""
+        current = self.entries.get(key)
+        if current is None:
+            if sequencer and _sequencer_newer(sequencer, self.removed.get(key)):
+                self.removed[key] = sequencer
+            return False
+
+        if sequencer and len(current) > 3 and current[3] and not _sequencer_newer(sequencer, current[3]):
+            return False
+
+        del self.entries[key]
+        self._sorted_keys = None
+        self.changes.append({'type': 'remove', 'key': key, 'size': current[0], 'lastModified': current[1]})
+        if sequencer:
+            self.removed[key] = sequencer
+        return True
+
+    def apply_event_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Apply S3 ObjectCreated/ObjectRemoved notification records"""
+        changed = 0
+        for record in records:
+            event_name = record.get('eventName', '')
+            s3_info = record.get('s3', {})
+            obj = s3_info.get('object', {})
+            key = unquote_plus(obj.get('key', ''))
+            sequencer = obj.get('sequencer')
+
+            if event_name.startswith('ObjectCreated'):
+                changed += self.upsert(
+                    key,
+                    obj.get('size', 0),
+                    record.get('eventTime') or datetime.now(timezone.utc),
+                    obj.get('eTag', ''),
+                    sequencer
+                )
+            elif event_name.startswith('ObjectRemoved'):
+                changed += self.remove(key, sequencer)
+        return changed
+
+    def update_from_events(self, records: List[Dict[str, Any]], retries: int = 3) -> int:
+        """Load, apply and save with optimistic retries on concurrent writers"""
+        for attempt in range(retries):
+            self.load()
+            changed = self.apply_event_records(records)
+            if not changed:
+                return 0
+            try:
+                self.save()
+                return changed
+            except IndexConflictError:
+                if attempt == retries - 1:
+                    raise
+        return 0
+
+    def rebuild(self) -> int:
+        """Full scan of the indexed prefixes; used to bootstrap or repair the index"""
+        self.entries = {}
+        self.removed = {}
+        self._sorted_keys = None
+
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for prefix in self.prefixes:
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    self.upsert(obj['Key'], obj['Size'], obj['LastModified'], obj.get('ETag', ''))
+
+        # Derived indexes are rebuilt from the full catalog, not replayed
+        self.changes = []
+        self.save(check_conflict=False)
+        return len(self.entries)
+
+    def _keys(self) -> List[str]:
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.entries)
+        return self._sorted_keys
+
+    def to_s3_object(self, key: str) -> Dict[str, Any]:
+        """Render an entry in the same shape ListObjectsV2 uses for Contents"""
+        size, modified, etag = self.entries[key][:3]
+        return {
+            'Key': key,
+            'Size': size,
+            'LastModified': datetime.fromtimestamp(modified, timezone.utc),
+            'ETag': f'"{etag}"'
+        }
+
+    def iter_objects(self, prefix: str = '', start_after: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield entries under prefix in key order"""
+        keys = self._keys()
+        start = bisect_right(keys, start_after) if start_after and start_after >= prefix else bisect_left(keys, prefix)
+        for i in range(start, len(keys)):
+            key = keys[i]
+            if not key.startswith(prefix):
+                break
+            yield self.to_s3_object(key)
+
+    def list_page(self, prefix: str, page_size: int = DEFAULT_PAGE_SIZE,
+                  cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Same contract as pagination.list_objects_page, served from the index"""
+        page_size = parse_page_size(page_size)
+        start_after = decode_cursor(cursor).get('a')
+
+        contents = []
+        next_cursor = None
+        for obj in self.iter_objects(prefix, start_after):
+            if len(contents) == page_size:
+                next_cursor = encode_cursor(start_after=contents[-1]['Key'])
+                break
+            contents.append(obj)
+
+        return {'contents': contents, 'common_prefixes': [], 'next_cursor': next_cursor}
+
+
+def catalog_etag(s3, bucket_name: str) -> Optional[str]:
+    """ETag of the stored index (one HEAD), or None when it has not been built yet.
+
+    Warm containers key derived in-memory structures on it and rebuild them
+    only when the catalog changed.
+    """
+    try:
+        return s3.head_object(Bucket=bucket_name, Key=INDEX_KEY).get('ETag')
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+            return None
+        raise StorageError(f"Failed to check catalog index: {str(e)}")
+
+
+# Loaded indexes per bucket, reused by warm containers while the catalog ETag is unchanged
+_loaded: Dict[str, CatalogIndex] = {}
+
+
+def load_catalog_index(s3, bucket_name: str) -> Optional[CatalogIndex]:
+    """Return the loaded index, or None when it has not been built yet.
+
+    One HEAD per call; the GET, JSON parse and key sort only happen when the
+    catalog changed since this container last loaded it. The returned index
+    is shared between requests, so it is read-only: writers (index-service)
+    build their own CatalogIndex.
+    """
+    return load_catalog_index_at(s3, bucket_name, catalog_etag(s3, bucket_name))
+
+
+def load_catalog_index_at(s3, bucket_name: str, etag: Optional[str]) -> Optional[CatalogIndex]:
+    """load_catalog_index for a request that already HEADed the catalog (etag from catalog_etag)"""
+    if etag is None:
+        _loaded.pop(bucket_name, None)
+        return None
+
+    cached = _loaded.get(bucket_name)
+    if cached is not None and cached.etag == etag:
+        return cached
+
+    index = CatalogIndex(s3, bucket_name)
+    if not index.load():
+        return None
+    # Sorted once per catalog version, before other requests can see it
+    index._keys()
+    _loaded[bucket_name] = index
+    return index
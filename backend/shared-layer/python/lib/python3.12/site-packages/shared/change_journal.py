@@ -0,0 +1,123 @@
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from .exceptions import StorageError, ValidationError
+
+JOURNAL_PREFIX = 'index/changes/'
+CHANGE_TYPES = ('add', 'remove', 'converted')
+
+# Entries younger than this are not served yet, so a writer whose PUT lands
+# after a reader listed past its token is not skipped
+SETTLE_SECONDS = 5
+# Older entries are expired by the index/changes/ lifecycle rule
+# (infrastructure/s3.tf); a client behind this window gets reset=True and
+# reloads the full listing
+RETENTION_SECONDS = 7 * 24 * 3600
+MAX_ENTRIES_PER_READ = 200
+
+
+def _new_token(now_ms: Optional[int] = None) -> str:
+    """Time-ordered journal token: <epoch ms, 13 digits>-<random>"""
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    return f"{now_ms:013d}-{uuid.uuid4().hex[:12]}"
+
+
+def parse_change_limit(value: Any) -> int:
+    """Parse a client supplied entry limit, clamped to MAX_ENTRIES_PER_READ"""
+    try:
+        limit = int(value) if value not in (None, '') else MAX_ENTRIES_PER_READ
+    except (TypeError, ValueError):
+        raise ValidationError('Invalid limit')
+
+    return max(1, min(limit, MAX_ENTRIES_PER_READ))
+
+
+def _token_ms(token: str) -> int:
+    try:
+        return int(token.split('-', 1)[0])
+    except ValueError:
+        raise ValidationError('Invalid change token')
+
+
+def append_changes(s3, bucket_name: str, changes: List[Dict[str, Any]]) -> Optional[str]:
+    """Append one journal entry holding a batch of changes.
+
+    Each change is {'type': add|remove|converted, 'key': ..., ...}. Callers
+    treat StorageError as non-fatal: the upload or delete already happened.
+    """
+    if not changes:
+        return None
+    for change in changes:
+        if change.get('type') not in CHANGE_TYPES or not change.get('key'):
+            raise ValidationError(f"Invalid change: {change}")
+
+    now = datetime.now(timezone.utc)
+    token = _new_token(int(now.timestamp() * 1000))
+    entries = [{**change, 'at': change.get('at') or now.isoformat()} for change in changes]
+    try:
+        s3.put_object(
+            Bucket=bucket_name,
+            Key=f"{JOURNAL_PREFIX}{token}.json",
+            Body=json.dumps({'changes': entries}, separators=(',', ':'), default=str),
+            ContentType='application/json'
+        )
+    except ClientError as e:
+        raise StorageError(f"Failed to append change journal entry: {str(e)}")
+    return token
+
+
+def head_token() -> str:
+    """Token a new client starts from (everything settled so far is in its full listing)"""
+    # Sorts after every entry of that millisecond; entries from the settle window are sent again (harmless)
+    return f"{int((time.time() - SETTLE_SECONDS) * 1000):013d}-{'f' * 12}"
+
+
+def read_changes(s3, bucket_name: str, since: Optional[str], limit: int = MAX_ENTRIES_PER_READ) -> Dict[str, Any]:
+    """Changes after `since`, collapsed to the latest change per key.
+
+    Cost is one LIST page after the token plus one GET per journal entry,
+    independent of library size.
+    """
+    if not since:
+        return {'changes': [], 'next': head_token(), 'has_more': False, 'reset': False}
+
+    now_ms = int(time.time() * 1000)
+    if now_ms - _token_ms(since) > RETENTION_SECONDS * 1000:
+        return {'changes': [], 'next': head_token(), 'has_more': False, 'reset': True}
+
+    settled_before = f"{JOURNAL_PREFIX}{now_ms - SETTLE_SECONDS * 1000:013d}"
+    response = s3.list_objects_v2(
+        Bucket=bucket_name,
+        Prefix=JOURNAL_PREFIX,
+        StartAfter=f"{JOURNAL_PREFIX}{since}.json",
+        MaxKeys=parse_change_limit(limit)
+    )
+    keys = [obj['Key'] for obj in response.get('Contents', []) if obj['Key'] < settled_before]
+    has_more = bool(response.get('IsTruncated')) and len(keys) == len(response.get('Contents', []))
+
+    def fetch(key):
+        body = s3.get_object(Bucket=bucket_name, Key=key)['Body'].read().decode('utf-8')
+        return json.loads(body).get('changes', [])
+
+    entries: List[List[Dict[str, Any]]] = []
+    if keys:
+        with ThreadPoolExecutor(max_workers=min(8, len(keys))) as executor:
+            entries = list(executor.map(fetch, keys))
+
+    # Latest change per key wins; a conversion also settles the original key
+    latest: Dict[str, Dict[str, Any]] = {}
+    for batch in entries:
+        for change in batch:
+            latest.pop(change['key'], None)
+            if change['type'] == 'converted' and change.get('from'):
+                latest.pop(change['from'], None)
+            latest[change['key']] = change
+
+    next_token = keys[-1][len(JOURNAL_PREFIX):-len('.json')] if keys else since
+    return {'changes': list(latest.values()), 'next': next_token, 'has_more': has_more, 'reset': False}
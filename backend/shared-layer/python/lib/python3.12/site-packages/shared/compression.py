@@ -0,0 +1,91 @@
+import base64
+import gzip
+import os
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip is offered when brotli is not packaged in the layer
+    brotli = None
+
+# Bodies below this size go out as-is: the CPU cost is not worth the few bytes saved
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Encodings this runtime can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick a Content-Encoding from an Accept-Encoding header.
+
+    Honors q-values (q=0 refuses an encoding) and the * wildcard. On a tie
+    brotli wins over gzip. Returns None when the body should stay identity.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token] = weight
+
+    best = None
+    best_weight = 0.0
+    for encoding in supported_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output deterministic for identical bodies
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_response(response: Dict[str, Any], accept_encoding: Optional[str],
+                      min_bytes: int = COMPRESSION_MIN_BYTES) -> Dict[str, Any]:
+    """Compress a Lambda proxy response body when the client accepts it.
+
+    The compressed body is base64 encoded with isBase64Encoded set, which is
+    what API Gateway (REST and HTTP APIs) expects for binary payloads.
+    """
+    body = response.get('body')
+    if not body or response.get('isBase64Encoded'):
+        return response
+
+    headers = dict(response.get('headers') or {})
+    headers['Vary'] = 'Accept-Encoding'
+
+    raw = body.encode('utf-8') if isinstance(body, str) else body
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or len(raw) < min_bytes:
+        return {**response, 'headers': headers}
+
+    headers['Content-Encoding'] = encoding
+    return {
+        **response,
+        'headers': headers,
+        'body': base64.b64encode(compress_body(raw, encoding)).decode('ascii'),
+        'isBase64Encoded': True
+    }
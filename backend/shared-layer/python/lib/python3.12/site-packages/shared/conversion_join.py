@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Suffixes the conversion jobs append to the output name (conversion_complete, MediaConvert NameModifier)
+_CONVERTED_SUFFIXES = ('_converted', '_mp4')
+_LISTING_PREFIXES = ('videos/', 'converted/')
+
+
+def _relative(key: str) -> str:
+    for prefix in _LISTING_PREFIXES:
+        if key.startswith(prefix):
+            return key[len(prefix):]
+    return key
+
+
+def join_key(key: str) -> str:
+    """Key shared by an original and its MP4: relative path without extension or job suffix.
+
+    videos/a/1-x.ts and converted/a/1-x_converted.mp4 both give 'a/1-x'.
+    """
+    folder, _, name = _relative(key).rpartition('/')
+    if '.' in name:
+        name = name.rsplit('.', 1)[0]
+    for suffix in _CONVERTED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return f"{folder}/{name}" if folder else name
+
+
+def _passed(current: Optional[str], key: str) -> bool:
+    """True once a key-ordered stream is past every key starting with `key`"""
+    return current is None or (current > key and not current.startswith(key))
+
+
+def join_listings(originals: Iterable[Dict[str, Any]], converted: Iterable[Dict[str, Any]]
+                  ) -> Iterator[Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """Streaming merge-join of two key-ordered listings on join_key.
+
+    Yields (join_key, originals, converted) per key, either list possibly
+    empty. Both inputs are consumed one object at a time in S3 key order.
+    Join-key order differs from key order ('a-b.ts' lists before 'a.ts'),
+    but every key that can match join key J starts with J, and keys sharing
+    a prefix are contiguous in S3 order. So a group is complete, and is
+    yielded, once both streams have moved past its prefix; only groups
+    whose prefix range is still open are buffered.
+    """
+    streams = [iter(originals), iter(converted)]
+    heads: List[Optional[Dict[str, Any]]] = [next(stream, None) for stream in streams]
+    pending: Dict[str, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
+
+    def position(side: int) -> Optional[str]:
+        return _relative(heads[side]['Key']) if heads[side] is not None else None
+
+    while heads[0] is not None or heads[1] is not None:
+        left, right = position(0), position(1)
+        side = 0 if right is None or (left is not None and left <= right) else 1
+        obj = heads[side]
+        pending.setdefault(join_key(obj['Key']), ([], []))[side].append(obj)
+        heads[side] = next(streams[side], None)
+
+        left, right = position(0), position(1)
+        done = [key for key in pending if _passed(left, key) and _passed(right, key)]
+        for key in done:
+            yield (key, *pending.pop(key))
+
+    for key, (matched_left, matched_right) in pending.items():
+        yield key, matched_left, matched_right
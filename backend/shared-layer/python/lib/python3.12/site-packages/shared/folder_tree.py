@@ -0,0 +1,167 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+
+from .exceptions import StorageError
+
+FOLDER_TREE_KEY = 'index/folders.json'
+VIDEOS_PREFIX = 'videos/'
+
+# Everything MediaConvert turns into MP4 (mirrors mediaconvert_trigger.should_convert)
+CONVERTIBLE_EXTENSIONS = {
+    'ts', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'm2ts', 'mts', 'webm', 'ogv',
+    '3gp', 'm4v', 'vob', 'asf', 'rm', 'rmvb'
+}
+
+
+def needs_conversion(key: str) -> bool:
+    """True while an original upload is still waiting for its MP4 rendition"""
+    name = key.rsplit('/', 1)[-1].lower()
+    return '.' in name and name.rsplit('.', 1)[1] in CONVERTIBLE_EXTENSIONS
+
+
+def _new_node() -> Dict[str, Any]:
+    return {'count': 0, 'bytes': 0, 'converting': 0, 'newest': 0, 'children': {}}
+
+
+class FolderTree:
+    """Prefix trie of videos/ folders with materialized per-folder aggregates.
+
+    Each node holds the video count, total bytes, number of files still being
+    converted and the newest modification time of everything below it, so
+    folder pages render from one read instead of a recursive listing.
+    `newest` is a high-water mark: deletes do not lower it until a rebuild.
+    """
+
+    def __init__(self, root: Optional[Dict[str, Any]] = None):
+        self.root = root or _new_node()
+        self.etag: Optional[str] = None
+
+    @staticmethod
+    def _folders(key: str) -> List[str]:
+        return key[len(VIDEOS_PREFIX):].split('/')[:-1]
+
+    def add(self, key: str, size: int, last_modified: int) -> None:
+        if not key.startswith(VIDEOS_PREFIX) or key.endswith('/'):
+            return
+
+        converting = 1 if needs_conversion(key) else 0
+        node = self.root
+        for part in [None] + self._folders(key):
+            if part is not None:
+                node = node['children'].setdefault(part, _new_node())
+            node['count'] += 1
+            node['bytes'] += int(size or 0)
+            node['converting'] += converting
+            node['newest'] = max(node['newest'], int(last_modified or 0))
+
+    def remove(self, key: str, size: int, last_modified: int = 0) -> None:
+        if not key.startswith(VIDEOS_PREFIX) or key.endswith('/'):
+            return
+
+        converting = 1 if needs_conversion(key) else 0
+        path = [self.root]
+        for part in self._folders(key):
+            child = path[-1]['children'].get(part)
+            if child is None:
+                return  # Unknown folder: tree is out of date, a rebuild will fix it
+            path.append(child)
+
+        for node in path:
+            node['count'] = max(0, node['count'] - 1)
+            node['bytes'] = max(0, node['bytes'] - int(size or 0))
+            node['converting'] = max(0, node['converting'] - converting)
+
+        # Prune folders that became empty, deepest first
+        parts = self._folders(key)
+        for depth in range(len(parts), 0, -1):
+            node = path[depth]
+            if node['count'] == 0 and not node['children']:
+                del path[depth - 1]['children'][parts[depth - 1]]
+
+    def apply_changes(self, changes: Iterable[Dict[str, Any]]) -> None:
+        """Apply the add/remove changes recorded by CatalogIndex"""
+        for change in changes:
+            if change['type'] == 'add':
+                self.add(change['key'], change['size'], change['lastModified'])
+            else:
+                self.remove(change['key'], change['size'], change['lastModified'])
+
+    @classmethod
+    def from_catalog(cls, index) -> 'FolderTree':
+        """Build the whole tree in one pass over the catalog index"""
+        tree = cls()
+        for key, entry in index.entries.items():
+            tree.add(key, entry[0], entry[1])
+        return tree
+
+    def node(self, path: str = '') -> Optional[Dict[str, Any]]:
+        node = self.root
+        for part in [p for p in path.strip('/').split('/') if p]:
+            node = node['children'].get(part)
+            if node is None:
+                return None
+        return node
+
+    def summary(self, path: str = '') -> Optional[Dict[str, Any]]:
+        """Aggregates for a folder and its direct subfolders"""
+        node = self.node(path)
+        if node is None:
+            return None
+
+        base = path.strip('/')
+        folders = []
+        for name in sorted(node['children']):
+            child = node['children'][name]
+            folders.append({
+                'name': name,
+                'path': f"{VIDEOS_PREFIX}{base + '/' if base else ''}{name}/",
+                **self._stats(child),
+                'has_subfolders': bool(child['children'])
+            })
+
+        return {'path': base, **self._stats(node), 'folders': folders}
+
+    @staticmethod
+    def _stats(node: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'video_count': node['count'],
+            'total_bytes': node['bytes'],
+            'converting': node['converting'],
+            'newest': datetime.fromtimestamp(node['newest'], timezone.utc).isoformat() if node['newest'] else None
+        }
+
+    def load(self, s3, bucket_name: str) -> bool:
+        try:
+            response = s3.get_object(Bucket=bucket_name, Key=FOLDER_TREE_KEY)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return False
+            raise StorageError(f"Failed to load folder tree: {str(e)}")
+
+        self.root = json.loads(response['Body'].read().decode('utf-8'))['root']
+        self.etag = response.get('ETag')
+        return True
+
+    def save(self, s3, bucket_name: str) -> None:
+        body = json.dumps({
+            'version': 1,
+            'updatedAt': datetime.now(timezone.utc).isoformat(),
+            'root': self.root
+        }, separators=(',', ':'))
+
+        response = s3.put_object(
+            Bucket=bucket_name,
+            Key=FOLDER_TREE_KEY,
+            Body=body.encode('utf-8'),
+            ContentType='application/json'
+        )
+        self.etag = response.get('ETag')
+
+
+def load_folder_tree(s3, bucket_name: str) -> Optional[FolderTree]:
+    """Return the stored tree, or None when it has not been built yet"""
+    tree = FolderTree()
+    return tree if tree.load(s3, bucket_name) else None
@@ -0,0 +1,114 @@
+import base64
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from .exceptions import ValidationError
+
+HASH_INDEX_PREFIX = 'index/hashes/'
+
+# full: SHA-256 of the whole file; authoritative once S3 has checked it (ChecksumSHA256
+#       on a single PUT). S3's SHA-256 for multipart objects is a checksum of the part
+#       checksums, so multipart uploads cannot be checked and stay advisory.
+# sampled: SHA-256 of the first, middle and last 4 MiB (files up to 12 MiB are hashed whole);
+#          advisory only, never used to skip an upload
+HASH_MODES = ('full', 'sampled')
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# How long an initiated upload keeps its hash before the object must exist
+PENDING_SECONDS = 24 * 3600
+
+
+def parse_content_hash(value: Optional[str], mode: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """Validate a client supplied content hash ("<hex>" or "sha256:<hex>")"""
+    if not value:
+        return None
+
+    mode = mode or 'full'
+    if mode not in HASH_MODES:
+        raise ValidationError(f"Invalid hash mode. Allowed: {', '.join(HASH_MODES)}")
+
+    digest = value.strip().lower()
+    if digest.startswith('sha256:'):
+        digest = digest[len('sha256:'):]
+    if not _SHA256_RE.match(digest):
+        raise ValidationError('Invalid content hash (expected SHA-256 hex)')
+
+    return {'mode': mode, 'digest': digest}
+
+
+def hash_index_key(content_hash: Dict[str, str]) -> str:
+    return f"{HASH_INDEX_PREFIX}{content_hash['mode']}/{content_hash['digest']}.json"
+
+
+def checksum_sha256(content_hash: Optional[Dict[str, str]]) -> Optional[str]:
+    """Base64 digest for S3's ChecksumSHA256, so S3 rejects a body that does not match (full mode only)"""
+    if not content_hash or content_hash['mode'] != 'full':
+        return None
+    return base64.b64encode(bytes.fromhex(content_hash['digest'])).decode('ascii')
+
+
+def put_content_hash(s3, bucket_name: str, content_hash: Dict[str, str], file_key: str, file_size: int) -> None:
+    """Record hash -> key once the upload is initiated (after check_content_hash allowed it).
+
+    The entry is only a claim: check_content_hash trusts it after S3 has
+    verified the stored object against the digest.
+    """
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=hash_index_key(content_hash),
+        Body=json.dumps({
+            'key': file_key,
+            'size': int(file_size or 0),
+            'created': datetime.now(timezone.utc).isoformat()
+        }),
+        ContentType='application/json'
+    )
+
+
+def check_content_hash(s3, bucket_name: str, content_hash: Dict[str, str], file_size: int) -> Dict[str, Any]:
+    """Look up an object with the same content, verified with a HEAD.
+
+    Returns {'existing', 'advisory', 'claimable'}. 'existing' is set only
+    when S3 stored the object with a ChecksumSHA256 equal to the full-file
+    digest: the client's hash alone never decides what content a key holds.
+    Same-size objects that S3 could not verify (sampled hashes, multipart
+    uploads) come back as 'advisory' and the upload goes ahead. An entry
+    whose object has not appeared yet stays claimed for PENDING_SECONDS so a
+    second upload started meanwhile does not take over the hash; deleted,
+    abandoned, unverified or different-size entries can be overwritten.
+    """
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=hash_index_key(content_hash))
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return {'existing': None, 'advisory': None, 'claimable': True}
+        raise
+
+    entry = json.loads(response['Body'].read().decode('utf-8'))
+    try:
+        head = s3.head_object(Bucket=bucket_name, Key=entry['key'], ChecksumMode='ENABLED')
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ('NoSuchKey', '404', 'NotFound'):
+            raise
+        created = datetime.fromisoformat(entry.get('created', '1970-01-01T00:00:00+00:00'))
+        pending = (datetime.now(timezone.utc) - created).total_seconds() < PENDING_SECONDS
+        return {'existing': None, 'advisory': None, 'claimable': not pending}
+
+    if int(file_size or 0) != head['ContentLength']:
+        return {'existing': None, 'advisory': None, 'claimable': True}
+
+    stored = {
+        'Key': entry['key'],
+        'Size': head['ContentLength'],
+        'LastModified': head['LastModified'],
+        'ETag': head.get('ETag', '')
+    }
+    expected = checksum_sha256(content_hash)
+    if expected and head.get('ChecksumSHA256') == expected:
+        return {'existing': stored, 'advisory': None, 'claimable': False}
+    return {'existing': None, 'advisory': stored, 'claimable': True}
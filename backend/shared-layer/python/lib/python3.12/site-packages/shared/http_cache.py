@@ -0,0 +1,58 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+CACHE_CONTROL = 'no-cache'
+
+
+def get_request_header(headers: Optional[Dict[str, str]], name: str) -> Optional[str]:
+    """Case-insensitive header lookup (REST APIs keep the client's casing, HTTP APIs lowercase)"""
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def compute_etag(payload: Any) -> str:
+    """Weak ETag of the payload.
+
+    Weak because it names the data, not the bytes: the gzip, brotli and
+    identity bodies of one payload all carry the same validator.
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return 'W/"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def _opaque(etag: str) -> str:
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored on both sides"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or _opaque(candidate) == _opaque(etag):
+            return True
+    return False
+
+
+def apply_etag(response: Dict[str, Any], request_headers: Optional[Dict[str, str]], payload: Any) -> Dict[str, Any]:
+    """Add an ETag to a 200 response, or turn it into an empty 304 when If-None-Match matches.
+
+    `payload` is what the ETag covers; leave out per-request fields such as
+    timings or timestamps so unchanged data revalidates.
+    """
+    if response.get('statusCode') != 200:
+        return response
+
+    etag = compute_etag(payload)
+    headers = {**(response.get('headers') or {}), 'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if etag_matches(get_request_header(request_headers, 'If-None-Match'), etag):
+        headers.pop('Content-Type', None)
+        return {'statusCode': 304, 'headers': headers, 'body': ''}
+    return {**response, 'headers': headers}
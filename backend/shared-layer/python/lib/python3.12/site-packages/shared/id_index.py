@@ -0,0 +1,119 @@
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+ID_INDEX_PREFIX = 'index/ids/'
+
+# Upload keys look like videos/YYYY/MM/DD/<uuid>-<original name>
+_UUID_RE = re.compile(r'([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})', re.IGNORECASE)
+
+
+def extract_video_id(value: str) -> Optional[str]:
+    """Return the upload uuid embedded in a key or legacy id, if any"""
+    match = _UUID_RE.search(value.split('/')[-1])
+    return match.group(1).lower() if match else None
+
+
+def legacy_video_id(key: str) -> str:
+    """Id listings used before uploads carried a uuid: the file name without extension"""
+    return key.split('/')[-1].split('.')[0]
+
+
+def video_id_for_key(key: str) -> Optional[str]:
+    """Id a key is listed and indexed under: its upload uuid, else the legacy id"""
+    return extract_video_id(key) or legacy_video_id(key) or None
+
+
+def _index_id(video_id: str) -> Optional[str]:
+    # uuid ids (bare or "<uuid>-<name>") normalize to the uuid; anything else is a legacy id
+    return extract_video_id(video_id) or video_id or None
+
+
+def id_index_key(video_id: str) -> str:
+    return f"{ID_INDEX_PREFIX}{video_id}.json"
+
+
+def put_video_id(s3, bucket_name: str, video_id: str, file_key: str) -> None:
+    """Record the id -> key mapping (written when the upload is initiated)"""
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=id_index_key(video_id),
+        Body=json.dumps({
+            'id': video_id,
+            'key': file_key,
+            'created': datetime.now(timezone.utc).isoformat()
+        }),
+        ContentType='application/json'
+    )
+
+
+def _scan_video_key(s3, bucket_name: str, video_id: str, prefix: str = 'videos/') -> Optional[str]:
+    """Pre-index lookup: first key whose legacy id matches, walking the listing"""
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('/') and legacy_video_id(obj['Key']) == video_id:
+                return obj['Key']
+    return None
+
+
+def get_video_key(s3, bucket_name: str, video_id: str) -> Optional[str]:
+    """Resolve a video id (uuid, "<uuid>-<name>" or legacy file-name id) with a single GET.
+
+    Legacy ids that rebuild_id_index has not backfilled yet fall back to
+    the listing scan once; the key found is then indexed.
+    """
+    normalized = _index_id(video_id)
+    if not normalized:
+        return None
+
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=id_index_key(normalized))
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ('NoSuchKey', '404'):
+            raise
+        if extract_video_id(video_id):
+            return None  # Uploads with a uuid are indexed at initiate
+        key = _scan_video_key(s3, bucket_name, normalized)
+        if key:
+            put_video_id(s3, bucket_name, normalized, key)
+        return key
+
+    return json.loads(response['Body'].read().decode('utf-8')).get('key')
+
+
+def delete_video_id(s3, bucket_name: str, video_id: str) -> None:
+    normalized = _index_id(video_id)
+    if normalized:
+        s3.delete_object(Bucket=bucket_name, Key=id_index_key(normalized))
+
+
+def rebuild_id_index(s3, bucket_name: str, prefix: str = 'videos/') -> Dict[str, Any]:
+    """Backfill id entries for keys uploaded before the index existed.
+
+    Keys without an upload uuid are indexed under their legacy id; when two
+    keys share one, the first in listing order keeps it, as the old scan did.
+    """
+    existing = set()
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=ID_INDEX_PREFIX):
+        for obj in page.get('Contents', []):
+            existing.add(obj['Key'][len(ID_INDEX_PREFIX):].rsplit('.json', 1)[0])
+
+    scanned = 0
+    written = 0
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith('/'):
+                continue
+            scanned += 1
+            video_id = video_id_for_key(obj['Key'])
+            if video_id and video_id not in existing:
+                put_video_id(s3, bucket_name, video_id, obj['Key'])
+                existing.add(video_id)
+                written += 1
+
+    return {'scanned': scanned, 'written': written}
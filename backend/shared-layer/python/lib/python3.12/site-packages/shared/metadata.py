@@ -0,0 +1,78 @@
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Optional
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from .cache import TTLCache
+
+# Per-call deadline for metadata GETs: one attempt, short timeouts
+METADATA_CLIENT_CONFIG = Config(
+    connect_timeout=1,
+    read_timeout=2,
+    retries={'max_attempts': 1},
+    max_pool_connections=16
+)
+
+# Negative cache: keys known to have no metadata object
+missing_metadata = TTLCache(ttl=60, max_entries=10000)
+
+
+def metadata_key_for(file_key: str) -> str:
+    """Key of the metadata JSON written by the upload service for a video"""
+    return f"metadata/{file_key.replace('videos/', '').replace('/', '_')}.json"
+
+
+def timings_key_for(file_key: str) -> str:
+    """Key of the raw per-part upload timings, kept apart so listings never carry them"""
+    return f"{metadata_key_for(file_key)[:-len('.json')]}.timings.json"
+
+
+def _fetch_one(s3, bucket_name: str, file_key: str) -> Optional[Dict[str, Any]]:
+    """Metadata of one video, or None when it has none (runs on a pool thread: no shared state)"""
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=metadata_key_for(file_key))
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def fetch_metadata_batch(s3, bucket_name: str, file_keys: Iterable[str],
+                         max_workers: int = 8, timeout: float = 3.0) -> Dict[str, Dict[str, Any]]:
+    """Fetch metadata for many videos with a bounded thread pool.
+
+    Keys in the negative cache are skipped, and calls still running when the
+    overall deadline expires come back as empty metadata. Workers only
+    report misses; the negative cache is written here, on the calling thread.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for file_key in file_keys:
+        if missing_metadata.get(file_key):
+            results[file_key] = {}
+        else:
+            pending.append(file_key)
+
+    if not pending:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pending)))
+    try:
+        futures = {executor.submit(_fetch_one, s3, bucket_name, key): key for key in pending}
+        done, _ = wait(futures, timeout=timeout)
+
+        for future, file_key in futures.items():
+            if future in done and future.exception() is None:
+                metadata = future.result()
+                if metadata is None:
+                    missing_metadata.set(file_key, True)
+                results[file_key] = metadata or {}
+            else:
+                results[file_key] = {}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
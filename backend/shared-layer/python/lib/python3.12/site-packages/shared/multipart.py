@@ -0,0 +1,184 @@
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+
+from .exceptions import StorageError, ValidationError
+from .presigner import get_presigner
+
+# S3 multipart limits
+MAX_PARTS = 10000
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# Part URLs signed per request; ~1000 URLs stay far below the Lambda response limit
+MAX_PART_URLS = 1000
+PART_URL_EXPIRES = 3600
+
+
+class UploadNotFoundError(StorageError):
+    """The multipart upload was completed, aborted or expired"""
+    pass
+
+
+def parse_part_numbers(start: Any = None, end: Any = None, part_numbers: Optional[Iterable[Any]] = None) -> List[int]:
+    """Part numbers of a batch request: an explicit list, or the range start..end (inclusive)"""
+    try:
+        if part_numbers:
+            numbers = sorted({int(n) for n in part_numbers})
+        else:
+            first = int(start) if start not in (None, '') else 1
+            last = int(end if end not in (None, '') else first)
+            numbers = list(range(first, last + 1))
+    except (TypeError, ValueError):
+        raise ValidationError('Part numbers must be integers')
+
+    if not numbers:
+        raise ValidationError('No part numbers requested')
+    if numbers[0] < 1 or numbers[-1] > MAX_PARTS:
+        raise ValidationError(f"Part numbers must be between 1 and {MAX_PARTS}")
+    if len(numbers) > MAX_PART_URLS:
+        raise ValidationError(f"At most {MAX_PART_URLS} part URLs per request")
+    return numbers
+
+
+def presign_part_urls(s3, bucket_name: str, key: str, upload_id: str, part_numbers: Iterable[int],
+                      expires_in: int = PART_URL_EXPIRES) -> List[Dict[str, Any]]:
+    """Presigned upload_part URLs for several parts.
+
+    Signing is local (no S3 call), so a whole batch costs one API request
+    instead of one round trip per part. The cached SigV4 presigner skips
+    botocore's per-URL request pipeline; clients that cannot hand over
+    their credentials fall back to generate_presigned_url.
+    """
+    if not key or not upload_id:
+        raise ValidationError('key and upload_id are required')
+
+    part_numbers = list(part_numbers)
+    presigner = get_presigner(s3, bucket_name)
+    if presigner is not None:
+        urls = presigner.presign_parts(key, upload_id, part_numbers, expires_in)
+        return [{'part_number': n, 'url': url} for n, url in zip(part_numbers, urls)]
+
+    return [
+        {
+            'part_number': part_number,
+            'url': s3.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': bucket_name,
+                    'Key': key,
+                    'PartNumber': part_number,
+                    'UploadId': upload_id
+                },
+                ExpiresIn=expires_in
+            )
+        }
+        for part_number in part_numbers
+    ]
+
+
+def list_uploaded_parts(s3, bucket_name: str, key: str, upload_id: str) -> List[Dict[str, Any]]:
+    """Every part S3 holds for an upload, following ListParts pagination (1000 per page)"""
+    parts: List[Dict[str, Any]] = []
+    marker = 0
+    while True:
+        try:
+            response = s3.list_parts(
+                Bucket=bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                PartNumberMarker=marker
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'NoSuchUpload':
+                raise UploadNotFoundError('Multipart upload no longer exists')
+            raise StorageError(f"Failed to list parts: {str(e)}")
+
+        for part in response.get('Parts', []):
+            parts.append({
+                'PartNumber': part['PartNumber'],
+                'ETag': part['ETag'],
+                'Size': part['Size']
+            })
+        if not response.get('IsTruncated'):
+            return parts
+        marker = response['NextPartNumberMarker']
+
+
+def expected_part_count(total_parts: Any = None, file_size: Any = None, part_size: Any = None) -> int:
+    """Part count of an upload, given directly or derived from file and part size"""
+    try:
+        if total_parts not in (None, ''):
+            count = int(total_parts)
+        elif file_size not in (None, '') and part_size not in (None, ''):
+            count = math.ceil(int(file_size) / int(part_size))
+        else:
+            raise ValidationError('total_parts (or file_size and part size) is required')
+    except (TypeError, ValueError, ZeroDivisionError):
+        raise ValidationError('Invalid part count')
+
+    if not 1 <= count <= MAX_PARTS:
+        raise ValidationError(f"Part count must be between 1 and {MAX_PARTS}")
+    return count
+
+
+def missing_part_numbers(parts: Iterable[Dict[str, Any]], total_parts: int) -> List[int]:
+    uploaded = {part['PartNumber'] for part in parts}
+    return [n for n in range(1, total_parts + 1) if n not in uploaded]
+
+
+def build_completion_parts(s3, bucket_name: str, key: str, upload_id: str,
+                           total_parts: Any = None, file_size: Any = None) -> List[Dict[str, Any]]:
+    """Part list for CompleteMultipartUpload, read from S3 instead of sent by the client.
+
+    Checks that the parts are 1..n without gaps, that every part but the
+    last meets the 5 MiB minimum and, when given, the expected part count
+    and total size.
+    """
+    if not key or not upload_id:
+        raise ValidationError('key and uploadId are required')
+
+    parts = list_uploaded_parts(s3, bucket_name, key, upload_id)
+    if not parts:
+        raise ValidationError('No parts uploaded')
+
+    count = len(parts)
+    if total_parts not in (None, ''):
+        count = expected_part_count(total_parts)
+    missing = missing_part_numbers(parts, count)
+    if missing:
+        raise ValidationError(f"Missing parts: {', '.join(str(n) for n in missing[:20])}")
+    if len(parts) != count:
+        raise ValidationError(f"Expected {count} parts, found {len(parts)}")
+
+    for part in parts[:-1]:
+        if part['Size'] < MIN_PART_SIZE:
+            raise ValidationError(f"Part {part['PartNumber']} is smaller than 5 MiB")
+
+    if file_size not in (None, ''):
+        uploaded = sum(part['Size'] for part in parts)
+        if uploaded != int(file_size):
+            raise ValidationError(f"Uploaded {uploaded} bytes, expected {int(file_size)}")
+
+    return [{'PartNumber': part['PartNumber'], 'ETag': part['ETag']} for part in parts]
+
+
+def iter_multipart_uploads(s3, bucket_name: str, prefix: str = '') -> Iterator[List[Dict[str, Any]]]:
+    """In-progress multipart uploads, one ListMultipartUploads page (up to 1000) at a time"""
+    params: Dict[str, Any] = {'Bucket': bucket_name, 'Prefix': prefix}
+    while True:
+        try:
+            response = s3.list_multipart_uploads(**params)
+        except ClientError as e:
+            raise StorageError(f"Failed to list multipart uploads: {str(e)}")
+
+        uploads = [
+            {'Key': upload['Key'], 'UploadId': upload['UploadId'], 'Initiated': upload['Initiated']}
+            for upload in response.get('Uploads', [])
+        ]
+        if uploads:
+            yield uploads
+        if not response.get('IsTruncated'):
+            return
+        params['KeyMarker'] = response['NextKeyMarker']
+        params['UploadIdMarker'] = response['NextUploadIdMarker']
@@ -0,0 +1,91 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Set
+
+from .catalog_index import CatalogIndex, catalog_etag
+
+# Upload keys are <folder>/<epoch>-<name> (legacy API) or <uuid>-<name> (upload service)
+_UPLOAD_PREFIX_RE = re.compile(
+    r'^(?:\d{9,13}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})-',
+    re.IGNORECASE
+)
+
+
+def normalize_name(name: str) -> str:
+    """Original file name of a key or upload: prefix stripped, NFC, case-folded"""
+    name = name.rsplit('/', 1)[-1]
+    name = _UPLOAD_PREFIX_RE.sub('', name, count=1)
+    return unicodedata.normalize('NFC', name).casefold()
+
+
+class NameIndex:
+    """Hash index of normalized file name -> folders that hold it.
+
+    Checking a batch of names is one dict lookup per name, independent of
+    how many keys the bucket has. A name counts as existing in a folder
+    when it is stored in that folder or below it, as before.
+    """
+
+    def __init__(self, prefix: str = 'videos/'):
+        self.prefix = prefix
+        self.names: Dict[str, Set[str]] = {}
+
+    def add(self, key: str) -> None:
+        if not key.startswith(self.prefix) or key.endswith('/'):
+            return
+        relative = key[len(self.prefix):]
+        folder = relative.rsplit('/', 1)[0] if '/' in relative else ''
+        self.names.setdefault(normalize_name(key), set()).add(folder)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], prefix: str = 'videos/') -> 'NameIndex':
+        index = cls(prefix)
+        for key in keys:
+            index.add(key)
+        return index
+
+    def contains(self, name: str, folder: str = '') -> bool:
+        folders = self.names.get(normalize_name(name))
+        if not folders:
+            return False
+
+        folder = folder.replace('\\', '/').strip('/')
+        if not folder:
+            return True
+        return any(f == folder or f.startswith(folder + '/') for f in folders)
+
+    def find_existing(self, names: Iterable[str], folder: str = '') -> List[str]:
+        """Names (as given) that already exist in folder"""
+        return [name for name in names if self.contains(name, folder)]
+
+
+# Per-bucket index reused while the catalog ETag is unchanged
+_indexes: Dict[str, Dict[str, Any]] = {}
+
+
+def get_name_index(s3, bucket_name: str, folder: str = '', prefix: str = 'videos/') -> NameIndex:
+    """Name index for a duplicate check.
+
+    With a catalog index the whole bucket is indexed once per catalog
+    version; without one, only the folder's prefix is scanned (every page).
+    """
+    etag = catalog_etag(s3, bucket_name)
+    if etag:
+        cached = _indexes.get(bucket_name)
+        if cached and cached['etag'] == etag:
+            return cached['index']
+
+        catalog = CatalogIndex(s3, bucket_name)
+        if catalog.load():
+            index = NameIndex.from_keys(catalog.entries, prefix)
+            _indexes[bucket_name] = {'etag': catalog.etag, 'index': index}
+            return index
+
+    folder = folder.replace('\\', '/').strip('/')
+    scan_prefix = f"{prefix}{folder}/" if folder else prefix
+    paginator = s3.get_paginator('list_objects_v2')
+    return NameIndex.from_keys(
+        (obj['Key'] for page in paginator.paginate(Bucket=bucket_name, Prefix=scan_prefix)
+         for obj in page.get('Contents', [])),
+        prefix
+    )
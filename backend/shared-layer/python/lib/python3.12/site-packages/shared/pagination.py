@@ -0,0 +1,82 @@
+import base64
+import json
+from typing import Any, Dict, Optional
+
+from .exceptions import ValidationError
+
+# ListObjectsV2 never returns more than 1000 keys per call
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 1000
+
+
+def encode_cursor(continuation_token: Optional[str] = None, start_after: Optional[str] = None) -> Optional[str]:
+    """Build an opaque cursor from a ContinuationToken and/or StartAfter key"""
+    payload = {}
+    if continuation_token:
+        payload['t'] = continuation_token
+    if start_after:
+        payload['a'] = start_after
+    if not payload:
+        return None
+
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, str]:
+    """Decode a cursor produced by encode_cursor"""
+    if not cursor:
+        return {}
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValidationError('Invalid cursor')
+
+    if not isinstance(payload, dict):
+        raise ValidationError('Invalid cursor')
+
+    return {k: v for k, v in payload.items() if k in ('t', 'a') and isinstance(v, str)}
+
+
+def parse_page_size(value: Any, default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Parse a client supplied page size, clamped to the S3 page limit"""
+    try:
+        page_size = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        raise ValidationError('Invalid page size')
+
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def list_objects_page(s3, bucket: str, prefix: str, page_size: int = DEFAULT_PAGE_SIZE,
+                      cursor: Optional[str] = None, delimiter: Optional[str] = None) -> Dict[str, Any]:
+    """Fetch exactly one ListObjectsV2 page and return it with the cursor for the next one"""
+    params = {
+        'Bucket': bucket,
+        'Prefix': prefix,
+        'MaxKeys': parse_page_size(page_size)
+    }
+    if delimiter:
+        params['Delimiter'] = delimiter
+
+    position = decode_cursor(cursor)
+    if 't' in position:
+        params['ContinuationToken'] = position['t']
+    elif 'a' in position:
+        params['StartAfter'] = position['a']
+
+    response = s3.list_objects_v2(**params)
+    contents = response.get('Contents', [])
+
+    next_cursor = None
+    if response.get('IsTruncated'):
+        last_key = contents[-1]['Key'] if contents else position.get('a')
+        next_cursor = encode_cursor(response.get('NextContinuationToken'), last_key)
+
+    return {
+        'contents': contents,
+        'common_prefixes': [p['Prefix'] for p in response.get('CommonPrefixes', [])],
+        'next_cursor': next_cursor
+    }
@@ -0,0 +1,181 @@
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+import boto3
+from botocore.config import Config
+
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+SIGV4_TIMESTAMP = '%Y%m%dT%H%M%SZ'
+
+
+@lru_cache(maxsize=32)
+def signing_key(secret_key: str, datestamp: str, region: str, service: str) -> bytes:
+    """SigV4 signing key: four HMACs, derived once per secret, day, region and service"""
+    key = hmac.new(f"AWS4{secret_key}".encode('utf-8'), datestamp.encode('utf-8'), hashlib.sha256).digest()
+    for part in (region, service, 'aws4_request'):
+        key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+    return key
+
+
+def _encode(value: str, safe: str = '-_.~') -> str:
+    return quote(str(value).encode('utf-8'), safe=safe)
+
+
+class S3Presigner:
+    """Query-string SigV4 presigner for one bucket.
+
+    Produces the same URLs as botocore's generate_presigned_url with
+    signature_version='s3v4', without its per-call request pipeline. The
+    endpoint and signing region come from a cached botocore probe, so the
+    client's region and config carry over; credentials are read from the
+    client on every batch, so rotated credentials are picked up.
+    """
+
+    def __init__(self, s3, bucket_name: str):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.scheme, self.host, self.path_prefix, self.region, self.service = _endpoint(s3, bucket_name)
+
+    def _credentials(self):
+        # Same credential provider the client signs with (refreshed when temporary)
+        return self.s3._get_credentials().get_frozen_credentials()
+
+    def presign(self, method: str, key: str, params: Optional[List[Tuple[str, str]]] = None,
+                headers: Optional[Dict[str, str]] = None, expires_in: int = 3600,
+                now: Optional[datetime] = None, credentials=None) -> str:
+        """Sign one request; params are the operation's query parameters in botocore order"""
+        credentials = credentials or self._credentials()
+        now = now or datetime.now(timezone.utc)
+        timestamp = now.strftime(SIGV4_TIMESTAMP)
+        datestamp = timestamp[:8]
+
+        signed = {'host': self.host}
+        for name, value in (headers or {}).items():
+            signed[name.lower()] = ' '.join(str(value).split())
+        signed_names = sorted(signed)
+        signed_headers = ';'.join(signed_names)
+
+        scope = f"{datestamp}/{self.region}/{self.service}/aws4_request"
+        auth_params = [
+            ('X-Amz-Algorithm', 'AWS4-HMAC-SHA256'),
+            ('X-Amz-Credential', f"{credentials.access_key}/{scope}"),
+            ('X-Amz-Date', timestamp),
+            ('X-Amz-Expires', expires_in),
+            ('X-Amz-SignedHeaders', signed_headers)
+        ]
+        if credentials.token is not None:
+            auth_params.append(('X-Amz-Security-Token', credentials.token))
+
+        pairs = [(_encode(k), _encode(v)) for k, v in list(params or []) + auth_params]
+        query = '&'.join(f"{k}={v}" for k, v in pairs)
+        path = f"{self.path_prefix}/{_encode(key, safe='/~')}"
+
+        canonical_request = '\n'.join([
+            method,
+            path,
+            '&'.join(f"{k}={v}" for k, v in sorted(pairs)),
+            ''.join(f"{name}:{signed[name]}\n" for name in signed_names),
+            signed_headers,
+            UNSIGNED_PAYLOAD
+        ])
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            timestamp,
+            scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        ])
+        signature = hmac.new(
+            signing_key(credentials.secret_key, datestamp, self.region, self.service),
+            string_to_sign.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+
+        return f"{self.scheme}://{self.host}{path}?{query}&X-Amz-Signature={signature}"
+
+    def presign_upload_part(self, key: str, upload_id: str, part_number: int, expires_in: int = 3600,
+                            now: Optional[datetime] = None, credentials=None) -> str:
+        return self.presign('PUT', key, [('partNumber', part_number), ('uploadId', upload_id)],
+                            expires_in=expires_in, now=now, credentials=credentials)
+
+    def presign_put_object(self, key: str, content_type: Optional[str] = None, cache_control: Optional[str] = None,
+                           metadata: Optional[Dict[str, str]] = None, expires_in: int = 3600,
+                           now: Optional[datetime] = None, credentials=None) -> str:
+        headers = {}
+        if cache_control:
+            headers['Cache-Control'] = cache_control
+        if content_type:
+            headers['Content-Type'] = content_type
+        for name, value in (metadata or {}).items():
+            headers[f"x-amz-meta-{name}"] = value
+        return self.presign('PUT', key, headers=headers, expires_in=expires_in, now=now, credentials=credentials)
+
+    def presign_get_object(self, key: str, expires_in: int = 3600,
+                           now: Optional[datetime] = None, credentials=None) -> str:
+        return self.presign('GET', key, expires_in=expires_in, now=now, credentials=credentials)
+
+    def presign_parts(self, key: str, upload_id: str, part_numbers: List[int],
+                      expires_in: int = 3600) -> List[str]:
+        """Batch of part URLs sharing one timestamp and one credentials lookup"""
+        credentials = self._credentials()
+        now = datetime.now(timezone.utc)
+        return [
+            self.presign_upload_part(key, upload_id, n, expires_in, now=now, credentials=credentials)
+            for n in part_numbers
+        ]
+
+
+# Endpoint calibration per region, endpoint, S3 config and bucket for the life of the warm container
+_endpoints: Dict[Tuple[Any, ...], Tuple[str, str, str, str, str]] = {}
+
+
+def _custom_endpoint(s3) -> Optional[str]:
+    """endpoint_url the client was created with, or None for the AWS default.
+
+    meta.endpoint_url is always set, and passing the default one back as
+    endpoint_url would switch the probe to path-style addressing.
+    """
+    resolver = getattr(s3, '_ruleset_resolver', None)
+    if resolver is None:
+        return s3.meta.endpoint_url
+    return resolver._builtins.get('SDK::Endpoint')
+
+
+def _endpoint(s3, bucket_name: str) -> Tuple[str, str, str, str, str]:
+    """Scheme, host, path prefix, region and service of the bucket, from one URL botocore signs.
+
+    Clients left on the default presign to SigV2, so the probe runs on a
+    SigV4 copy of the client with the same endpoint and config. The S3
+    options (addressing_style, accelerate, dualstack) decide host and path,
+    so they are part of the cache key.
+    """
+    endpoint_url = _custom_endpoint(s3)
+    s3_options = tuple(sorted((name, str(value)) for name, value in (s3.meta.config.s3 or {}).items()))
+    cache_key = (s3.meta.region_name, endpoint_url, s3_options, bucket_name)
+    if cache_key not in _endpoints:
+        credentials = s3._get_credentials().get_frozen_credentials()
+        probe_client = boto3.client(
+            's3',
+            region_name=s3.meta.region_name,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=credentials.access_key,
+            aws_secret_access_key=credentials.secret_key,
+            aws_session_token=credentials.token,
+            config=s3.meta.config.merge(Config(signature_version='s3v4'))
+        )
+        probe = urlsplit(probe_client.generate_presigned_url('get_object', Params={'Bucket': bucket_name, 'Key': '_'}))
+        scope = parse_qs(probe.query)['X-Amz-Credential'][0].split('/')
+        # path is '/_' for virtual-hosted style, '/<bucket>/_' for path style
+        _endpoints[cache_key] = (probe.scheme, probe.netloc, probe.path[:-len('/_')], scope[2], scope[3])
+    return _endpoints[cache_key]
+
+
+def get_presigner(s3, bucket_name: str) -> Optional[S3Presigner]:
+    """Presigner for the client's bucket, or None when the client cannot expose its credentials"""
+    try:
+        return S3Presigner(s3, bucket_name)
+    except (AttributeError, KeyError, IndexError):
+        return None
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .exceptions import ValidationError
+
+SHAPES = ('objects', 'columnar')
+URL_FIELDS = ('url',)
+TIMESTAMP_FIELDS = ('lastModified', 'last_modified')
+
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """Parse a ?fields=a,b,c projection, keeping the caller's order"""
+    if not value:
+        return None
+
+    fields = []
+    for field in value.split(','):
+        field = field.strip()
+        if not field or field in fields:
+            continue
+        if field not in allowed:
+            raise ValidationError(f"Unknown field '{field}'. Allowed: {', '.join(allowed)}")
+        fields.append(field)
+
+    return fields or None
+
+
+def parse_shape(value: Optional[str]) -> str:
+    shape = value or 'objects'
+    if shape not in SHAPES:
+        raise ValidationError(f"Unknown shape '{shape}'. Allowed: {', '.join(SHAPES)}")
+    return shape
+
+
+def project(records: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+    """Keep only the requested fields of each record"""
+    if not fields:
+        return list(records)
+    return [{field: record[field] for field in fields if field in record} for record in records]
+
+
+def _epoch(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+def to_columns(records: Sequence[Dict[str, Any]], fields: Sequence[str], base_url: str) -> Dict[str, Any]:
+    """Columnar page: one array per field, the URL prefix sent once.
+
+    URLs under base_url are sent as the path relative to `baseUrl` and
+    timestamps as epoch seconds; missing values are null.
+    """
+    base = base_url.rstrip('/') + '/'
+    columns: Dict[str, List[Any]] = {}
+
+    for field in fields:
+        values = [record.get(field) for record in records]
+        if field in URL_FIELDS:
+            values = [v[len(base):] if isinstance(v, str) and v.startswith(base) else v for v in values]
+        elif field in TIMESTAMP_FIELDS:
+            values = [_epoch(v) for v in values]
+        columns[field] = values
+
+    return {
+        'shape': 'columnar',
+        'baseUrl': base,
+        'count': len(records),
+        'fields': list(fields),
+        'columns': columns
+    }
@@ -0,0 +1,290 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .catalog_index import CatalogIndex
+from .exceptions import ValidationError
+from .folder_tree import needs_conversion
+from .pagination import list_objects_page, parse_page_size
+
+SORT_KEYS = ('name', 'size', 'lastModified')
+QUERY_PARAMS = ('folder', 'ext', 'minSize', 'maxSize', 'from', 'to', 'converting', 'sort', 'order')
+
+# Sort key -> position of its value in a row tuple
+_SORT_FIELD = {'name': 1, 'size': 2, 'lastModified': 3}
+
+
+def _encode_query_cursor(position: Tuple[Any, str]) -> str:
+    raw = json.dumps(list(position), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_query_cursor(cursor: Optional[str]) -> Optional[Tuple[Any, str]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValidationError('Invalid cursor')
+    if not isinstance(key, str):
+        raise ValidationError('Invalid cursor')
+    return value, key
+
+
+def _parse_int(value: Any, name: str) -> Optional[int]:
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid {name}")
+
+
+def _parse_time(value: Any, name: str) -> Optional[int]:
+    """Epoch seconds or ISO date/datetime"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return int(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValidationError(f"Invalid {name}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def has_query(params: Optional[Dict[str, Any]]) -> bool:
+    return bool(params) and any(params.get(name) not in (None, '') for name in QUERY_PARAMS)
+
+
+def _row(key: str, size: Any, mtime: Any, etag: str, prefix: str) -> Tuple[Any, ...]:
+    """Row: (key, name_lower, size, mtime, etag, ext, converting, folder)
+
+    folder is the path between the prefix and the file name ('' at the root).
+    """
+    relative = key[len(prefix):]
+    folder, _, name = relative.rpartition('/')
+    ext = name.rsplit('.', 1)[1].lower() if '.' in name else ''
+    return (key, name.lower(), int(size or 0), int(mtime or 0), etag, ext, needs_conversion(key), folder)
+
+
+def _to_s3_object(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    return {
+        'Key': row[0],
+        'Size': row[2],
+        'LastModified': datetime.fromtimestamp(row[3], timezone.utc),
+        'ETag': f'"{row[4]}"'
+    }
+
+
+def _parse_query(params: Dict[str, Any]) -> Tuple[str, bool, List[Tuple[str, Any]], Dict[str, Tuple[Optional[int], Optional[int]]]]:
+    """Sort key, direction, categorical filters and ranges of a query"""
+    sort = params.get('sort') or 'name'
+    if sort not in SORT_KEYS:
+        raise ValidationError(f"Invalid sort. Allowed: {', '.join(SORT_KEYS)}")
+    descending = (params.get('order') or 'asc') == 'desc'
+
+    wanted = []
+    folder = (params.get('folder') or '').strip('/')
+    if folder:
+        wanted.append(('folder', folder))
+    if params.get('ext'):
+        wanted.append(('ext', params['ext'].lower().lstrip('.')))
+    if params.get('converting') not in (None, ''):
+        wanted.append(('converting', str(params['converting']).lower() == 'true'))
+
+    ranges = {
+        'size': (_parse_int(params.get('minSize'), 'minSize'), _parse_int(params.get('maxSize'), 'maxSize')),
+        'lastModified': (_parse_time(params.get('from'), 'from'), _parse_time(params.get('to'), 'to'))
+    }
+    return sort, descending, wanted, ranges
+
+
+def _matches(row: Tuple[Any, ...], residual: List[Tuple[str, Any]],
+             ranges: Dict[str, Tuple[Optional[int], Optional[int]]], sort: Optional[str]) -> bool:
+    for kind, value in residual:
+        if kind == 'folder' and row[7] != value and not row[7].startswith(value + '/'):
+            return False
+        if kind == 'ext' and row[5] != value:
+            return False
+        if kind == 'converting' and row[6] != value:
+            return False
+
+    for field, (low, high) in ranges.items():
+        if field == sort:
+            continue  # Already applied by bisect
+        current = row[_SORT_FIELD[field]]
+        if (low is not None and current < low) or (high is not None and current > high):
+            return False
+    return True
+
+
+class _Partition:
+    """Row ids of one candidate set, pre-sorted once per sort key"""
+
+    def __init__(self):
+        self.orders: Dict[str, Tuple[List[int], List[Tuple[Any, str]]]] = {}
+
+
+class CatalogQuery:
+    """Filter/sort engine over the catalog, built once per warm container.
+
+    Rows are partitioned by folder (every ancestor), extension and
+    conversion state, and each partition keeps one array per sort key
+    sorted by (value, key). A query picks the smallest partition matching
+    its categorical filters, bisects to the cursor and to any range on the
+    sort key, and reads rows until the page is full. A single categorical
+    filter plus a range on the sort key costs O(log n + page); extra
+    filters are checked row by row on the smallest partition.
+    """
+
+    def __init__(self, objects: Iterable[Tuple[str, int, int, str]], prefix: str = 'videos/'):
+        self.prefix = prefix
+        self.rows: List[Tuple[Any, ...]] = [
+            _row(key, size, mtime, etag, prefix) for key, size, mtime, etag in objects
+            if key.startswith(prefix) and not key.endswith('/')
+        ]
+
+        self.partitions: Dict[Tuple[str, Any], _Partition] = {}
+        membership = []
+        for row in self.rows:
+            partitions = [self.partitions.setdefault(k, _Partition()) for k in self._partition_keys(row)]
+            membership.append(partitions)
+
+        # One global sort per key, distributed in order so every partition comes out sorted
+        for sort in SORT_KEYS:
+            field = _SORT_FIELD[sort]
+            for partition in self.partitions.values():
+                partition.orders[sort] = ([], [])
+            for row_id in sorted(range(len(self.rows)), key=lambda i: (self.rows[i][field], self.rows[i][0])):
+                value = (self.rows[row_id][field], self.rows[row_id][0])
+                for partition in membership[row_id]:
+                    ids, values = partition.orders[sort]
+                    ids.append(row_id)
+                    values.append(value)
+
+    def _partition_keys(self, row: Tuple[Any, ...]) -> Iterator[Tuple[str, Any]]:
+        yield ('all', None)
+        folders = row[7].split('/') if row[7] else []
+        for depth in range(1, len(folders) + 1):
+            yield ('folder', '/'.join(folders[:depth]))
+        yield ('ext', row[5])
+        yield ('converting', row[6])
+
+    @classmethod
+    def from_catalog(cls, index: CatalogIndex, prefix: str = 'videos/') -> 'CatalogQuery':
+        return cls(((key, entry[0], entry[1], entry[2]) for key, entry in index.entries.items()), prefix)
+
+    @classmethod
+    def from_s3_objects(cls, objects: Iterable[Dict[str, Any]], prefix: str = 'videos/') -> 'CatalogQuery':
+        return cls(((obj['Key'], obj['Size'], int(obj['LastModified'].timestamp()), obj.get('ETag', '').strip('"'))
+                    for obj in objects), prefix)
+
+    def query(self, params: Dict[str, Any], page_size: Any = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Return one page of the filtered, sorted view with a cursor for the next one"""
+        sort, descending, wanted, ranges = _parse_query(params)
+        page_size = parse_page_size(page_size)
+
+        # Categorical filters -> candidate partitions; the smallest one drives the scan
+        candidates = [self.partitions.get(k) for k in wanted] or [self.partitions.get(('all', None))]
+        if any(partition is None for partition in candidates):
+            return {'contents': [], 'next_cursor': None}
+        driver = min(candidates, key=lambda p: len(p.orders[sort][0]))
+        residual = [k for k in wanted if self.partitions[k] is not driver]
+        ids, values = driver.orders[sort]
+
+        # Bisect the window: range on the sort key, then the cursor position
+        lo, hi = 0, len(ids)
+        if sort in ranges:
+            low, high = ranges[sort]
+            if low is not None:
+                lo = bisect_left(values, (low,))
+            if high is not None:
+                hi = bisect_left(values, (high + 1,))
+        position = _decode_query_cursor(cursor)
+        if position is not None:
+            position = tuple(position)
+            if descending:
+                hi = min(hi, bisect_left(values, position))
+            else:
+                lo = max(lo, bisect_right(values, position))
+
+        contents = []
+        next_cursor = None
+        last = None
+        step = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+        for i in step:
+            row = self.rows[ids[i]]
+            if not _matches(row, residual, ranges, sort):
+                continue
+            if len(contents) == page_size:
+                next_cursor = _encode_query_cursor(values[last])
+                break
+            contents.append(_to_s3_object(row))
+            last = i
+
+        return {'contents': contents, 'next_cursor': next_cursor}
+
+
+# Engines per bucket, reused while the catalog ETag is unchanged
+_engines: Dict[str, Dict[str, Any]] = {}
+
+
+def get_catalog_query(s3, bucket_name: str, etag: Optional[str], prefix: str = 'videos/') -> Optional[CatalogQuery]:
+    """Engine for the catalog at `etag` (from catalog_etag), rebuilt only when the index changed.
+
+    None when the index has not been built: there is nothing to sort on
+    without reading the whole bucket.
+    """
+    if etag is None:
+        return None
+
+    cache_key = f"{bucket_name}|{prefix}"
+    cached = _engines.get(cache_key)
+    if cached and cached['etag'] == etag:
+        return cached['engine']
+
+    index = CatalogIndex(s3, bucket_name)
+    if not index.load():
+        return None
+    engine = CatalogQuery.from_catalog(index, prefix)
+    _engines[cache_key] = {'etag': index.etag, 'engine': engine}
+    return engine
+
+
+def query_listing_page(s3, bucket_name: str, params: Dict[str, Any], page_size: Any = None,
+                       cursor: Optional[str] = None, prefix: str = 'videos/') -> Dict[str, Any]:
+    """Fallback without a catalog index: one ListObjectsV2 page, filtered, in key order.
+
+    The folder filter narrows the S3 prefix; the other filters are applied
+    to the page's rows, so a page can come back short (or empty) with a
+    cursor for the next one. sort/order cannot be honoured without the
+    index, and the page says so with 'sorted': False.
+    """
+    _, _, wanted, ranges = _parse_query(params)
+    folder = dict(wanted).get('folder')
+    list_prefix = f"{prefix}{folder}/" if folder else prefix
+
+    page = list_objects_page(s3, bucket_name, list_prefix, page_size=page_size, cursor=cursor)
+    contents = []
+    for obj in page['contents']:
+        if obj['Key'].endswith('/'):
+            continue
+        row = _row(obj['Key'], obj['Size'], int(obj['LastModified'].timestamp()), obj.get('ETag', '').strip('"'), prefix)
+        if _matches(row, wanted, ranges, None):
+            contents.append(obj)
+    return {'contents': contents, 'next_cursor': page['next_cursor'], 'sorted': False}
+
+
+def query_catalog(s3, bucket_name: str, etag: Optional[str], params: Dict[str, Any], page_size: Any = None,
+                  cursor: Optional[str] = None, prefix: str = 'videos/') -> Dict[str, Any]:
+    """One page of a filtered/sorted listing: O(log n + page) on the catalog engine, one S3 page without it"""
+    engine = get_catalog_query(s3, bucket_name, etag, prefix)
+    if engine is None:
+        return query_listing_page(s3, bucket_name, params, page_size, cursor, prefix)
+    return engine.query(params, page_size, cursor)
@@ -2,6 +2,8 @@ import boto3
 from botocore.exceptions import ClientError
 from typing import Dict, Any, Optional, List
 
+from .presigner import get_presigner
+
 class S3Client:
     def __init__(self, bucket_name: str):
         self.s3 = boto3.client('s3')
@@ -93,6 +95,11 @@ class S3Client:
     
     def generate_presigned_url(self, key: str, expiration: int = 3600, method: str = 'get_object') -> str:
         """Generate presigned URL for S3 object"""
+        presigner = get_presigner(self.s3, self.bucket_name)
+        if presigner is not None and method in ('get_object', 'put_object'):
+            if method == 'get_object':
+                return presigner.presign_get_object(key, expiration)
+            return presigner.presign_put_object(key, expires_in=expiration)
         try:
             response = self.s3.generate_presigned_url(
                 method,
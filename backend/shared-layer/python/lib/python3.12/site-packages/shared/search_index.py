@@ -0,0 +1,236 @@
+import heapq
+import json
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from botocore.exceptions import ClientError
+
+from .exceptions import StorageError
+
+SEARCH_INDEX_KEY = 'index/search.json'
+SEARCH_PREFIX = 'videos/'
+MAX_RESULTS = 100
+MAX_SUGGESTIONS = 10
+
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def fold(text: str) -> str:
+    """Accent-fold and lowercase (same NFD rule as sanitize_filename: ção -> cao)"""
+    text = unicodedata.normalize('NFD', text)
+    return ''.join(c for c in text if unicodedata.category(c) != 'Mn').lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+def name_tokens(key: str) -> List[str]:
+    """Searchable tokens of a video key: file name without extension or upload uuid"""
+    name = key.rsplit('/', 1)[-1]
+    if '.' in name:
+        name = name.rsplit('.', 1)[0]
+    return list(dict.fromkeys(tokenize(_UUID_RE.sub(' ', name))))
+
+
+class SearchIndex:
+    """Inverted index of video name tokens with prefix completion.
+
+    Each doc is [key, size, mtime]; postings map a token to the ascending
+    doc ids that contain it. The vocabulary is kept sorted so a prefix
+    is a contiguous range found with one bisect: it plays the role of the
+    prefix trie without a node per character.
+    """
+
+    def __init__(self):
+        self.docs: List[Optional[List[Any]]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.ids: Dict[str, int] = {}
+        self.etag: Optional[str] = None
+        self._vocab: Optional[List[str]] = None
+
+    def add(self, key: str, size: int = 0, last_modified: int = 0) -> None:
+        if not key.startswith(SEARCH_PREFIX) or key.endswith('/'):
+            return
+        if key in self.ids:
+            self.remove(key)
+
+        doc_id = len(self.docs)
+        self.docs.append([key, int(size or 0), int(last_modified or 0)])
+        self.ids[key] = doc_id
+        for token in name_tokens(key):
+            if token not in self.postings:
+                self.postings[token] = []
+                self._vocab = None
+            self.postings[token].append(doc_id)
+
+    def remove(self, key: str) -> None:
+        doc_id = self.ids.pop(key, None)
+        if doc_id is None:
+            return
+
+        self.docs[doc_id] = None
+        for token in name_tokens(key):
+            ids = self.postings.get(token)
+            if not ids:
+                continue
+            position = bisect_left(ids, doc_id)
+            if position < len(ids) and ids[position] == doc_id:
+                del ids[position]
+            if not ids:
+                del self.postings[token]
+                self._vocab = None
+
+    def apply_changes(self, changes: Iterable[Dict[str, Any]]) -> None:
+        """Apply the add/remove changes recorded by CatalogIndex"""
+        for change in changes:
+            if change['type'] == 'add':
+                self.add(change['key'], change['size'], change['lastModified'])
+            else:
+                self.remove(change['key'])
+
+    @classmethod
+    def from_catalog(cls, index) -> 'SearchIndex':
+        search = cls()
+        for key in sorted(index.entries):
+            entry = index.entries[key]
+            search.add(key, entry[0], entry[1])
+        return search
+
+    def _vocabulary(self) -> List[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        return self._vocab
+
+    def complete(self, prefix: str) -> List[str]:
+        """Vocabulary tokens starting with prefix, in order"""
+        vocab = self._vocabulary()
+        start = bisect_left(vocab, prefix)
+        end = bisect_left(vocab, prefix + '\uffff')
+        return vocab[start:end]
+
+    def search(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        """AND of all query tokens; the last one also matches as a prefix.
+
+        Exact matches on the last token rank first, then shorter names.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {'results': [], 'total': 0, 'suggestions': []}
+
+        *exact_tokens, last = tokens
+        completions = self.complete(last)
+
+        candidates: Optional[Set[int]] = None
+        for token in sorted(exact_tokens, key=lambda t: len(self.postings.get(t, ()))):
+            ids = self.postings.get(token)
+            if not ids:
+                return {'results': [], 'total': 0, 'suggestions': []}
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+            if not candidates:
+                return {'results': [], 'total': 0, 'suggestions': []}
+
+        exact_ids = set(self.postings.get(last, ()))
+        matched: Set[int] = set()
+        for token in completions:
+            ids = self.postings[token]
+            matched.update(ids if candidates is None else candidates.intersection(ids))
+
+        limit = max(1, min(int(limit), MAX_RESULTS))
+        best = heapq.nsmallest(
+            limit,
+            matched,
+            key=lambda i: (i not in exact_ids, len(self.docs[i][0]), self.docs[i][0])
+        )
+
+        suggestions = heapq.nlargest(MAX_SUGGESTIONS, completions, key=lambda t: len(self.postings[t]))
+        return {
+            'results': [self.docs[i] for i in best],
+            'total': len(matched),
+            'suggestions': [' '.join(exact_tokens + [t]) for t in suggestions]
+        }
+
+    def _compact(self) -> None:
+        """Drop removed docs and renumber before saving"""
+        if len(self.ids) == len(self.docs):
+            return
+        remap = {}
+        docs = []
+        for old_id, doc in enumerate(self.docs):
+            if doc is not None:
+                remap[old_id] = len(docs)
+                docs.append(doc)
+        self.docs = docs
+        self.ids = {doc[0]: i for i, doc in enumerate(docs)}
+        self.postings = {token: [remap[i] for i in ids] for token, ids in self.postings.items()}
+
+    def load(self, s3, bucket_name: str) -> bool:
+        try:
+            response = s3.get_object(Bucket=bucket_name, Key=SEARCH_INDEX_KEY)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return False
+            raise StorageError(f"Failed to load search index: {str(e)}")
+
+        data = json.loads(response['Body'].read().decode('utf-8'))
+        self.docs = data['docs']
+        self.postings = data['postings']
+        self.ids = {doc[0]: i for i, doc in enumerate(self.docs) if doc is not None}
+        self.etag = response.get('ETag')
+        self._vocab = None
+        return True
+
+    def save(self, s3, bucket_name: str) -> None:
+        self._compact()
+        body = json.dumps({
+            'version': 1,
+            'updatedAt': datetime.now(timezone.utc).isoformat(),
+            'docs': self.docs,
+            'postings': self.postings
+        }, separators=(',', ':'))
+
+        response = s3.put_object(
+            Bucket=bucket_name,
+            Key=SEARCH_INDEX_KEY,
+            Body=body.encode('utf-8'),
+            ContentType='application/json'
+        )
+        self.etag = response.get('ETag')
+
+
+def load_search_index(s3, bucket_name: str) -> Optional[SearchIndex]:
+    """Return the stored index, or None when it has not been built yet"""
+    search = SearchIndex()
+    return search if search.load(s3, bucket_name) else None
+
+
+# Loaded lazily on the first search and reused while the stored ETag is unchanged
+_loaded: Dict[str, Dict[str, Any]] = {}
+RECHECK_SECONDS = 5
+
+
+def get_search_index(s3, bucket_name: str) -> Optional[SearchIndex]:
+    cached = _loaded.get(bucket_name)
+    if cached and time.time() - cached['checked'] < RECHECK_SECONDS:
+        return cached['index']
+
+    try:
+        etag = s3.head_object(Bucket=bucket_name, Key=SEARCH_INDEX_KEY).get('ETag')
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+            return None
+        raise StorageError(f"Failed to check search index: {str(e)}")
+
+    if cached and cached['index'].etag == etag:
+        cached['checked'] = time.time()
+        return cached['index']
+
+    search = load_search_index(s3, bucket_name)
+    if search:
+        _loaded[bucket_name] = {'index': search, 'checked': time.time()}
+    return search
@@ -0,0 +1,54 @@
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, list_objects_page
+
+# Buffered Lambda responses are capped at 6 MB; keep room for headers
+NDJSON_BODY_LIMIT = 5 * 1024 * 1024
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def iter_objects(s3, bucket_name: str, prefix: str, cursor: Optional[str] = None,
+                 index=None) -> Iterator[Dict[str, Any]]:
+    """Yield objects one at a time, fetching the next S3 page only when needed"""
+    if index is not None:
+        for obj in index.iter_objects(prefix, decode_cursor(cursor).get('a')):
+            yield obj
+        return
+
+    while True:
+        page = list_objects_page(s3, bucket_name, prefix, page_size=MAX_PAGE_SIZE, cursor=cursor)
+        for obj in page['contents']:
+            if not obj['Key'].endswith('/'):
+                yield obj
+        cursor = page['next_cursor']
+        if not cursor:
+            return
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """One compact JSON document per line"""
+    for record in records:
+        yield json.dumps(record, separators=(',', ':'), default=str) + '\n'
+
+
+def build_ndjson_body(objects: Iterable[Dict[str, Any]], to_record: Callable[[Dict[str, Any]], Dict[str, Any]],
+                      max_bytes: int = NDJSON_BODY_LIMIT) -> Tuple[str, Optional[str], int]:
+    """Serialize objects as NDJSON until the payload limit.
+
+    Returns (body, next_cursor, count); next_cursor resumes after the last
+    object written when the limit cut the listing short.
+    """
+    lines = []
+    size = 0
+    last_key = None
+    for obj in objects:
+        line = json.dumps(to_record(obj), separators=(',', ':'), default=str) + '\n'
+        line_size = len(line.encode('utf-8'))
+        if size + line_size > max_bytes and lines:
+            return ''.join(lines), encode_cursor(start_after=last_key), len(lines)
+        lines.append(line)
+        size += line_size
+        last_key = obj['Key']
+
+    return ''.join(lines), None, len(lines)
@@ -0,0 +1,90 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .exceptions import ValidationError
+from .utils import sanitize_filename
+
+MAX_MANIFEST_FILES = 10000
+
+# Files initiated per round; the response size is checked between rounds
+BATCH_CHUNK = 50
+BATCH_CONCURRENCY = 8
+
+# Lambda responses are capped at 6 MB; stop well before that
+RESPONSE_BUDGET = 4 * 1024 * 1024
+
+
+def sanitize_relative_path(path: str) -> str:
+    """Folder of a file inside the uploaded folder, without traversal or unsafe characters"""
+    segments = (path or '').replace('\\', '/').split('/')
+    return '/'.join(sanitize_filename(s) for s in segments if s and s not in ('.', '..'))
+
+
+def parse_manifest(files: Any) -> List[Dict[str, Any]]:
+    """Validate a folder manifest: [{name, size, type, path}, ...]
+
+    Names and paths are sanitized here, once per file, so every page of
+    the batch sees the same keys.
+    """
+    if not isinstance(files, list) or not files:
+        raise ValidationError('files must be a non-empty list')
+    if len(files) > MAX_MANIFEST_FILES:
+        raise ValidationError(f"At most {MAX_MANIFEST_FILES} files per manifest")
+
+    manifest = []
+    for index, entry in enumerate(files):
+        try:
+            name = sanitize_filename(str(entry['name']).replace('\\', '/').rsplit('/', 1)[-1])
+            size = int(entry.get('size') or 0)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValidationError(f"Invalid manifest entry {index}")
+        if not name or size < 0:
+            raise ValidationError(f"Invalid manifest entry {index}")
+
+        manifest.append({
+            'index': index,
+            'name': name,
+            'size': size,
+            'type': entry.get('type') or '',
+            'path': sanitize_relative_path(entry.get('path', ''))
+        })
+    return manifest
+
+
+def initiate_batch(manifest: List[Dict[str, Any]], offset: int,
+                   initiate: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    """Initiate uploads from `offset` until the response budget is used up.
+
+    `initiate` turns one manifest entry into its upload descriptor (URL or
+    upload id). Entries run BATCH_CONCURRENCY at a time; a failing entry
+    is reported in place instead of failing the page. `next_offset` is
+    None once the manifest is done.
+    """
+    if offset < 0 or offset > len(manifest):
+        raise ValidationError('Invalid offset')
+
+    def run(entry):
+        try:
+            return {'index': entry['index'], 'success': True, **initiate(entry)}
+        except Exception as e:
+            return {'index': entry['index'], 'success': False, 'name': entry['name'], 'message': str(e)}
+
+    uploads: List[Dict[str, Any]] = []
+    used = 0
+    last_chunk = 0
+    position = offset
+    with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+        while position < len(manifest):
+            # Only start a round whose results should still fit
+            if uploads and used + last_chunk > RESPONSE_BUDGET:
+                break
+            chunk = manifest[position:position + BATCH_CHUNK]
+            results = list(executor.map(run, chunk))
+            last_chunk = len(json.dumps(results, default=str))
+            used += last_chunk
+            uploads.extend(results)
+            position += len(chunk)
+
+    next_offset: Optional[int] = position if position < len(manifest) else None
+    return {'uploads': uploads, 'next_offset': next_offset, 'total': len(manifest)}
@@ -0,0 +1,212 @@
+import json
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from .exceptions import StorageError, ValidationError
+from .multipart import MAX_PARTS
+
+TELEMETRY_KEY = 'index/upload-telemetry.json'
+
+MIB = 1024 * 1024
+GIB = 1024 * MIB
+
+# File size buckets: (upper bound exclusive, label); part size and
+# concurrency choices differ most across these ranges
+SIZE_BUCKETS = (
+    (16 * MIB, 'lt-16MiB'),
+    (128 * MIB, '16MiB-128MiB'),
+    (GIB, '128MiB-1GiB'),
+    (10 * GIB, '1GiB-10GiB'),
+    (None, 'gte-10GiB')
+)
+
+# Most recent uploads kept per bucket; percentiles follow current conditions
+MAX_SAMPLES = 500
+PERCENTILES = (50, 90, 99)
+
+
+def size_bucket(file_size: int) -> str:
+    for limit, label in SIZE_BUCKETS:
+        if limit is None or file_size < limit:
+            return label
+    return SIZE_BUCKETS[-1][1]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def parse_part_timings(value: Any) -> Optional[List[Dict[str, Any]]]:
+    """Validate client reported part timings.
+
+    [{'part_number', 'bytes', 'duration_ms', 'start_ms'}, ...] where
+    start_ms is optional and relative to the start of the upload. A part
+    may appear more than once when the client retried it.
+    """
+    if not value:
+        return None
+    try:
+        if isinstance(value, str):
+            value = json.loads(value)
+        if not isinstance(value, list):
+            raise TypeError
+        timings = []
+        for entry in value:
+            timing = {
+                'part_number': int(entry['part_number']),
+                'bytes': int(entry['bytes']),
+                'duration_ms': float(entry['duration_ms'])
+            }
+            if entry.get('start_ms') is not None:
+                timing['start_ms'] = float(entry['start_ms'])
+            timings.append(timing)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValidationError('Invalid part timings')
+
+    if len(timings) > 2 * MAX_PARTS:
+        raise ValidationError('Too many part timings')
+    for timing in timings:
+        if not 1 <= timing['part_number'] <= MAX_PARTS or timing['bytes'] <= 0 \
+                or timing['duration_ms'] <= 0 or timing.get('start_ms', 0) < 0:
+            raise ValidationError('Invalid part timings')
+    return timings
+
+
+def _peak_concurrency(timings: List[Dict[str, Any]]) -> int:
+    events = []
+    for timing in timings:
+        events.append((timing['start_ms'], 1))
+        events.append((timing['start_ms'] + timing['duration_ms'], -1))
+    # Ends sort before starts at the same instant: back-to-back parts do not overlap
+    peak = active = 0
+    for _, delta in sorted(events):
+        active += delta
+        peak = max(peak, active)
+    return peak
+
+
+def summarize_timings(timings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-upload summary: file size, part size, part and wall-clock throughput.
+
+    Wall-clock throughput and concurrency need start_ms on every timing;
+    without it only the per-part figures are reported.
+    """
+    # The last attempt of each part is the one S3 kept
+    final = {}
+    for timing in timings:
+        final[timing['part_number']] = timing
+    file_size = sum(timing['bytes'] for timing in final.values())
+
+    part_throughput = [t['bytes'] / (t['duration_ms'] / 1000) for t in timings]
+    summary = {
+        'file_size': file_size,
+        'size_bucket': size_bucket(file_size),
+        'parts': len(final),
+        'retries': len(timings) - len(final),
+        'part_size': max(timing['bytes'] for timing in final.values()),
+        'part_throughput_p50': percentile(part_throughput, 50),
+        'part_throughput_p90': percentile(part_throughput, 90),
+        'throughput': None,
+        'seconds': None,
+        'concurrency': None
+    }
+
+    if all('start_ms' in timing for timing in timings):
+        start = min(timing['start_ms'] for timing in timings)
+        end = max(timing['start_ms'] + timing['duration_ms'] for timing in timings)
+        seconds = (end - start) / 1000
+        summary.update({
+            'seconds': seconds,
+            'throughput': file_size / seconds,
+            'concurrency': _peak_concurrency(timings)
+        })
+    return summary
+
+
+def stats_from_summary(summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    """Upload stats for upload_tuning.record_upload_stats, when the timings carry wall-clock time"""
+    if not summary or not summary.get('seconds'):
+        return None
+    return {'bytes': float(summary['file_size']), 'seconds': summary['seconds'], 'concurrency': summary['concurrency']}
+
+
+def _read_telemetry(s3, bucket_name: str) -> Dict[str, Any]:
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=TELEMETRY_KEY)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return {'version': 1, 'buckets': {}}
+        raise StorageError(f"Failed to load upload telemetry: {str(e)}")
+    return json.loads(response['Body'].read().decode('utf-8'))
+
+
+def record_upload_telemetry(s3, bucket_name: str, summary: Dict[str, Any]) -> None:
+    """Append one upload summary to its size bucket, keeping the newest MAX_SAMPLES.
+
+    Last writer wins, as with the tuning document: two uploads completing
+    together can drop one sample.
+    """
+    telemetry = _read_telemetry(s3, bucket_name)
+    buckets = dict(telemetry.get('buckets', {}))
+    now = datetime.now(timezone.utc).isoformat()
+
+    samples = list(buckets.get(summary['size_bucket'], []))
+    samples.append({
+        'at': now,
+        'file_size': summary['file_size'],
+        'part_size': summary['part_size'],
+        'parts': summary['parts'],
+        'retries': summary['retries'],
+        'part_throughput': summary['part_throughput_p50'],
+        'throughput': summary['throughput'],
+        'concurrency': summary['concurrency']
+    })
+    buckets[summary['size_bucket']] = samples[-MAX_SAMPLES:]
+
+    telemetry.update({'version': 1, 'updatedAt': now, 'buckets': buckets})
+    try:
+        s3.put_object(
+            Bucket=bucket_name,
+            Key=TELEMETRY_KEY,
+            Body=json.dumps(telemetry, separators=(',', ':')),
+            ContentType='application/json'
+        )
+    except ClientError as e:
+        raise StorageError(f"Failed to save upload telemetry: {str(e)}")
+
+
+def _percentiles(values: List[Optional[float]]) -> Dict[str, Optional[float]]:
+    present = [value for value in values if value is not None]
+    return {f"p{pct}": percentile(present, pct) for pct in PERCENTILES}
+
+
+def telemetry_report(s3, bucket_name: str) -> Dict[str, Any]:
+    """Throughput percentiles per file size bucket (bytes per second)"""
+    telemetry = _read_telemetry(s3, bucket_name)
+    stored = telemetry.get('buckets', {})
+
+    report = []
+    lower = 0
+    for limit, label in SIZE_BUCKETS:
+        samples = stored.get(label, [])
+        report.append({
+            'bucket': label,
+            'min_size': lower,
+            'max_size': limit,
+            'uploads': len(samples),
+            'part_throughput': _percentiles([s['part_throughput'] for s in samples]),
+            'upload_throughput': _percentiles([s['throughput'] for s in samples]),
+            'part_size': _percentiles([s['part_size'] for s in samples]),
+            'concurrency': _percentiles([s['concurrency'] for s in samples]),
+            'retry_rate': (sum(s['retries'] for s in samples) / sum(s['parts'] for s in samples)) if samples else None
+        })
+        lower = limit
+
+    return {'updatedAt': telemetry.get('updatedAt'), 'max_samples': MAX_SAMPLES, 'buckets': report}
@@ -0,0 +1,178 @@
+import json
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from .cache import TTLCache
+from .exceptions import StorageError, ValidationError
+from .multipart import MAX_PARTS, MIN_PART_SIZE
+
+TUNING_KEY = 'index/upload-tuning.json'
+
+MIB = 1024 * 1024
+
+# S3 limits
+MAX_PART_SIZE = 5 * 1024 * MIB
+MAX_SINGLE_PUT = 5 * 1024 * MIB
+MAX_OBJECT_SIZE = 5 * 1024 * 1024 * MIB
+
+# Below this a single PUT is cheaper than initiate + part URLs + complete
+MULTIPART_THRESHOLD = 16 * MIB
+# Part size used until a client has reported any throughput
+DEFAULT_PART_SIZE = 16 * MIB
+# A part should take about this long on one connection: long enough to
+# amortize the per-request overhead, short enough that a retry loses little
+TARGET_PART_SECONDS = 10
+
+CONCURRENCY_LEVELS = (1, 2, 4, 6, 8, 12, 16)
+DEFAULT_CONCURRENCY = 4
+EWMA_ALPHA = 0.3
+MAX_PROFILES = 1000
+
+# Tuning document reused by warm containers; a minute of staleness is fine
+_tuning_cache = TTLCache(ttl=60, max_entries=8)
+
+
+def _ewma(previous: Optional[float], sample: float) -> float:
+    return sample if previous is None else EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * previous
+
+
+def _read_tuning(s3, bucket_name: str) -> Dict[str, Any]:
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=TUNING_KEY)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return {'version': 1, 'profiles': {}}
+        raise StorageError(f"Failed to load upload tuning: {str(e)}")
+    return json.loads(response['Body'].read().decode('utf-8'))
+
+
+def load_tuning(s3, bucket_name: str) -> Dict[str, Any]:
+    cached = _tuning_cache.get(bucket_name)
+    if cached is not None:
+        return cached
+
+    tuning = _read_tuning(s3, bucket_name)
+    _tuning_cache.set(bucket_name, tuning)
+    return tuning
+
+
+def get_profile(tuning: Dict[str, Any], profile: Optional[str] = None) -> Dict[str, Any]:
+    """Stats of one client profile, falling back to the shared default"""
+    profiles = tuning.get('profiles', {})
+    stats = profiles.get(profile or 'default')
+    if not stats or not stats.get('levels'):
+        stats = profiles.get('default', {})
+    return stats
+
+
+def recommend_concurrency(stats: Dict[str, Any]) -> int:
+    """Concurrency with the best observed aggregate throughput.
+
+    While the best level is also the highest one tried, the next level up
+    is recommended so the client finds out whether more connections help;
+    once it does not, the recommendation settles on the best level.
+    """
+    levels = {int(level): entry['throughput'] for level, entry in stats.get('levels', {}).items()}
+    if not levels:
+        return DEFAULT_CONCURRENCY
+
+    best = max(levels, key=levels.get)
+    if best == max(levels):
+        higher = [level for level in CONCURRENCY_LEVELS if level > best]
+        if higher:
+            return higher[0]
+    return best
+
+
+def plan_upload(file_size: int, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Upload strategy for a file: single PUT or multipart, part size and concurrency"""
+    file_size = int(file_size or 0)
+    if file_size < 0:
+        raise ValidationError('Invalid file size')
+    if file_size > MAX_OBJECT_SIZE:
+        raise ValidationError('File exceeds the maximum S3 object size')
+
+    stats = stats or {}
+    concurrency = recommend_concurrency(stats)
+
+    part_throughput = stats.get('partThroughput')
+    part_size = part_throughput * TARGET_PART_SECONDS if part_throughput else DEFAULT_PART_SIZE
+    # Mid-size files: smaller parts so every connection gets work
+    part_size = min(part_size, math.ceil(file_size / concurrency))
+    # Large files: the 10,000 part limit sets the floor
+    part_size = max(part_size, MIN_PART_SIZE, math.ceil(file_size / MAX_PARTS))
+    part_size = min(math.ceil(part_size / MIB) * MIB, MAX_PART_SIZE)
+
+    total_parts = max(1, math.ceil(file_size / part_size))
+    multipart = file_size > MAX_SINGLE_PUT or (file_size > MULTIPART_THRESHOLD and total_parts > 1)
+
+    return {
+        'multipart': multipart,
+        'part_size': part_size if multipart else file_size,
+        'total_parts': total_parts if multipart else 1,
+        'concurrency': min(concurrency, total_parts) if multipart else 1
+    }
+
+
+def parse_upload_stats(value: Any) -> Optional[Dict[str, float]]:
+    """Validate client reported stats: {'bytes', 'seconds', 'concurrency'}"""
+    if not value:
+        return None
+    try:
+        if isinstance(value, str):
+            value = json.loads(value)
+        stats = {
+            'bytes': float(value['bytes']),
+            'seconds': float(value['seconds']),
+            'concurrency': int(value.get('concurrency') or 1)
+        }
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError('Invalid upload stats')
+    if stats['bytes'] <= 0 or stats['seconds'] <= 0 or stats['concurrency'] < 1:
+        raise ValidationError('Invalid upload stats')
+    return stats
+
+
+def record_upload_stats(s3, bucket_name: str, stats: Dict[str, float], profile: Optional[str] = None) -> None:
+    """Fold one completed upload into the throughput averages.
+
+    Last writer wins: two uploads completing together can drop one
+    sample, which only slows adaptation down a little.
+    """
+    tuning = _read_tuning(s3, bucket_name)
+    profiles = dict(tuning.get('profiles', {}))
+    now = datetime.now(timezone.utc).isoformat()
+
+    throughput = stats['bytes'] / stats['seconds']
+    level = str(min(stats['concurrency'], CONCURRENCY_LEVELS[-1]))
+    for name in {'default', profile or 'default'}:
+        entry = dict(profiles.get(name, {}))
+        levels = dict(entry.get('levels', {}))
+        current = levels.get(level, {})
+        levels[level] = {
+            'throughput': _ewma(current.get('throughput'), throughput),
+            'samples': current.get('samples', 0) + 1
+        }
+        entry['levels'] = levels
+        entry['partThroughput'] = _ewma(entry.get('partThroughput'), throughput / stats['concurrency'])
+        entry['updated'] = now
+        profiles[name] = entry
+
+    # 'default' was just updated, so trimming the oldest profiles never drops it
+    if len(profiles) > MAX_PROFILES:
+        profiles = dict(sorted(profiles.items(), key=lambda item: item[1].get('updated', ''))[-MAX_PROFILES:])
+
+    tuning.update({'version': 1, 'updatedAt': now, 'profiles': profiles})
+    try:
+        s3.put_object(
+            Bucket=bucket_name,
+            Key=TUNING_KEY,
+            Body=json.dumps(tuning, separators=(',', ':')),
+            ContentType='application/json'
+        )
+    except ClientError as e:
+        raise StorageError(f"Failed to save upload tuning: {str(e)}")
+    _tuning_cache.set(bucket_name, tuning)
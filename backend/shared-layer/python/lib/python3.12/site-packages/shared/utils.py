@@ -4,6 +4,8 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
+from .compression import compress_response
+
 def generate_uuid() -> str:
     """Generate a UUID string"""
     return str(uuid.uuid4())
@@ -67,9 +69,10 @@ def format_file_size(size_bytes: int) -> str:
     
     return f"{size_bytes:.1f} {size_names[i]}"
 
-def create_cors_response(body: Dict[str, Any], status_code: int = 200) -> Dict[str, Any]:
-    """Create CORS-enabled Lambda response"""
-    return {
+def create_cors_response(body: Dict[str, Any], status_code: int = 200,
+                         accept_encoding: Optional[str] = None) -> Dict[str, Any]:
+    """Create CORS-enabled Lambda response, compressed when accept_encoding allows"""
+    response = {
         'statusCode': status_code,
         'headers': {
             'Content-Type': 'application/json',
@@ -79,6 +82,7 @@ def create_cors_response(body: Dict[str, Any], status_code: int = 200) -> Dict[s
         },
         'body': safe_json_dumps(body)
     }
+    return compress_response(response, accept_encoding) if accept_encoding else response
 
 def create_error_response(message: str, status_code: int = 500) -> Dict[str, Any]:
     """Create error response"""
@@ -0,0 +1,144 @@
+"""S3 local em memória para os testes (subconjunto do cliente boto3 usado pelo shared layer)"""
+import hashlib
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+
+def client_error(code, operation):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+
+
+class LocalS3:
+    """Objetos em memória, ETag = MD5; list_objects_v2 pagina de page_size em page_size"""
+
+    def __init__(self, page_size=2):
+        self.objects = {}
+        self.calls = []
+        self.page_size = page_size
+
+    def put_object(self, Bucket, Key, Body=b'', **kwargs):
+        self.calls.append(('put_object', Key))
+        body = Body.encode('utf-8') if isinstance(Body, str) else Body
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        self.objects[Key] = {'Body': body, 'ETag': etag, 'LastModified': datetime.now(timezone.utc)}
+        return {'ETag': etag}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self.calls.append(('get_object', Key))
+        if Key not in self.objects:
+            raise client_error('NoSuchKey', 'GetObject')
+        obj = self.objects[Key]
+
+        class Body:
+            def read(self_):
+                return obj['Body']
+
+        return {'Body': Body(), 'ETag': obj['ETag']}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self.calls.append(('head_object', Key))
+        if Key not in self.objects:
+            raise client_error('404', 'HeadObject')
+        obj = self.objects[Key]
+        return {'ETag': obj['ETag'], 'ContentLength': len(obj['Body']), 'LastModified': obj['LastModified']}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self.calls.append(('delete_object', Key))
+        self.objects.pop(Key, None)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix='', MaxKeys=1000, ContinuationToken=None, StartAfter=None, **kwargs):
+        self.calls.append(('list_objects_v2', Prefix))
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        after = ContinuationToken or StartAfter
+        if after:
+            keys = [k for k in keys if k > after]
+        page = keys[:min(MaxKeys, self.page_size)]
+        response = {
+            'KeyCount': len(page),
+            'IsTruncated': len(keys) > len(page),
+            'Contents': [{
+                'Key': key,
+                'Size': len(self.objects[key]['Body']),
+                'LastModified': self.objects[key]['LastModified'],
+                'ETag': self.objects[key]['ETag']
+            } for key in page]
+        }
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+    def get_paginator(self, name):
+        s3 = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                token = None
+                while True:
+                    page = s3.list_objects_v2(ContinuationToken=token, **kwargs)
+                    yield page
+                    if not page['IsTruncated']:
+                        return
+                    token = page['NextContinuationToken']
+
+        return Paginator()
+
+
+class LocalMultipartS3(LocalS3):
+    """LocalS3 com multipart: ListParts pagina de parts_page_size em parts_page_size"""
+
+    def __init__(self, page_size=2, parts_page_size=2):
+        super().__init__(page_size)
+        self.parts_page_size = parts_page_size
+        self.uploads = {}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.calls.append(('create_multipart_upload', Key))
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {'Key': Key, 'parts': {}}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body=b'', **kwargs):
+        if UploadId not in self.uploads:
+            raise client_error('NoSuchUpload', 'UploadPart')
+        etag = '"%s"' % hashlib.md5(Body).hexdigest()
+        self.uploads[UploadId]['parts'][PartNumber] = {'ETag': etag, 'Body': Body}
+        return {'ETag': etag}
+
+    def list_parts(self, Bucket, Key, UploadId, PartNumberMarker=0, **kwargs):
+        self.calls.append(('list_parts', Key))
+        if UploadId not in self.uploads:
+            raise client_error('NoSuchUpload', 'ListParts')
+        parts = self.uploads[UploadId]['parts']
+        numbers = sorted(n for n in parts if n > int(PartNumberMarker))
+        page = numbers[:self.parts_page_size]
+        response = {
+            'Parts': [{'PartNumber': n, 'ETag': parts[n]['ETag'], 'Size': len(parts[n]['Body'])} for n in page],
+            'IsTruncated': len(numbers) > len(page)
+        }
+        if response['IsTruncated']:
+            response['NextPartNumberMarker'] = page[-1]
+        return response
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self.calls.append(('complete_multipart_upload', Key))
+        if UploadId not in self.uploads:
+            raise client_error('NoSuchUpload', 'CompleteMultipartUpload')
+        stored = self.uploads[UploadId]['parts']
+        requested = MultipartUpload['Parts']
+        if [p['PartNumber'] for p in requested] != sorted(stored) or \
+                any(stored[p['PartNumber']]['ETag'] != p['ETag'] for p in requested):
+            raise client_error('InvalidPart', 'CompleteMultipartUpload')
+        del self.uploads[UploadId]
+        self.put_object(Bucket=Bucket, Key=Key, Body=b''.join(stored[n]['Body'] for n in sorted(stored)))
+        return {'Location': f"https://{Bucket}.s3.amazonaws.com/{Key}", 'Key': Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self.calls.append(('abort_multipart_upload', Key))
+        self.uploads.pop(UploadId, None)
+        return {}
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn=3600):
+        query = f"?partNumber={Params['PartNumber']}&uploadId={Params['UploadId']}" if 'PartNumber' in Params else ''
+        return f"https://{Params['Bucket']}.s3.local/{Params['Key']}{query}"
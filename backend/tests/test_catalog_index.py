@@ -0,0 +1,159 @@
+"""
+🧪 TESTE DO ÍNDICE DO CATÁLOGO
+CatalogIndex contra um S3 local em memória: eventos S3, ordem por sequencer,
+cursores de list_page e o cache de load_catalog_index por ETag.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared import catalog_index
+from shared.catalog_index import INDEX_KEY, CatalogIndex, IndexConflictError, load_catalog_index
+from shared.pagination import decode_cursor
+
+from local_s3 import LocalS3
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+
+
+def event(name, key, sequencer, size=100):
+    obj = {'key': key, 'sequencer': sequencer}
+    if name.startswith('ObjectCreated'):
+        obj.update({'size': size, 'eTag': 'abc'})
+    return {'eventName': name, 'eventTime': '2025-01-01T00:00:00.000Z', 's3': {'object': obj}}
+
+
+class CatalogIndexEventsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = LocalS3()
+        self.index = CatalogIndex(self.s3, BUCKET)
+
+    def test_apply_event_records(self):
+        changed = self.index.apply_event_records([
+            event('ObjectCreated:Put', 'videos/a.mp4', '0A'),
+            event('ObjectCreated:CompleteMultipartUpload', 'videos/pasta/b+c.mp4', '0B', size=200),
+            event('ObjectCreated:Put', 'metadata/a.json', '0C'),
+            event('ObjectRemoved:Delete', 'videos/a.mp4', '0D')
+        ])
+
+        self.assertEqual(changed, 3)
+        # Chaves chegam URL-encoded nos eventos ('+' é espaço)
+        self.assertEqual(list(self.index.entries), ['videos/pasta/b c.mp4'])
+        self.assertEqual(self.index.entries['videos/pasta/b c.mp4'][0], 200)
+        self.assertEqual(self.index.removed['videos/a.mp4'], '0D')
+        self.assertEqual([c['type'] for c in self.index.changes], ['add', 'add', 'remove'])
+
+    def test_sequencer_ordering(self):
+        # Create atrasado depois do delete: ignorado
+        self.index.apply_event_records([
+            event('ObjectCreated:Put', 'videos/a.mp4', '0000A'),
+            event('ObjectRemoved:Delete', 'videos/a.mp4', '0000C')
+        ])
+        self.assertEqual(self.index.apply_event_records([event('ObjectCreated:Put', 'videos/a.mp4', '0000B')]), 0)
+        self.assertNotIn('videos/a.mp4', self.index.entries)
+
+        # Sequencers de tamanhos diferentes comparam com zeros à esquerda
+        self.assertEqual(self.index.apply_event_records([event('ObjectCreated:Put', 'videos/a.mp4', 'D')]), 1)
+        self.assertEqual(self.index.apply_event_records([event('ObjectCreated:Put', 'videos/a.mp4', '0000B', size=1)]), 0)
+        self.assertEqual(self.index.entries['videos/a.mp4'][0], 100)
+
+    def test_update_from_events_persists(self):
+        self.index.rebuild()
+        self.index.update_from_events([event('ObjectCreated:Put', 'videos/a.mp4', '01')])
+
+        reloaded = CatalogIndex(self.s3, BUCKET)
+        self.assertTrue(reloaded.load())
+        self.assertIn('videos/a.mp4', reloaded.entries)
+
+    def test_save_detects_concurrent_writer(self):
+        self.index.rebuild()
+        other = CatalogIndex(self.s3, BUCKET)
+        other.load()
+        self.index.upsert('videos/a.mp4', 1, 0)
+        self.index.save()
+
+        other.upsert('videos/b.mp4', 1, 0)
+        with self.assertRaises(IndexConflictError):
+            other.save()
+
+
+class CatalogIndexPagingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = LocalS3()
+        self.index = CatalogIndex(self.s3, BUCKET)
+        for i in range(7):
+            self.index.upsert(f"videos/v{i}.mp4", i, 0)
+        self.index.upsert('videos/pasta/x.mp4', 1, 0)
+        self.index.upsert('converted/v0.mp4', 1, 0)
+
+    def collect(self, prefix, page_size):
+        keys, cursor, pages = [], None, 0
+        while True:
+            page = self.index.list_page(prefix, page_size=page_size, cursor=cursor)
+            keys.extend(obj['Key'] for obj in page['contents'])
+            pages += 1
+            cursor = page['next_cursor']
+            if not cursor:
+                return keys, pages
+
+    def test_cursor_walks_every_key_once(self):
+        keys, pages = self.collect('videos/', 3)
+        self.assertEqual(keys, sorted(k for k in self.index.entries if k.startswith('videos/')))
+        self.assertEqual(pages, 3)
+
+    def test_cursor_is_the_last_key_of_the_page(self):
+        page = self.index.list_page('videos/', page_size=2)
+        self.assertEqual(decode_cursor(page['next_cursor'])['a'], page['contents'][-1]['Key'])
+
+    def test_cursor_survives_deleted_key(self):
+        page = self.index.list_page('videos/', page_size=2)
+        self.assertEqual([obj['Key'] for obj in page['contents']], ['videos/pasta/x.mp4', 'videos/v0.mp4'])
+        self.index.remove('videos/v0.mp4')
+        following = self.index.list_page('videos/', page_size=2, cursor=page['next_cursor'])
+        self.assertEqual(following['contents'][0]['Key'], 'videos/v1.mp4')
+
+    def test_exact_page_has_no_next_cursor(self):
+        page = self.index.list_page('videos/pasta/', page_size=1)
+        self.assertEqual([obj['Key'] for obj in page['contents']], ['videos/pasta/x.mp4'])
+        self.assertIsNone(page['next_cursor'])
+
+
+class LoadCatalogIndexCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        catalog_index._loaded.clear()
+        self.s3 = LocalS3()
+
+    def gets(self):
+        return sum(1 for call in self.s3.calls if call == ('get_object', INDEX_KEY))
+
+    def test_missing_index(self):
+        self.assertIsNone(load_catalog_index(self.s3, BUCKET))
+
+    def test_reused_until_catalog_changes(self):
+        writer = CatalogIndex(self.s3, BUCKET)
+        writer.upsert('videos/a.mp4', 1, 0)
+        writer.save(check_conflict=False)
+
+        first = load_catalog_index(self.s3, BUCKET)
+        second = load_catalog_index(self.s3, BUCKET)
+        self.assertIs(first, second)
+        self.assertEqual(self.gets(), 1)
+
+        writer.update_from_events([event('ObjectCreated:Put', 'videos/b.mp4', '01')])
+        third = load_catalog_index(self.s3, BUCKET)
+        self.assertIsNot(third, first)
+        self.assertEqual(self.gets(), 3)  # update_from_events + reload
+        self.assertEqual([obj['Key'] for obj in third.list_page('videos/')['contents']],
+                         ['videos/a.mp4', 'videos/b.mp4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+🧪 TESTE DO JOURNAL DE MUDANÇAS
+Limite validado e limitado nos handlers (400 em entrada inválida, 500 em
+falha de storage) e leitura das mudanças após o token.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import importlib.util
+import json
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared import change_journal
+from shared.change_journal import (
+    MAX_ENTRIES_PER_READ, append_changes, parse_change_limit, read_changes
+)
+from shared.exceptions import ValidationError
+
+from local_s3 import LocalS3, client_error
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+
+
+def recent_token(seconds_ago=60):
+    return f"{int((time.time() - seconds_ago) * 1000):013d}-0"
+
+
+def load_video_handler():
+    with mock.patch('boto3.client'):
+        spec = importlib.util.spec_from_file_location('video_handler', os.path.join(BACKEND, 'video-service', 'handler.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+video_handler = load_video_handler()
+
+
+class ParseLimitTest(unittest.TestCase):
+
+    def test_default_and_clamp(self):
+        self.assertEqual(parse_change_limit(None), MAX_ENTRIES_PER_READ)
+        self.assertEqual(parse_change_limit(''), MAX_ENTRIES_PER_READ)
+        self.assertEqual(parse_change_limit('50'), 50)
+        self.assertEqual(parse_change_limit('100000'), MAX_ENTRIES_PER_READ)
+        self.assertEqual(parse_change_limit('0'), 1)
+        self.assertEqual(parse_change_limit(-5), 1)
+
+    def test_invalid(self):
+        for value in ('abc', '1.5', [1]):
+            with self.assertRaises(ValidationError):
+                parse_change_limit(value)
+
+
+class ReadChangesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = LocalS3(page_size=1000)
+
+    def test_changes_after_token(self):
+        since = read_changes(self.s3, BUCKET, None)['next']
+        for change in ({'type': 'add', 'key': 'videos/a.mp4'},
+                       {'type': 'remove', 'key': 'videos/b.mp4'},
+                       {'type': 'remove', 'key': 'videos/a.mp4'}):
+            append_changes(self.s3, BUCKET, [change])
+            time.sleep(0.002)  # Tokens are only ordered across milliseconds
+
+        # Entries inside the settle window are held back
+        self.assertEqual(read_changes(self.s3, BUCKET, since)['changes'], [])
+        settled = time.time() + change_journal.SETTLE_SECONDS + 1
+        with mock.patch.object(change_journal.time, 'time', return_value=settled):
+            result = read_changes(self.s3, BUCKET, since)
+
+        self.assertEqual([(c['type'], c['key']) for c in result['changes']], [('remove', 'videos/b.mp4'), ('remove', 'videos/a.mp4')])
+        self.assertFalse(result['has_more'])
+        self.assertFalse(result['reset'])
+
+    def test_limit_is_clamped(self):
+        with mock.patch.object(self.s3, 'list_objects_v2', wraps=self.s3.list_objects_v2) as listing:
+            read_changes(self.s3, BUCKET, recent_token(), 100000)
+        self.assertEqual(listing.call_args.kwargs['MaxKeys'], MAX_ENTRIES_PER_READ)
+
+
+class VideoServiceChangesTest(unittest.TestCase):
+
+    def get_changes(self, s3, params):
+        event = {
+            'rawPath': '/videos/changes',
+            'requestContext': {'http': {'method': 'GET'}},
+            'queryStringParameters': params
+        }
+        with mock.patch.object(video_handler.boto3, 'client', return_value=s3):
+            response = video_handler.handle_request(event, None)
+        return response['statusCode'], json.loads(response['body'])
+
+    def test_bad_limit_is_400(self):
+        status, body = self.get_changes(LocalS3(), {'since': recent_token(), 'limit': 'abc'})
+        self.assertEqual(status, 400)
+        self.assertFalse(body['success'])
+
+    def test_large_limit_is_clamped(self):
+        s3 = LocalS3()
+        with mock.patch.object(s3, 'list_objects_v2', wraps=s3.list_objects_v2) as listing:
+            status, _ = self.get_changes(s3, {'since': recent_token(), 'limit': '100000'})
+        self.assertEqual(status, 200)
+        self.assertEqual(listing.call_args.kwargs['MaxKeys'], MAX_ENTRIES_PER_READ)
+
+    def test_storage_error_is_500(self):
+        s3 = LocalS3()
+        with mock.patch.object(s3, 'list_objects_v2', side_effect=client_error('AccessDenied', 'ListObjectsV2')):
+            status, _ = self.get_changes(s3, {'since': recent_token()})
+        self.assertEqual(status, 500)
+
+
+class LegacyChangesTest(unittest.TestCase):
+
+    def test_bad_limit_is_rejected(self):
+        from services import video_service
+        with mock.patch('boto3.client'):
+            service = video_service.VideoService()
+        service.s3_client = LocalS3()
+
+        result = service.get_changes(recent_token(), 'abc')
+        self.assertFalse(result['success'])
+        self.assertEqual(result['message'], 'Invalid limit')
+        self.assertTrue(service.get_changes(recent_token(), '100000')['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
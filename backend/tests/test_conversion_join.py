@@ -0,0 +1,77 @@
+"""
+🧪 TESTE DO JOIN ORIGINAL -> MP4
+join_listings casa videos/ e converted/ em streaming, mesmo quando a ordem
+das chaves S3 difere da ordem das chaves normalizadas.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared.conversion_join import join_key, join_listings
+
+
+def listing(*keys):
+    return [{'Key': key} for key in sorted(keys)]
+
+
+def joined(originals, converted):
+    return {key: ([o['Key'] for o in left], [c['Key'] for c in right])
+            for key, left, right in join_listings(iter(originals), iter(converted))}
+
+
+class JoinKeyTest(unittest.TestCase):
+
+    def test_strips_extension_and_suffix(self):
+        self.assertEqual(join_key('videos/a/1-x.ts'), 'a/1-x')
+        self.assertEqual(join_key('converted/a/1-x_converted.mp4'), 'a/1-x')
+        self.assertEqual(join_key('converted/a/1-x_mp4.mp4'), 'a/1-x')
+        self.assertEqual(join_key('converted/a/1-x.mp4'), 'a/1-x')
+
+
+class JoinListingsTest(unittest.TestCase):
+
+    def test_pairs_and_orphans(self):
+        result = joined(
+            listing('videos/a.ts', 'videos/b.ts', 'videos/pasta/c.mkv'),
+            listing('converted/a_converted.mp4', 'converted/pasta/c.mp4', 'converted/z.mp4')
+        )
+        self.assertEqual(result['a'], (['videos/a.ts'], ['converted/a_converted.mp4']))
+        self.assertEqual(result['b'], (['videos/b.ts'], []))
+        self.assertEqual(result['pasta/c'], (['videos/pasta/c.mkv'], ['converted/pasta/c.mp4']))
+        self.assertEqual(result['z'], ([], ['converted/z.mp4']))
+
+    def test_key_order_differs_from_join_order(self):
+        # 'a-b.ts' < 'a.ts' nas chaves S3, mas 'a' < 'a-b' nas chaves normalizadas
+        result = joined(
+            listing('videos/a-b.ts', 'videos/a.ts', 'videos/a.b.ts', 'videos/a/x.ts'),
+            listing('converted/a-b_converted.mp4', 'converted/a_converted.mp4',
+                    'converted/a.b_converted.mp4', 'converted/a/x.mp4')
+        )
+        self.assertEqual(result['a'], (['videos/a.ts'], ['converted/a_converted.mp4']))
+        self.assertEqual(result['a-b'], (['videos/a-b.ts'], ['converted/a-b_converted.mp4']))
+        self.assertEqual(result['a.b'], (['videos/a.b.ts'], ['converted/a.b_converted.mp4']))
+        self.assertEqual(result['a/x'], (['videos/a/x.ts'], ['converted/a/x.mp4']))
+
+    def test_consumes_inputs_lazily(self):
+        read = []
+
+        def tracked(keys):
+            for key in keys:
+                read.append(key)
+                yield {'Key': key}
+
+        groups = join_listings(
+            tracked([f"videos/v{i:03d}.ts" for i in range(100)]),
+            tracked([f"converted/v{i:03d}.mp4" for i in range(100)])
+        )
+        key, left, right = next(groups)
+        self.assertEqual((key, len(left), len(right)), ('v000', 1, 1))
+        self.assertLess(len(read), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+🧪 TESTE DO ÍNDICE DE HASHES
+Upload pulado só quando o S3 verificou o SHA-256 do objeto guardado;
+hashes amostrados ou multipart ficam como aviso.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import base64
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared.exceptions import ValidationError
+from shared.hash_index import (
+    check_content_hash, checksum_sha256, hash_index_key, parse_content_hash, put_content_hash
+)
+
+from local_s3 import LocalS3
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+BODY = b'conteudo do video'
+DIGEST = hashlib.sha256(BODY).hexdigest()
+FULL = {'mode': 'full', 'digest': DIGEST}
+SAMPLED = {'mode': 'sampled', 'digest': DIGEST}
+STORED_KEY = 'videos/2025/01/01/0f8fad5b-d9cb-469f-a165-70867728950e-praia.mp4'
+
+
+class ChecksumS3(LocalS3):
+    """LocalS3 que guarda o ChecksumSHA256 do PUT e o devolve no HEAD"""
+
+    def __init__(self):
+        super().__init__()
+        self.presigned = []
+
+    def put_object(self, Bucket, Key, Body=b'', ChecksumSHA256=None, **kwargs):
+        response = super().put_object(Bucket=Bucket, Key=Key, Body=Body, **kwargs)
+        if ChecksumSHA256:
+            self.objects[Key]['ChecksumSHA256'] = ChecksumSHA256
+        return response
+
+    def head_object(self, Bucket, Key, **kwargs):
+        response = super().head_object(Bucket=Bucket, Key=Key, **kwargs)
+        if kwargs.get('ChecksumMode') == 'ENABLED' and 'ChecksumSHA256' in self.objects[Key]:
+            response['ChecksumSHA256'] = self.objects[Key]['ChecksumSHA256']
+        return response
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn=3600):
+        self.presigned.append(Params)
+        return f"https://s3.local/{Params['Key']}"
+
+
+def load_upload_handler():
+    with mock.patch('boto3.client'):
+        spec = importlib.util.spec_from_file_location('upload_handler_hash', os.path.join(BACKEND, 'upload-service', 'handler.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+upload_handler = load_upload_handler()
+
+
+class ParseContentHashTest(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertIsNone(parse_content_hash(None))
+        self.assertEqual(parse_content_hash(DIGEST.upper()), FULL)
+        self.assertEqual(parse_content_hash(f"sha256:{DIGEST}", 'sampled'), SAMPLED)
+
+    def test_invalid(self):
+        with self.assertRaises(ValidationError):
+            parse_content_hash('abc')
+        with self.assertRaises(ValidationError):
+            parse_content_hash(DIGEST, 'md5')
+
+    def test_checksum_only_for_full_hashes(self):
+        self.assertEqual(checksum_sha256(FULL), base64.b64encode(hashlib.sha256(BODY).digest()).decode('ascii'))
+        self.assertIsNone(checksum_sha256(SAMPLED))
+
+
+class CheckContentHashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = ChecksumS3()
+
+    def store(self, content_hash, checksum=True, created=None):
+        if checksum:
+            self.s3.put_object(Bucket=BUCKET, Key=STORED_KEY, Body=BODY, ChecksumSHA256=checksum_sha256(FULL))
+        else:
+            self.s3.put_object(Bucket=BUCKET, Key=STORED_KEY, Body=BODY)
+        put_content_hash(self.s3, BUCKET, content_hash, STORED_KEY, len(BODY))
+        if created:
+            entry = json.loads(self.s3.objects[hash_index_key(content_hash)]['Body'])
+            entry['created'] = created.isoformat()
+            self.s3.put_object(Bucket=BUCKET, Key=hash_index_key(content_hash), Body=json.dumps(entry))
+
+    def test_unknown_hash(self):
+        self.assertEqual(check_content_hash(self.s3, BUCKET, FULL, len(BODY)),
+                         {'existing': None, 'advisory': None, 'claimable': True})
+
+    def test_verified_object_is_existing(self):
+        self.store(FULL)
+        result = check_content_hash(self.s3, BUCKET, FULL, len(BODY))
+        self.assertEqual(result['existing']['Key'], STORED_KEY)
+        self.assertFalse(result['claimable'])
+
+    def test_unverified_object_is_advisory(self):
+        # Multipart uploads carry no full-file ChecksumSHA256
+        self.store(FULL, checksum=False)
+        result = check_content_hash(self.s3, BUCKET, FULL, len(BODY))
+        self.assertIsNone(result['existing'])
+        self.assertEqual(result['advisory']['Key'], STORED_KEY)
+        self.assertTrue(result['claimable'])
+
+    def test_sampled_hash_is_advisory(self):
+        self.store(SAMPLED)
+        result = check_content_hash(self.s3, BUCKET, SAMPLED, len(BODY))
+        self.assertIsNone(result['existing'])
+        self.assertEqual(result['advisory']['Key'], STORED_KEY)
+
+    def test_size_mismatch(self):
+        self.store(FULL)
+        result = check_content_hash(self.s3, BUCKET, FULL, len(BODY) + 1)
+        self.assertEqual(result, {'existing': None, 'advisory': None, 'claimable': True})
+
+    def test_pending_claim(self):
+        put_content_hash(self.s3, BUCKET, FULL, STORED_KEY, len(BODY))
+        self.assertFalse(check_content_hash(self.s3, BUCKET, FULL, len(BODY))['claimable'])
+
+        self.store(FULL, created=datetime.now(timezone.utc) - timedelta(days=2))
+        self.s3.delete_object(Bucket=BUCKET, Key=STORED_KEY)
+        self.assertTrue(check_content_hash(self.s3, BUCKET, FULL, len(BODY))['claimable'])
+
+
+class InitiateUploadTest(unittest.TestCase):
+
+    def initiate(self, s3, content_hash=DIGEST, size=len(BODY)):
+        event = {
+            'rawPath': '/upload/initiate',
+            'requestContext': {'http': {'method': 'POST'}},
+            'body': json.dumps({'file_name': 'praia.mp4', 'file_size': size, 'content_hash': content_hash})
+        }
+        with mock.patch.object(upload_handler.boto3, 'client', return_value=s3):
+            response = upload_handler.lambda_handler(event, None)
+        self.assertEqual(response['statusCode'], 200)
+        return json.loads(response['body'])
+
+    def test_verified_duplicate_skips_the_upload(self):
+        s3 = ChecksumS3()
+        s3.put_object(Bucket=BUCKET, Key=STORED_KEY, Body=BODY, ChecksumSHA256=checksum_sha256(FULL))
+        put_content_hash(s3, BUCKET, FULL, STORED_KEY, len(BODY))
+
+        result = self.initiate(s3)
+        self.assertEqual(result['upload_type'], 'existing')
+        self.assertEqual(result['file_key'], STORED_KEY)
+        self.assertEqual(s3.presigned, [])
+
+    def test_new_content_is_signed_and_claimed(self):
+        s3 = ChecksumS3()
+        result = self.initiate(s3)
+
+        self.assertEqual(result['upload_type'], 'simple')
+        self.assertEqual(result['upload_headers'], {'x-amz-checksum-sha256': checksum_sha256(FULL)})
+        self.assertEqual(s3.presigned[0]['ChecksumSHA256'], checksum_sha256(FULL))
+        entry = json.loads(s3.objects[hash_index_key(FULL)]['Body'])
+        self.assertEqual(entry['key'], result['file_key'])
+
+    def test_unverified_duplicate_is_reported(self):
+        s3 = ChecksumS3()
+        s3.put_object(Bucket=BUCKET, Key=STORED_KEY, Body=BODY)
+        put_content_hash(s3, BUCKET, FULL, STORED_KEY, len(BODY))
+
+        result = self.initiate(s3)
+        self.assertEqual(result['upload_type'], 'simple')
+        self.assertEqual(result['possible_duplicate']['file_key'], STORED_KEY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+🧪 TESTE DO ÍNDICE DE IDS
+Resolução id -> chave: uuids, ids legados (nome do arquivo sem extensão),
+backfill do rebuild e erros de storage que não podem virar 404.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import importlib.util
+import os
+import sys
+import unittest
+from unittest import mock
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from botocore.exceptions import ClientError
+
+from shared.id_index import (
+    delete_video_id, get_video_key, id_index_key, put_video_id, rebuild_id_index, video_id_for_key
+)
+
+from local_s3 import LocalS3, client_error
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+UUID = '0f8fad5b-d9cb-469f-a165-70867728950e'
+UPLOAD_KEY = f"videos/2025/01/01/{UUID}-praia.mp4"
+
+
+def load_video_handler():
+    with mock.patch('boto3.client'):
+        spec = importlib.util.spec_from_file_location('video_handler', os.path.join(BACKEND, 'video-service', 'handler.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+class VideoIdTest(unittest.TestCase):
+
+    def test_id_for_key(self):
+        self.assertEqual(video_id_for_key(UPLOAD_KEY), UUID)
+        self.assertEqual(video_id_for_key('videos/pasta/1700000000-aula.mp4'), '1700000000-aula')
+        self.assertIsNone(video_id_for_key('videos/pasta/'))
+
+
+class GetVideoKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = LocalS3()
+        for key in (UPLOAD_KEY, 'videos/a/aula.mp4', 'videos/b/aula.mp4', 'videos/c/outro.ts'):
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=b'x')
+
+    def test_uuid_ids(self):
+        put_video_id(self.s3, BUCKET, UUID, UPLOAD_KEY)
+        self.assertEqual(get_video_key(self.s3, BUCKET, UUID), UPLOAD_KEY)
+        self.assertEqual(get_video_key(self.s3, BUCKET, f"{UUID}-praia"), UPLOAD_KEY)
+
+    def test_unindexed_uuid_is_missing_without_scan(self):
+        self.assertIsNone(get_video_key(self.s3, BUCKET, UUID))
+        self.assertNotIn('list_objects_v2', [call[0] for call in self.s3.calls])
+
+    def test_legacy_id_falls_back_to_scan_and_is_indexed(self):
+        self.assertEqual(get_video_key(self.s3, BUCKET, 'outro'), 'videos/c/outro.ts')
+        self.assertIn(id_index_key('outro'), self.s3.objects)
+
+        self.s3.calls.clear()
+        self.assertEqual(get_video_key(self.s3, BUCKET, 'outro'), 'videos/c/outro.ts')
+        self.assertNotIn('list_objects_v2', [call[0] for call in self.s3.calls])
+
+    def test_unknown_legacy_id(self):
+        self.assertIsNone(get_video_key(self.s3, BUCKET, 'nada'))
+
+    def test_storage_errors_propagate(self):
+        with mock.patch.object(self.s3, 'get_object', side_effect=client_error('AccessDenied', 'GetObject')):
+            with self.assertRaises(ClientError):
+                get_video_key(self.s3, BUCKET, UUID)
+
+    def test_rebuild_indexes_legacy_keys(self):
+        result = rebuild_id_index(self.s3, BUCKET)
+        self.assertEqual(result, {'scanned': 4, 'written': 3})
+        # Mesmo id legado em duas pastas: fica o primeiro na ordem da listagem
+        self.assertEqual(get_video_key(self.s3, BUCKET, 'aula'), 'videos/a/aula.mp4')
+        self.assertEqual(get_video_key(self.s3, BUCKET, UUID), UPLOAD_KEY)
+
+        delete_video_id(self.s3, BUCKET, 'aula')
+        self.assertNotIn(id_index_key('aula'), self.s3.objects)
+
+
+class FindVideoTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.handler = load_video_handler()
+
+    def setUp(self):
+        self.s3 = LocalS3()
+        self.s3.put_object(Bucket=BUCKET, Key=UPLOAD_KEY, Body=b'video')
+        put_video_id(self.s3, BUCKET, UUID, UPLOAD_KEY)
+
+    def test_found(self):
+        self.assertEqual(self.handler.find_video(self.s3, BUCKET, UUID)['Size'], 5)
+
+    def test_stale_entry_is_missing(self):
+        self.s3.delete_object(Bucket=BUCKET, Key=UPLOAD_KEY)
+        self.assertIsNone(self.handler.find_video(self.s3, BUCKET, UUID))
+
+    def test_access_denied_is_not_missing(self):
+        with mock.patch.object(self.s3, 'head_object', side_effect=client_error('AccessDenied', 'HeadObject')):
+            with self.assertRaises(ClientError):
+                self.handler.find_video(self.s3, BUCKET, UUID)
+
+
+if __name__ == '__main__':
+    unittest.main()
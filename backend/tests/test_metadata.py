@@ -0,0 +1,88 @@
+"""
+🧪 TESTE DOS METADADOS
+fetch_metadata_batch: busca paralela, cache negativo escrito só na thread
+chamadora, e o TTLCache com despejo do mais antigo.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared import metadata
+from shared.cache import TTLCache
+from shared.metadata import fetch_metadata_batch, metadata_key_for
+
+from local_s3 import LocalS3, client_error
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+
+
+class FetchMetadataBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        metadata.missing_metadata.cache.clear()
+        self.s3 = LocalS3()
+        for i in range(0, 20, 2):
+            self.s3.put_object(Bucket=BUCKET, Key=metadata_key_for(f"videos/v{i}.mp4"), Body=json.dumps({'n': i}))
+        self.keys = [f"videos/v{i}.mp4" for i in range(20)]
+
+    def test_results_and_negative_cache(self):
+        results = fetch_metadata_batch(self.s3, BUCKET, self.keys)
+        self.assertEqual(results['videos/v4.mp4'], {'n': 4})
+        self.assertEqual(results['videos/v5.mp4'], {})
+        self.assertEqual(len(metadata.missing_metadata.cache), 10)
+
+        self.s3.calls.clear()
+        fetch_metadata_batch(self.s3, BUCKET, self.keys)
+        self.assertEqual(len(self.s3.calls), 10)  # Misses are skipped
+
+    def test_cache_written_on_calling_thread(self):
+        writers = set()
+        real_set = metadata.missing_metadata.set
+
+        def record(key, value):
+            writers.add(threading.current_thread())
+            real_set(key, value)
+
+        with mock.patch.object(metadata.missing_metadata, 'set', side_effect=record):
+            fetch_metadata_batch(self.s3, BUCKET, self.keys)
+        self.assertEqual(writers, {threading.current_thread()})
+
+    def test_storage_errors_are_not_cached_as_missing(self):
+        with mock.patch.object(self.s3, 'get_object', side_effect=client_error('SlowDown', 'GetObject')):
+            results = fetch_metadata_batch(self.s3, BUCKET, self.keys[:3])
+        self.assertEqual(results, {key: {} for key in self.keys[:3]})
+        self.assertEqual(len(metadata.missing_metadata.cache), 0)
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def test_evicts_oldest_write(self):
+        cache = TTLCache(ttl=60, max_entries=3)
+        for key in 'abc':
+            cache.set(key, key)
+        cache.set('a', 'a2')  # Reescrita move 'a' para o fim
+        cache.set('d', 'd')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([cache.get(k) for k in 'acd'], ['a2', 'c', 'd'])
+
+    def test_expiry(self):
+        cache = TTLCache(ttl=10)
+        with mock.patch('shared.cache.time.time', return_value=1000):
+            cache.set('k', 1)
+        with mock.patch('shared.cache.time.time', return_value=1009):
+            self.assertEqual(cache.get('k'), 1)
+        with mock.patch('shared.cache.time.time', return_value=1011):
+            self.assertIsNone(cache.get('k'))
+        self.assertEqual(cache.stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+🧪 TESTE DO MULTIPART
+Retomada de uploads interrompidos (partes já enviadas via ListParts
+paginado, lacunas e URLs das partes que faltam) e lista de partes da
+conclusão montada no servidor.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import importlib.util
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared.exceptions import ValidationError
+from shared.multipart import (
+    MAX_PARTS, MIN_PART_SIZE, UploadNotFoundError, build_completion_parts, expected_part_count,
+    list_uploaded_parts, missing_part_numbers
+)
+
+from local_s3 import LocalMultipartS3
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+KEY = 'videos/2025/01/01/0f8fad5b-d9cb-469f-a165-70867728950e-praia.mp4'
+PART = b'x' * 1024
+FULL_PART = b'x' * MIN_PART_SIZE
+
+
+def load_module(name, *path):
+    with mock.patch('boto3.client'):
+        spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND, *path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+upload_handler = load_module('upload_handler_multipart', 'upload-service', 'handler.py')
+videos = load_module('videos_multipart', 'videos.py')
+
+
+def start_upload(s3, uploaded, body=PART, last=None):
+    upload_id = s3.create_multipart_upload(Bucket=BUCKET, Key=KEY)['UploadId']
+    for part_number in uploaded:
+        data = last if last is not None and part_number == uploaded[-1] else body
+        s3.upload_part(Bucket=BUCKET, Key=KEY, UploadId=upload_id, PartNumber=part_number, Body=data)
+    return upload_id
+
+
+class PartHelpersTest(unittest.TestCase):
+
+    def test_list_follows_pagination(self):
+        s3 = LocalMultipartS3(parts_page_size=2)
+        upload_id = start_upload(s3, [1, 2, 3, 5, 6])
+
+        parts = list_uploaded_parts(s3, BUCKET, KEY, upload_id)
+        self.assertEqual([p['PartNumber'] for p in parts], [1, 2, 3, 5, 6])
+        self.assertEqual([call[0] for call in s3.calls].count('list_parts'), 3)
+
+    def test_missing_upload(self):
+        with self.assertRaises(UploadNotFoundError):
+            list_uploaded_parts(LocalMultipartS3(), BUCKET, KEY, 'gone')
+
+    def test_expected_part_count(self):
+        self.assertEqual(expected_part_count(7), 7)
+        self.assertEqual(expected_part_count(None, 100, 30), 4)
+        for args in ((), (0,), (MAX_PARTS + 1,), ('x',), (None, 100, 0)):
+            with self.assertRaises(ValidationError):
+                expected_part_count(*args)
+
+    def test_missing_part_numbers(self):
+        parts = [{'PartNumber': n} for n in (1, 2, 4)]
+        self.assertEqual(missing_part_numbers(parts, 6), [3, 5, 6])
+
+
+class ResumeTest(unittest.TestCase):
+
+    def resume(self, s3, body):
+        event = {
+            'rawPath': '/upload/resume',
+            'requestContext': {'http': {'method': 'POST'}},
+            'body': json.dumps(body)
+        }
+        with mock.patch.object(upload_handler.boto3, 'client', return_value=s3):
+            response = upload_handler.lambda_handler(event, None)
+        return response['statusCode'], json.loads(response['body'])
+
+    def test_reports_gaps_and_signs_missing_parts(self):
+        s3 = LocalMultipartS3()
+        upload_id = start_upload(s3, [1, 2, 4])
+
+        status, body = self.resume(s3, {'file_key': KEY, 'upload_id': upload_id, 'total_parts': 5})
+        self.assertEqual(status, 200)
+        self.assertEqual([p['PartNumber'] for p in body['completed_parts']], [1, 2, 4])
+        self.assertEqual(body['uploaded_bytes'], 3 * len(PART))
+        self.assertEqual(body['missing_parts'], [3, 5])
+        self.assertEqual([url['part_number'] for url in body['urls']], [3, 5])
+        self.assertIn('partNumber=3', body['urls'][0]['url'])
+
+    def test_part_count_from_sizes(self):
+        s3 = LocalMultipartS3()
+        upload_id = start_upload(s3, [1])
+
+        status, body = self.resume(s3, {'file_key': KEY, 'upload_id': upload_id, 'file_size': 2500, 'chunk_size': 1024})
+        self.assertEqual(status, 200)
+        self.assertEqual(body['missing_parts'], [2, 3])
+
+    def test_finished_upload_is_404(self):
+        status, body = self.resume(LocalMultipartS3(), {'file_key': KEY, 'upload_id': 'gone', 'total_parts': 2})
+        self.assertEqual(status, 404)
+        self.assertFalse(body['success'])
+
+    def test_missing_parameters(self):
+        status, _ = self.resume(LocalMultipartS3(), {'file_key': KEY})
+        self.assertEqual(status, 400)
+
+
+class CompletionPartsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = LocalMultipartS3(parts_page_size=2)
+
+    def test_parts_from_s3(self):
+        upload_id = start_upload(self.s3, [1, 2, 3], FULL_PART, last=b'fim')
+        parts = build_completion_parts(self.s3, BUCKET, KEY, upload_id, 3, 2 * MIN_PART_SIZE + 3)
+        self.assertEqual([p['PartNumber'] for p in parts], [1, 2, 3])
+        self.assertEqual(set(parts[0]), {'PartNumber', 'ETag'})
+
+    def test_rejects_gaps_and_short_uploads(self):
+        upload_id = start_upload(self.s3, [1, 3], FULL_PART)
+        with self.assertRaisesRegex(ValidationError, 'Missing parts: 2'):
+            build_completion_parts(self.s3, BUCKET, KEY, upload_id)
+
+        upload_id = start_upload(self.s3, [1, 2], FULL_PART)
+        with self.assertRaisesRegex(ValidationError, 'Missing parts: 3'):
+            build_completion_parts(self.s3, BUCKET, KEY, upload_id, 3)
+
+    def test_rejects_small_parts_and_wrong_size(self):
+        upload_id = start_upload(self.s3, [1, 2], PART)
+        with self.assertRaisesRegex(ValidationError, 'smaller than 5 MiB'):
+            build_completion_parts(self.s3, BUCKET, KEY, upload_id)
+
+        upload_id = start_upload(self.s3, [1, 2], FULL_PART)
+        with self.assertRaisesRegex(ValidationError, 'expected'):
+            build_completion_parts(self.s3, BUCKET, KEY, upload_id, None, 2 * MIN_PART_SIZE + 1)
+
+    def test_no_parts(self):
+        upload_id = start_upload(self.s3, [])
+        with self.assertRaises(ValidationError):
+            build_completion_parts(self.s3, BUCKET, KEY, upload_id)
+
+
+class VideosCompleteTest(unittest.TestCase):
+
+    def complete(self, s3, body):
+        with mock.patch.object(videos.boto3, 'client', return_value=s3):
+            response = videos.complete_multipart_upload(body, None)
+        return response['statusCode'], json.loads(response['body'])
+
+    def test_completes_without_client_parts(self):
+        s3 = LocalMultipartS3()
+        upload_id = start_upload(s3, [1, 2, 3], FULL_PART, last=b'fim')
+
+        status, body = self.complete(s3, {'uploadId': upload_id, 'key': KEY, 'totalParts': 3})
+        self.assertEqual(status, 200)
+        self.assertTrue(body['success'])
+        self.assertEqual(len(s3.objects[KEY]['Body']), 2 * MIN_PART_SIZE + 3)
+
+    def test_incomplete_upload_is_400(self):
+        s3 = LocalMultipartS3()
+        upload_id = start_upload(s3, [1, 2], FULL_PART)
+
+        status, body = self.complete(s3, {'uploadId': upload_id, 'key': KEY, 'totalParts': 3})
+        self.assertEqual(status, 400)
+        self.assertIn('Missing parts', body['message'])
+        self.assertIn(upload_id, s3.uploads)
+
+    def test_finished_upload_is_404(self):
+        status, _ = self.complete(LocalMultipartS3(), {'uploadId': 'gone', 'key': KEY})
+        self.assertEqual(status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+🧪 TESTE DA PAGINAÇÃO POR CURSOR
+Cursor opaco (ContinuationToken + StartAfter), pageSize limitado ao S3 e
+listagem do videos.py percorrida página a página.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import importlib.util
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared.exceptions import ValidationError
+from shared.pagination import (
+    MAX_PAGE_SIZE, decode_cursor, encode_cursor, list_objects_page, parse_page_size
+)
+
+from local_s3 import LocalS3
+
+BUCKET = 'video-streaming-sstech-eaddf6a1'
+KEYS = [f"videos/{name}.mp4" for name in ('a', 'b', 'c', 'd', 'e')]
+
+
+def load_videos():
+    with mock.patch('boto3.client'):
+        spec = importlib.util.spec_from_file_location('videos_pagination', os.path.join(BACKEND, 'videos.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+videos = load_videos()
+
+
+class CursorTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        cursor = encode_cursor('token-1', 'videos/b.mp4')
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor), {'t': 'token-1', 'a': 'videos/b.mp4'})
+        self.assertEqual(decode_cursor(encode_cursor(start_after='videos/b.mp4')), {'a': 'videos/b.mp4'})
+
+    def test_empty(self):
+        self.assertIsNone(encode_cursor())
+        self.assertEqual(decode_cursor(None), {})
+
+    def test_invalid(self):
+        for cursor in ('!!!', encode_cursor('x')[:-1] + '*', 'WzFd'):  # 'WzFd' = [1]
+            with self.assertRaises(ValidationError):
+                decode_cursor(cursor)
+
+    def test_page_size(self):
+        self.assertEqual(parse_page_size(None), MAX_PAGE_SIZE)
+        self.assertEqual(parse_page_size('10'), 10)
+        self.assertEqual(parse_page_size('5000'), MAX_PAGE_SIZE)
+        self.assertEqual(parse_page_size('0'), 1)
+        with self.assertRaises(ValidationError):
+            parse_page_size('dez')
+
+
+class ListObjectsPageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = LocalS3(page_size=1000)
+        for key in KEYS:
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=b'x')
+
+    def walk(self, page_size):
+        keys, cursor = [], None
+        while True:
+            page = list_objects_page(self.s3, BUCKET, 'videos/', page_size, cursor)
+            keys.extend(obj['Key'] for obj in page['contents'])
+            cursor = page['next_cursor']
+            if not cursor:
+                return keys
+
+    def test_one_list_call_per_page(self):
+        self.assertEqual(self.walk(2), KEYS)
+        self.assertEqual([call[0] for call in self.s3.calls].count('list_objects_v2'), 3)
+
+    def test_start_after_fallback(self):
+        # Cursor without a continuation token resumes after the last key seen
+        page = list_objects_page(self.s3, BUCKET, 'videos/', 2, encode_cursor(start_after=KEYS[1]))
+        self.assertEqual([obj['Key'] for obj in page['contents']], KEYS[2:4])
+
+
+class VideosListTest(unittest.TestCase):
+
+    def setUp(self):
+        videos.listing_cache.cache.clear()
+        self.s3 = LocalS3(page_size=1000)
+        for key in KEYS:
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=b'x')
+
+    def test_follows_next_cursor(self):
+        names, cursor = [], None
+        with mock.patch.object(videos.boto3, 'client', return_value=self.s3):
+            while True:
+                params = {'pageSize': '2', **({'cursor': cursor} if cursor else {})}
+                response = videos.list_videos({'queryStringParameters': params}, None)
+                self.assertEqual(response['statusCode'], 200)
+                body = json.loads(response['body'])
+                names.extend(item['name'] for item in body['items'] if item['type'] == 'file')
+                cursor = body['nextCursor']
+                if not cursor:
+                    break
+        self.assertEqual(names, ['a.mp4', 'b.mp4', 'c.mp4', 'd.mp4', 'e.mp4'])
+
+    def test_bad_cursor_is_400(self):
+        with mock.patch.object(videos.boto3, 'client', return_value=self.s3):
+            response = videos.list_videos({'queryStringParameters': {'cursor': '!!!'}}, None)
+        self.assertEqual(response['statusCode'], 400)
+        self.assertEqual(json.loads(response['body'])['message'], 'Invalid cursor')
+
+
+if __name__ == '__main__':
+    unittest.main()
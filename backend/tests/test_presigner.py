@@ -0,0 +1,94 @@
+"""
+🧪 TESTE DO PRESIGNER
+S3Presigner contra o generate_presigned_url do botocore no mesmo instante:
+virtual-hosted, path-style e endpoint customizado devem gerar a mesma URL.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import datetime
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+import boto3
+import botocore.auth
+from botocore.config import Config
+
+from shared import presigner
+from shared.presigner import S3Presigner
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+NOW = datetime.datetime(2025, 3, 4, 5, 6, 7, tzinfo=datetime.timezone.utc)
+
+
+class FrozenDatetime(datetime.datetime):
+    @classmethod
+    def utcnow(cls):
+        return NOW.replace(tzinfo=None)
+
+
+def client(region='eu-west-1', endpoint_url=None, **s3_options):
+    return boto3.client(
+        's3',
+        region_name=region,
+        endpoint_url=endpoint_url,
+        aws_access_key_id='AKIDEXAMPLE',
+        aws_secret_access_key='wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY',
+        aws_session_token='session-token',
+        config=Config(signature_version='s3v4', s3=s3_options or None)
+    )
+
+
+class PresignerMatchesBotocoreTest(unittest.TestCase):
+
+    CLIENTS = {
+        'virtual': lambda: client(addressing_style='virtual'),
+        'path': lambda: client(addressing_style='path'),
+        'default': lambda: client(region='us-east-1'),
+        'custom-endpoint': lambda: client(endpoint_url='http://localhost:4566'),
+        'custom-endpoint-virtual': lambda: client(endpoint_url='https://minio.example.com', addressing_style='virtual')
+    }
+
+    def setUp(self):
+        presigner._endpoints.clear()
+        patcher = mock.patch.object(botocore.auth.datetime, 'datetime', FrozenDatetime)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_same(self, s3, ours, operation, params):
+        expected = s3.generate_presigned_url(operation, Params={'Bucket': BUCKET, **params}, ExpiresIn=900)
+        self.assertEqual(ours, expected)
+
+    def test_all_operations(self):
+        # Mesmo processo para todos: o cache de endpoints não pode misturar configurações
+        for name, make in self.CLIENTS.items():
+            with self.subTest(client=name):
+                s3 = make()
+                signer = S3Presigner(s3, BUCKET)
+                key = 'videos/pasta com espaço/1-vídeo+x.mp4'
+
+                self.assert_same(s3, signer.presign_get_object(key, 900, now=NOW), 'get_object', {'Key': key})
+                self.assert_same(
+                    s3, signer.presign_upload_part(key, 'upload~id', 7, 900, now=NOW),
+                    'upload_part', {'Key': key, 'PartNumber': 7, 'UploadId': 'upload~id'}
+                )
+                self.assert_same(
+                    s3,
+                    signer.presign_put_object(key, content_type='video/mp4', metadata={'original_name': 'a b.mp4'},
+                                              expires_in=900, now=NOW),
+                    'put_object', {'Key': key, 'ContentType': 'video/mp4', 'Metadata': {'original_name': 'a b.mp4'}}
+                )
+
+    def test_addressing_styles_do_not_share_an_endpoint(self):
+        virtual = S3Presigner(client(addressing_style='virtual'), BUCKET)
+        path = S3Presigner(client(addressing_style='path'), BUCKET)
+        self.assertNotEqual((virtual.host, virtual.path_prefix), (path.host, path.path_prefix))
+        self.assertEqual(path.path_prefix, f"/{BUCKET}")
+
+
+if __name__ == '__main__':
+    unittest.main()
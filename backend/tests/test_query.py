@@ -0,0 +1,173 @@
+"""
+🧪 TESTE DO MOTOR DE CONSULTA
+CatalogQuery: paginação ordenada e filtrada, estabilidade do cursor entre
+reconstruções, e o fallback sem índice (uma página do S3 por chamada).
+
+    cd backend && python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared import catalog_index, query
+from shared.catalog_index import INDEX_KEY, CatalogIndex
+from shared.exceptions import ValidationError
+from shared.query import CatalogQuery, query_catalog
+
+from local_s3 import LocalS3
+
+BUCKET = 'video-streaming-sstech-eaddf6a1'
+
+OBJECTS = [
+    # (key, size, mtime, etag)
+    ('videos/a/1.ts', 50, 500, 'e1'),
+    ('videos/a/2.mp4', 10, 100, 'e2'),
+    ('videos/a/b/3.ts', 30, 300, 'e3'),
+    ('videos/ab/4.ts', 20, 200, 'e4'),
+    ('videos/5.mp4', 40, 400, 'e5'),
+    ('videos/a/6.ts', 30, 600, 'e6'),
+    ('videos/ab/7.mp4', 70, 700, 'e7'),
+    ('videos/a/8.mkv', 80, 800, 'e8'),
+]
+
+
+def walk(engine, params, page_size):
+    keys, cursor = [], None
+    while True:
+        page = engine.query(params, page_size, cursor)
+        assert len(page['contents']) <= page_size
+        keys.extend(obj['Key'] for obj in page['contents'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return keys
+
+
+class CatalogQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = CatalogQuery(OBJECTS)
+
+    def expected(self, predicate, field, descending=False):
+        rows = [o for o in OBJECTS if predicate(o)]
+        return [o[0] for o in sorted(rows, key=lambda o: (o[field], o[0]), reverse=descending)]
+
+    def test_sorted_paging(self):
+        self.assertEqual(walk(self.engine, {'sort': 'size'}, 3), self.expected(lambda o: True, 1))
+        self.assertEqual(walk(self.engine, {'sort': 'lastModified', 'order': 'desc'}, 2),
+                         self.expected(lambda o: True, 2, descending=True))
+
+    def test_filters(self):
+        # Pasta 'a' inclui subpastas mas não 'ab'
+        in_a = lambda o: o[0].startswith('videos/a/')
+        self.assertEqual(walk(self.engine, {'folder': 'a', 'sort': 'size'}, 2), self.expected(in_a, 1))
+        # ext 'mkv' é a menor partição: a pasta vira filtro residual, sobre o campo de pasta da linha
+        self.assertEqual(walk(self.engine, {'folder': 'a', 'ext': 'mkv'}, 2), ['videos/a/8.mkv'])
+        self.assertEqual(walk(self.engine, {'folder': 'ab', 'ext': 'mp4'}, 2), ['videos/ab/7.mp4'])
+        self.assertEqual(walk(self.engine, {'sort': 'size', 'minSize': 30, 'maxSize': 50}, 2),
+                         self.expected(lambda o: 30 <= o[1] <= 50, 1))
+        self.assertEqual(walk(self.engine, {'ext': 'ts', 'from': 250, 'sort': 'size'}, 1),
+                         self.expected(lambda o: o[0].endswith('.ts') and o[2] >= 250, 1))
+
+    def test_keys_without_folder(self):
+        engine = CatalogQuery([('solto.mp4', 1, 1, 'x'), ('p/q.mp4', 2, 2, 'y'), ('p/r.ts', 3, 3, 'z')], prefix='')
+        self.assertEqual(walk(engine, {'folder': 'p', 'ext': 'mp4'}, 5), ['p/q.mp4'])
+        self.assertEqual(walk(engine, {'ext': 'mp4', 'converting': 'false', 'folder': 'p'}, 5), ['p/q.mp4'])
+
+    def test_cursor_stable_across_rebuilds(self):
+        first = self.engine.query({'sort': 'size'}, 3)
+        seen = [obj['Key'] for obj in first['contents']]
+
+        # Catálogo muda entre páginas: linhas novas antes e depois do cursor, uma removida da página lida
+        changed = [o for o in OBJECTS if o[0] != seen[0]] + [('videos/z/0.ts', 1, 1, 'n1'), ('videos/z/9.ts', 99, 9, 'n2')]
+        rest = walk_from(CatalogQuery(changed), {'sort': 'size'}, 3, first['next_cursor'])
+
+        self.assertEqual(set(seen) & set(rest), set())
+        self.assertEqual(rest, [o[0] for o in sorted(changed, key=lambda o: (o[1], o[0])) if (o[1], o[0]) > (30, seen[-1])])
+        self.assertIn('videos/z/9.ts', rest)
+        self.assertNotIn('videos/z/0.ts', rest)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValidationError):
+            self.engine.query({'sort': 'owner'})
+        with self.assertRaises(ValidationError):
+            self.engine.query({'sort': 'size'}, cursor='não-é-cursor')
+
+
+def walk_from(engine, params, page_size, cursor):
+    keys = []
+    while cursor:
+        page = engine.query(params, page_size, cursor)
+        keys.extend(obj['Key'] for obj in page['contents'])
+        cursor = page['next_cursor']
+    return keys
+
+
+class QueryCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        query._engines.clear()
+        catalog_index._loaded.clear()
+        self.s3 = LocalS3(page_size=3)
+        for key, size, mtime, etag in OBJECTS:
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=b'x' * size)
+            self.s3.objects[key]['LastModified'] = datetime.fromtimestamp(mtime, timezone.utc)
+
+    def test_fallback_reads_one_page_per_call(self):
+        params = {'folder': 'a', 'ext': 'ts', 'sort': 'size'}
+        keys, cursor, pages = [], None, 0
+        while True:
+            self.s3.calls.clear()
+            page = query_catalog(self.s3, BUCKET, None, params, page_size=2, cursor=cursor)
+            self.assertEqual([call[0] for call in self.s3.calls], ['list_objects_v2'])
+            self.assertEqual(self.s3.calls[0][1], 'videos/a/')
+            self.assertFalse(page['sorted'])
+            keys.extend(obj['Key'] for obj in page['contents'])
+            pages += 1
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        # Ordem das chaves: sem índice não há ordenação
+        self.assertEqual(keys, ['videos/a/1.ts', 'videos/a/6.ts', 'videos/a/b/3.ts'])
+        self.assertEqual(pages, 3)
+
+    def test_engine_with_index(self):
+        index = CatalogIndex(self.s3, BUCKET)
+        index.rebuild()
+        etag = self.s3.objects[INDEX_KEY]['ETag']
+        page = query_catalog(self.s3, BUCKET, etag, {'sort': 'size', 'order': 'desc'}, page_size=2)
+        self.assertEqual([obj['Key'] for obj in page['contents']], ['videos/a/8.mkv', 'videos/ab/7.mp4'])
+        self.assertNotIn('sorted', page)
+
+        # Mesmo ETag: o motor é reutilizado sem novo GET
+        self.s3.calls.clear()
+        query_catalog(self.s3, BUCKET, etag, {'sort': 'size'}, page_size=2)
+        self.assertEqual(self.s3.calls, [])
+
+
+class ListVideosHeadTest(unittest.TestCase):
+
+    def test_one_catalog_head_per_request(self):
+        from services import video_service
+        with mock.patch('boto3.client'):
+            service = video_service.VideoService()
+        catalog_index._loaded.clear()
+        video_service.listing_cache.cache.clear()
+        service.s3_client = LocalS3()
+        service.s3_client.put_object(Bucket=BUCKET, Key='videos/a.mp4', Body=b'x')
+        CatalogIndex(service.s3_client, BUCKET).rebuild()
+
+        for params in ({}, {'sort': 'size'}):
+            video_service.listing_cache.cache.clear()
+            service.s3_client.calls.clear()
+            result = service.list_videos(query=params)
+            self.assertTrue(result['success'])
+            self.assertEqual(service.s3_client.calls.count(('head_object', INDEX_KEY)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+🧪 TESTE DO ÍNDICE DE BUSCA
+Tokens do nome (sem uuid, sem acento), AND com o último termo como prefixo,
+ranking, remoção e persistência no S3.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared import search_index
+from shared.search_index import SEARCH_INDEX_KEY, SearchIndex, get_search_index, load_search_index, name_tokens
+
+from local_s3 import LocalS3
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+UUID = '0f8fad5b-d9cb-469f-a165-70867728950e'
+
+KEYS = [
+    f"videos/2025/01/01/{UUID}-Aula_Introdução.mp4",
+    'videos/cursos/aula-avancada.mp4',
+    'videos/cursos/aulas-extras-python.mp4',
+    'videos/praia/ferias-praia.mp4',
+    'videos/cursos/',
+    'thumbnails/aula.jpg'
+]
+
+
+def build():
+    search = SearchIndex()
+    for i, key in enumerate(KEYS):
+        search.add(key, 100 + i, 1700000000 + i)
+    return search
+
+
+def result_keys(found):
+    return [doc[0] for doc in found['results']]
+
+
+class NameTokensTest(unittest.TestCase):
+
+    def test_tokens(self):
+        self.assertEqual(name_tokens(KEYS[0]), ['aula', 'introducao'])
+        self.assertEqual(name_tokens('videos/x/Aula-aula_2.mp4'), ['aula', '2'])
+
+
+class SearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.search = build()
+
+    def test_only_videos_are_indexed(self):
+        self.assertEqual(len(self.search.ids), 4)
+
+    def test_last_token_is_a_prefix(self):
+        found = self.search.search('aul')
+        self.assertEqual(found['total'], 3)
+        self.assertEqual(self.search.complete('aul'), ['aula', 'aulas'])
+
+    def test_exact_match_ranks_first(self):
+        found = self.search.search('aula')
+        self.assertEqual(found['total'], 3)
+        self.assertEqual(result_keys(found)[-1], 'videos/cursos/aulas-extras-python.mp4')
+
+    def test_and_of_tokens(self):
+        self.assertEqual(result_keys(self.search.search('aula intro')), [KEYS[0]])
+        self.assertEqual(result_keys(self.search.search('Introdução')), [KEYS[0]])
+        self.assertEqual(self.search.search('praia aula')['total'], 0)
+        self.assertEqual(self.search.search('  ')['total'], 0)
+
+    def test_limit_and_suggestions(self):
+        found = self.search.search('aul', limit=1)
+        self.assertEqual(len(found['results']), 1)
+        self.assertEqual(found['total'], 3)
+        self.assertEqual(found['suggestions'][0], 'aula')
+
+    def test_remove_and_readd(self):
+        self.search.remove('videos/praia/ferias-praia.mp4')
+        self.assertEqual(self.search.search('praia')['total'], 0)
+        self.assertNotIn('ferias', self.search.postings)
+
+        self.search.add('videos/cursos/aula-avancada.mp4', 500, 1800000000)
+        self.assertEqual(self.search.search('avancada')['results'], [['videos/cursos/aula-avancada.mp4', 500, 1800000000]])
+
+
+class PersistenceTest(unittest.TestCase):
+
+    def setUp(self):
+        search_index._loaded.clear()
+        self.s3 = LocalS3()
+
+    def test_save_compacts_and_loads(self):
+        search = build()
+        search.remove('videos/cursos/aula-avancada.mp4')
+        search.save(self.s3, BUCKET)
+
+        loaded = load_search_index(self.s3, BUCKET)
+        self.assertEqual(len(loaded.docs), 3)
+        self.assertEqual(loaded.search('aula')['total'], 2)
+        self.assertEqual(loaded.etag, self.s3.objects[SEARCH_INDEX_KEY]['ETag'])
+
+    def test_missing_index(self):
+        self.assertIsNone(load_search_index(self.s3, BUCKET))
+        self.assertIsNone(get_search_index(self.s3, BUCKET))
+
+    def test_reused_while_etag_unchanged(self):
+        build().save(self.s3, BUCKET)
+        first = get_search_index(self.s3, BUCKET)
+
+        search_index._loaded[BUCKET]['checked'] = 0  # Force the ETag recheck
+        self.s3.calls.clear()
+        self.assertIs(get_search_index(self.s3, BUCKET), first)
+        self.assertEqual([call[0] for call in self.s3.calls], ['head_object'])
+
+        search = build()
+        search.add('videos/novo/praia-nova.mp4')
+        search.save(self.s3, BUCKET)
+        search_index._loaded[BUCKET]['checked'] = 0
+        self.assertEqual(get_search_index(self.s3, BUCKET).search('nova')['total'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+🧪 TESTE DO SWEEPER DE MULTIPART
+Orçamento de tempo checado antes de cada list_parts: uma página grande não
+estoura o timeout e as métricas EMF ainda são emitidas.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+
+def load_sweeper():
+    spec = importlib.util.spec_from_file_location('sweeper', os.path.join(BACKEND, 'upload-service', 'sweeper.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+sweeper = load_sweeper()
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+OLD = datetime.now(timezone.utc) - timedelta(days=7)
+
+
+class Clock:
+    """Contexto Lambda cujo tempo restante cai a cada chamada ao S3"""
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+class MultipartS3:
+    """Uma página de uploads; cada list_parts gasta `cost_ms` do relógio"""
+
+    def __init__(self, clock, uploads, cost_ms):
+        self.clock = clock
+        self.uploads = uploads
+        self.cost_ms = cost_ms
+        self.list_parts_calls = 0
+        self.aborted = []
+
+    def list_multipart_uploads(self, **kwargs):
+        return {
+            'Uploads': [{'Key': f"videos/{i}.mp4", 'UploadId': f"u{i}", 'Initiated': OLD} for i in range(self.uploads)],
+            'IsTruncated': False
+        }
+
+    def list_parts(self, **kwargs):
+        self.list_parts_calls += 1
+        self.clock.remaining_ms -= self.cost_ms
+        return {'Parts': [{'PartNumber': 1, 'ETag': '"e"', 'Size': 100}], 'IsTruncated': False}
+
+    def abort_multipart_upload(self, **kwargs):
+        self.aborted.append(kwargs['UploadId'])
+
+
+class SweeperBudgetTest(unittest.TestCase):
+
+    def run_sweeper(self, remaining_ms, uploads=10, cost_ms=5000):
+        clock = Clock(remaining_ms)
+        s3 = MultipartS3(clock, uploads, cost_ms)
+        output = io.StringIO()
+        with mock.patch.object(sweeper, 'SWEEP_CONCURRENCY', 1), \
+                mock.patch.object(sweeper.boto3, 'client', return_value=s3), \
+                contextlib.redirect_stdout(output):
+            response = sweeper.lambda_handler({'buckets': [BUCKET]}, clock)
+        summary = json.loads(response['body'])['buckets'][0]
+        metrics = [json.loads(line) for line in output.getvalue().splitlines() if line.startswith('{')]
+        return s3, summary, metrics
+
+    def test_stops_inside_a_page(self):
+        # 40 s left, 15 s reserve, 5 s per list_parts: 6 uploads fit
+        s3, summary, metrics = self.run_sweeper(40000)
+
+        self.assertEqual(s3.list_parts_calls, 6)
+        self.assertEqual(summary['uploads'], 6)
+        self.assertEqual(summary['aborted'], 6)
+        self.assertFalse(summary['complete'])
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(metrics[0]['InProgressUploads'], 6)
+
+    def test_complete_with_time_to_spare(self):
+        s3, summary, metrics = self.run_sweeper(600000)
+
+        self.assertEqual(s3.list_parts_calls, 10)
+        self.assertTrue(summary['complete'])
+        self.assertEqual(metrics[0]['AbortedUploads'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
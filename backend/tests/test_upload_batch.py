@@ -0,0 +1,116 @@
+"""
+🧪 TESTE DO UPLOAD EM LOTE
+Índice de ids só depois do upload criado e mesmos metadados no PUT simples
+e no multipart.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import importlib.util
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared.id_index import ID_INDEX_PREFIX
+from shared.upload_tuning import MIB
+
+from local_s3 import LocalS3, client_error
+
+SMALL = 1 * MIB
+LARGE = 64 * MIB
+
+
+class UploadS3(LocalS3):
+    """LocalS3 com multipart e URLs pré-assinadas registrando os parâmetros"""
+
+    def __init__(self, fail_multipart=False):
+        super().__init__()
+        self.fail_multipart = fail_multipart
+        self.multipart = []
+        self.presigned = []
+
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append(('create_multipart_upload', kwargs['Key']))
+        if self.fail_multipart:
+            raise client_error('AccessDenied', 'CreateMultipartUpload')
+        self.multipart.append(kwargs)
+        return {'UploadId': f"upload-{len(self.multipart)}"}
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn=3600):
+        self.presigned.append(Params)
+        return f"https://s3.local/{Params['Key']}"
+
+    def indexed_ids(self):
+        return sorted(key for key in self.objects if key.startswith(ID_INDEX_PREFIX))
+
+
+def load_module(name, *path):
+    with mock.patch('boto3.client'):
+        spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND, *path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+upload_handler = load_module('upload_handler', 'upload-service', 'handler.py')
+videos = load_module('videos', 'videos.py')
+
+MANIFEST = [
+    {'name': 'curto.mp4', 'size': SMALL, 'type': 'video/mp4', 'path': ''},
+    {'name': 'longo.mp4', 'size': LARGE, 'type': 'video/mp4', 'path': 'aulas'}
+]
+
+
+class UploadServiceBatchTest(unittest.TestCase):
+
+    def post_batch(self, s3):
+        event = {
+            'rawPath': '/upload/batch',
+            'requestContext': {'http': {'method': 'POST'}},
+            'body': json.dumps({'files': MANIFEST})
+        }
+        with mock.patch.object(upload_handler.boto3, 'client', return_value=s3):
+            response = upload_handler.lambda_handler(event, None)
+        self.assertEqual(response['statusCode'], 200)
+        return json.loads(response['body'])['uploads']
+
+    def test_ids_indexed_for_created_uploads(self):
+        s3 = UploadS3()
+        uploads = self.post_batch(s3)
+
+        self.assertTrue(all(upload['success'] for upload in uploads))
+        self.assertEqual(s3.indexed_ids(), sorted(
+            f"{ID_INDEX_PREFIX}{upload['video_id']}.json" for upload in uploads
+        ))
+
+    def test_failed_upload_leaves_no_id(self):
+        s3 = UploadS3(fail_multipart=True)
+        simple, multipart = self.post_batch(s3)
+
+        self.assertTrue(simple['success'])
+        self.assertFalse(multipart['success'])
+        self.assertEqual(s3.indexed_ids(), [f"{ID_INDEX_PREFIX}{simple['video_id']}.json"])
+
+
+class VideosBatchTest(unittest.TestCase):
+
+    def test_same_metadata_in_both_branches(self):
+        s3 = UploadS3()
+        with mock.patch.object(videos.boto3, 'client', return_value=s3):
+            response = videos.generate_batch_upload_urls({'files': MANIFEST}, None)
+        self.assertEqual(response['statusCode'], 200)
+
+        self.assertEqual(len(s3.presigned), 1)
+        self.assertEqual(len(s3.multipart), 1)
+        self.assertEqual(s3.presigned[0]['Metadata'], {'original-type': 'video/mp4', 'original-name': 'curto.mp4'})
+        self.assertEqual(s3.multipart[0]['Metadata'], {'original-type': 'video/mp4', 'original-name': 'longo.mp4'})
+        self.assertEqual(s3.multipart[0]['CacheControl'], s3.presigned[0]['CacheControl'])
+
+
+if __name__ == '__main__':
+    unittest.main()
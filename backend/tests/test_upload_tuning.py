@@ -0,0 +1,120 @@
+"""
+🧪 TESTE DO AJUSTE DE UPLOAD
+Tamanho de parte e concorrência a partir do tamanho do arquivo, dos limites
+do S3 e do throughput observado (média móvel exponencial).
+
+    cd backend && python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, 'shared-layer', 'python', 'lib', 'python3.12', 'site-packages'))
+
+from shared import upload_tuning
+from shared.exceptions import ValidationError
+from shared.multipart import MAX_PARTS, MIN_PART_SIZE
+from shared.upload_tuning import (
+    DEFAULT_CONCURRENCY, EWMA_ALPHA, MAX_OBJECT_SIZE, MIB, TUNING_KEY,
+    get_profile, load_tuning, parse_upload_stats, plan_upload, recommend_concurrency, record_upload_stats
+)
+
+from local_s3 import LocalS3
+
+BUCKET = 'video-streaming-v2-bdc2040d'
+GIB = 1024 * MIB
+
+
+class PlanUploadTest(unittest.TestCase):
+
+    def test_small_file_is_a_single_put(self):
+        plan = plan_upload(10 * MIB)
+        self.assertEqual(plan, {'multipart': False, 'part_size': 10 * MIB, 'total_parts': 1, 'concurrency': 1})
+
+    def test_default_part_size(self):
+        plan = plan_upload(100 * MIB)
+        self.assertTrue(plan['multipart'])
+        self.assertEqual(plan['part_size'], 16 * MIB)
+        self.assertEqual(plan['total_parts'], 7)
+        self.assertEqual(plan['concurrency'], DEFAULT_CONCURRENCY)
+
+    def test_mid_size_file_spreads_over_connections(self):
+        plan = plan_upload(20 * MIB)
+        self.assertEqual(plan['part_size'], MIN_PART_SIZE)
+        self.assertEqual(plan['total_parts'], 4)
+
+    def test_part_limit_sets_the_floor(self):
+        plan = plan_upload(2 * 1024 * GIB)
+        self.assertLessEqual(plan['total_parts'], MAX_PARTS)
+        self.assertEqual(plan['part_size'] % MIB, 0)
+
+    def test_throughput_sizes_parts(self):
+        # 8 MiB/s per connection: parts of ~10 s
+        plan = plan_upload(GIB, {'partThroughput': 8 * MIB})
+        self.assertEqual(plan['part_size'], 80 * MIB)
+        self.assertEqual(plan['total_parts'], 13)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValidationError):
+            plan_upload(-1)
+        with self.assertRaises(ValidationError):
+            plan_upload(MAX_OBJECT_SIZE + 1)
+
+
+class ConcurrencyTest(unittest.TestCase):
+
+    def test_default_without_samples(self):
+        self.assertEqual(recommend_concurrency({}), DEFAULT_CONCURRENCY)
+
+    def test_probes_the_next_level_while_the_highest_is_best(self):
+        self.assertEqual(recommend_concurrency({'levels': {'4': {'throughput': 10}}}), 6)
+        self.assertEqual(recommend_concurrency({'levels': {'16': {'throughput': 10}}}), 16)
+
+    def test_settles_on_the_best_level(self):
+        levels = {'4': {'throughput': 10}, '6': {'throughput': 8}}
+        self.assertEqual(recommend_concurrency({'levels': levels}), 4)
+
+
+class ParseStatsTest(unittest.TestCase):
+
+    def test_valid(self):
+        self.assertIsNone(parse_upload_stats(None))
+        self.assertEqual(parse_upload_stats('{"bytes": 100, "seconds": 2}'),
+                         {'bytes': 100.0, 'seconds': 2.0, 'concurrency': 1})
+
+    def test_invalid(self):
+        for value in ({'bytes': 100}, {'bytes': 0, 'seconds': 1}, {'bytes': 1, 'seconds': 1, 'concurrency': -1}, 'x'):
+            with self.assertRaises(ValidationError):
+                parse_upload_stats(value)
+
+
+class RecordStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        upload_tuning._tuning_cache.cache.clear()
+        self.s3 = LocalS3()
+
+    def test_ewma(self):
+        record_upload_stats(self.s3, BUCKET, {'bytes': 40 * MIB, 'seconds': 4, 'concurrency': 4})
+        record_upload_stats(self.s3, BUCKET, {'bytes': 80 * MIB, 'seconds': 4, 'concurrency': 4})
+
+        stats = get_profile(load_tuning(self.s3, BUCKET))
+        level = stats['levels']['4']
+        self.assertEqual(level['samples'], 2)
+        self.assertAlmostEqual(level['throughput'], EWMA_ALPHA * 20 * MIB + (1 - EWMA_ALPHA) * 10 * MIB)
+        self.assertAlmostEqual(stats['partThroughput'], level['throughput'] / 4)
+        self.assertIn(TUNING_KEY, self.s3.objects)
+
+    def test_profiles_fall_back_to_default(self):
+        record_upload_stats(self.s3, BUCKET, {'bytes': 10 * MIB, 'seconds': 1, 'concurrency': 2}, 'mobile')
+        tuning = load_tuning(self.s3, BUCKET)
+
+        self.assertEqual(get_profile(tuning, 'mobile')['levels']['2']['samples'], 1)
+        self.assertEqual(get_profile(tuning)['levels']['2']['samples'], 1)
+        self.assertIs(get_profile(tuning, 'desktop'), get_profile(tuning))
+
+
+if __name__ == '__main__':
+    unittest.main()
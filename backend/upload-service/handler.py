@@ -3,11 +3,27 @@ import sys
 import os
 import boto3
 import uuid
+from botocore.exceptions import ClientError
 from datetime import datetime
 
 # Add shared layer to path
 sys.path.append('/opt/python/lib/python3.12/site-packages')
 
+from shared.change_journal import append_changes
+from shared.exceptions import StorageError, ValidationError
+from shared.hash_index import check_content_hash, checksum_sha256, parse_content_hash, put_content_hash
+from shared.id_index import extract_video_id, put_video_id
+from shared.metadata import metadata_key_for, timings_key_for
+from shared.multipart import (
+    MAX_PART_URLS, PART_URL_EXPIRES, UploadNotFoundError, expected_part_count, list_uploaded_parts,
+    missing_part_numbers, parse_part_numbers, presign_part_urls
+)
+from shared.upload_batch import initiate_batch, parse_manifest
+from shared.upload_telemetry import (
+    parse_part_timings, record_upload_telemetry, stats_from_summary, summarize_timings, telemetry_report
+)
+from shared.upload_tuning import get_profile, load_tuning, parse_upload_stats, plan_upload, record_upload_stats
+
 def lambda_handler(event, context):
     """Upload Service Lambda handler"""
     
@@ -55,63 +71,112 @@ def lambda_handler(event, context):
                 file_name = body.get('file_name', 'video.mp4')
                 file_size = int(body.get('file_size', 0))
                 content_type = body.get('content_type', 'video/mp4')
+                content_hash = parse_content_hash(
+                    body.get('content_hash') or body.get('contentHash'),
+                    body.get('hash_mode')
+                )
+                
+                # Same content already stored: skip the transfer and the conversion
+                hash_check = None
+                if content_hash:
+                    hash_check = check_content_hash(s3_client, bucket_name, content_hash, file_size)
+                    existing = hash_check['existing']
+                    if existing:
+                        return {
+                            'statusCode': 200,
+                            'headers': headers,
+                            'body': json.dumps({
+                                'success': True,
+                                'upload_type': 'existing',
+                                'video_id': extract_video_id(existing['Key']),
+                                'file_key': existing['Key'],
+                                'size': existing['Size'],
+                                'url': f"https://d2we88koy23cl4.cloudfront.net/{existing['Key']}",
+                                'message': 'Identical file already uploaded'
+                            })
+                        }
                 
                 # Generate unique file key
-                file_key = f"videos/{datetime.now().strftime('%Y/%m/%d')}/{uuid.uuid4()}-{file_name}"
+                video_id = str(uuid.uuid4())
+                file_key = f"videos/{datetime.now().strftime('%Y/%m/%d')}/{video_id}-{file_name}"
+                
+                # Part size and concurrency from the file size, S3 limits and observed throughput
+                plan = plan_upload(file_size, get_profile(load_tuning(s3_client, bucket_name)))
+                metadata = {
+                    'original_name': file_name,
+                    'upload_date': datetime.now().isoformat(),
+                    'file_size': str(file_size)
+                }
                 
-                # Check if multipart upload is needed (>50MB)
-                if file_size > 50 * 1024 * 1024:  # 50MB
+                if plan['multipart']:
                     # Initiate multipart upload
                     response = s3_client.create_multipart_upload(
                         Bucket=bucket_name,
                         Key=file_key,
                         ContentType=content_type,
-                        Metadata={
-                            'original_name': file_name,
-                            'upload_date': datetime.now().isoformat(),
-                            'file_size': str(file_size)
-                        }
+                        Metadata=metadata
                     )
-                    
-                    return {
-                        'statusCode': 200,
-                        'headers': headers,
-                        'body': json.dumps({
-                            'success': True,
-                            'upload_type': 'multipart',
-                            'upload_id': response['UploadId'],
-                            'file_key': file_key,
-                            'chunk_size': 20 * 1024 * 1024,  # 20MB chunks
-                            'total_parts': (file_size + 20 * 1024 * 1024 - 1) // (20 * 1024 * 1024)
-                        })
+                    result = {
+                        'success': True,
+                        'upload_type': 'multipart',
+                        'upload_id': response['UploadId'],
+                        'video_id': video_id,
+                        'file_key': file_key,
+                        'chunk_size': plan['part_size'],
+                        'total_parts': plan['total_parts'],
+                        'concurrency': plan['concurrency']
                     }
                 else:
+                    params = {
+                        'Bucket': bucket_name,
+                        'Key': file_key,
+                        'ContentType': content_type,
+                        'Metadata': metadata
+                    }
+                    # Full-file hash: S3 rejects a body that does not match it
+                    checksum = checksum_sha256(content_hash)
+                    if checksum:
+                        params['ChecksumSHA256'] = checksum
+                    
                     # Generate presigned URL for simple upload
                     presigned_url = s3_client.generate_presigned_url(
                         'put_object',
-                        Params={
-                            'Bucket': bucket_name,
-                            'Key': file_key,
-                            'ContentType': content_type,
-                            'Metadata': {
-                                'original_name': file_name,
-                                'upload_date': datetime.now().isoformat(),
-                                'file_size': str(file_size)
-                            }
-                        },
+                        Params=params,
                         ExpiresIn=3600  # 1 hour
                     )
-                    
-                    return {
-                        'statusCode': 200,
-                        'headers': headers,
-                        'body': json.dumps({
-                            'success': True,
-                            'upload_type': 'simple',
-                            'presigned_url': presigned_url,
-                            'file_key': file_key
-                        })
+                    result = {
+                        'success': True,
+                        'upload_type': 'simple',
+                        'presigned_url': presigned_url,
+                        'video_id': video_id,
+                        'file_key': file_key
+                    }
+                    if checksum:
+                        result['upload_headers'] = {'x-amz-checksum-sha256': checksum}
+                
+                # Id and hash claims only once the upload exists, so a failed initiate leaves none behind
+                try:
+                    # Id -> key index so lookups by id are a single GET
+                    put_video_id(s3_client, bucket_name, video_id, file_key)
+                    if hash_check and hash_check['claimable']:
+                        put_content_hash(s3_client, bucket_name, content_hash, file_key, file_size)
+                except Exception:
+                    if plan['multipart']:
+                        s3_client.abort_multipart_upload(Bucket=bucket_name, Key=file_key, UploadId=result['upload_id'])
+                    raise
+                
+                # Same size and unverified hash: the client decides whether to go on
+                if hash_check and hash_check['advisory']:
+                    result['possible_duplicate'] = {
+                        'video_id': extract_video_id(hash_check['advisory']['Key']),
+                        'file_key': hash_check['advisory']['Key']
                     }
+                
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps(result)
+                }
                     
             except Exception as e:
                 return {
@@ -173,6 +238,204 @@ def lambda_handler(event, context):
                     })
                 }
         
+        # Presigned URLs for a range (or list) of parts in one request
+        if path == '/upload/chunk-urls' and method == 'POST':
+            try:
+                body = json.loads(event.get('body', '{}'))
+                file_key = body.get('file_key')
+                upload_id = body.get('upload_id')
+                part_numbers = parse_part_numbers(
+                    body.get('start_part'),
+                    body.get('end_part'),
+                    body.get('part_numbers')
+                )
+                
+                if not all([file_key, upload_id]):
+                    return {
+                        'statusCode': 400,
+                        'headers': headers,
+                        'body': json.dumps({
+                            'success': False,
+                            'message': 'Missing required parameters'
+                        })
+                    }
+                
+                urls = presign_part_urls(s3_client, bucket_name, file_key, upload_id, part_numbers)
+                
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': True,
+                        'urls': urls,
+                        'count': len(urls),
+                        'expires_in': PART_URL_EXPIRES
+                    })
+                }
+            
+            except Exception as e:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to generate chunk URLs: {str(e)}'
+                    })
+                }
+        
+        # Resume an interrupted multipart upload: only the missing parts are sent again
+        if path == '/upload/resume' and method == 'POST':
+            try:
+                body = json.loads(event.get('body', '{}'))
+                file_key = body.get('file_key')
+                upload_id = body.get('upload_id')
+                
+                if not all([file_key, upload_id]):
+                    return {
+                        'statusCode': 400,
+                        'headers': headers,
+                        'body': json.dumps({
+                            'success': False,
+                            'message': 'Missing required parameters'
+                        })
+                    }
+                
+                total_parts = expected_part_count(
+                    body.get('total_parts'),
+                    body.get('file_size'),
+                    body.get('chunk_size')
+                )
+                parts = list_uploaded_parts(s3_client, bucket_name, file_key, upload_id)
+                missing = missing_part_numbers(parts, total_parts)
+                
+                # URLs for the first batch; the rest via /upload/chunk-urls
+                urls = presign_part_urls(s3_client, bucket_name, file_key, upload_id, missing[:MAX_PART_URLS])
+                
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': True,
+                        'file_key': file_key,
+                        'upload_id': upload_id,
+                        'total_parts': total_parts,
+                        'completed_parts': [{'PartNumber': p['PartNumber'], 'ETag': p['ETag']} for p in parts],
+                        'uploaded_bytes': sum(p['Size'] for p in parts),
+                        'missing_parts': missing,
+                        'urls': urls,
+                        'expires_in': PART_URL_EXPIRES
+                    })
+                }
+            
+            except UploadNotFoundError as e:
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'{str(e)}; start a new upload'
+                    })
+                }
+            except Exception as e:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to resume upload: {str(e)}'
+                    })
+                }
+        
+        # Initiate every file of a folder upload in one call (paged by offset)
+        if path == '/upload/batch' and method == 'POST':
+            try:
+                body = json.loads(event.get('body', '{}'))
+                manifest = parse_manifest(body.get('files'))
+                offset = int(body.get('offset', 0))
+                
+                # Shared by every file of the page
+                tuning = get_profile(load_tuning(s3_client, bucket_name))
+                date_prefix = datetime.now().strftime('%Y/%m/%d')
+                
+                def initiate_file(entry):
+                    video_id = str(uuid.uuid4())
+                    folder = f"{date_prefix}/{entry['path']}" if entry['path'] else date_prefix
+                    file_key = f"videos/{folder}/{video_id}-{entry['name']}"
+                    content_type = entry['type'] or 'video/mp4'
+                    metadata = {
+                        'original_name': entry['name'],
+                        'upload_date': datetime.now().isoformat(),
+                        'file_size': str(entry['size'])
+                    }
+                    
+                    plan = plan_upload(entry['size'], tuning)
+                    
+                    if plan['multipart']:
+                        response = s3_client.create_multipart_upload(
+                            Bucket=bucket_name,
+                            Key=file_key,
+                            ContentType=content_type,
+                            Metadata=metadata
+                        )
+                        # Index the id only once the upload exists
+                        put_video_id(s3_client, bucket_name, video_id, file_key)
+                        return {
+                            'file_name': entry['name'],
+                            'path': entry['path'],
+                            'upload_type': 'multipart',
+                            'upload_id': response['UploadId'],
+                            'video_id': video_id,
+                            'file_key': file_key,
+                            'chunk_size': plan['part_size'],
+                            'total_parts': plan['total_parts'],
+                            'concurrency': plan['concurrency']
+                        }
+                    
+                    presigned_url = s3_client.generate_presigned_url(
+                        'put_object',
+                        Params={
+                            'Bucket': bucket_name,
+                            'Key': file_key,
+                            'ContentType': content_type,
+                            'Metadata': metadata
+                        },
+                        ExpiresIn=3600  # 1 hour
+                    )
+                    put_video_id(s3_client, bucket_name, video_id, file_key)
+                    return {
+                        'file_name': entry['name'],
+                        'path': entry['path'],
+                        'upload_type': 'simple',
+                        'presigned_url': presigned_url,
+                        'video_id': video_id,
+                        'file_key': file_key
+                    }
+                
+                result = initiate_batch(manifest, offset, initiate_file)
+                
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': True,
+                        'uploads': result['uploads'],
+                        'count': len(result['uploads']),
+                        'total': result['total'],
+                        'offset': offset,
+                        'next_offset': result['next_offset']
+                    })
+                }
+                
+            except Exception as e:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to initiate batch: {str(e)}'
+                    })
+                }
+        
         # Complete multipart upload
         if path == '/upload/complete' and method == 'POST':
             try:
@@ -208,7 +471,24 @@ def lambda_handler(event, context):
                     'etag': response['ETag']
                 }
                 
-                metadata_key = f"metadata/{file_key.replace('videos/', '').replace('/', '_')}.json"
+                # Optional per-part timings: the summary goes into the metadata (returned by
+                # /videos/list), the raw array into its own object next to it
+                telemetry = None
+                try:
+                    part_timings = parse_part_timings(body.get('part_timings'))
+                    if part_timings:
+                        telemetry = summarize_timings(part_timings)
+                        metadata['telemetry'] = telemetry
+                        s3_client.put_object(
+                            Bucket=bucket_name,
+                            Key=timings_key_for(file_key),
+                            Body=json.dumps(part_timings, separators=(',', ':')),
+                            ContentType='application/json'
+                        )
+                except (ValidationError, ClientError) as e:
+                    print(f"Part timings error: {str(e)}")
+                
+                metadata_key = metadata_key_for(file_key)
                 s3_client.put_object(
                     Bucket=bucket_name,
                     Key=metadata_key,
@@ -216,6 +496,31 @@ def lambda_handler(event, context):
                     ContentType='application/json'
                 )
                 
+                # Observed throughput tunes the next uploads' part size and concurrency
+                try:
+                    upload_stats = parse_upload_stats(body.get('upload_stats')) or stats_from_summary(telemetry)
+                    if upload_stats:
+                        record_upload_stats(s3_client, bucket_name, upload_stats)
+                except (StorageError, ValidationError) as e:
+                    print(f"Upload stats error: {str(e)}")
+                
+                # Throughput percentiles by file size for GET /upload/telemetry
+                if telemetry:
+                    try:
+                        record_upload_telemetry(s3_client, bucket_name, telemetry)
+                    except StorageError as e:
+                        print(f"Upload telemetry error: {str(e)}")
+                
+                # Delta feed for polling clients; the upload already completed either way
+                try:
+                    append_changes(s3_client, bucket_name, [{
+                        'type': 'add',
+                        'key': file_key,
+                        'id': extract_video_id(file_key)
+                    }])
+                except StorageError as e:
+                    print(f"Change journal error: {str(e)}")
+                
                 return {
                     'statusCode': 200,
                     'headers': headers,
@@ -280,6 +585,28 @@ def lambda_handler(event, context):
                     })
                 }
         
+        # Upload throughput percentiles by file size bucket
+        if path == '/upload/telemetry' and method == 'GET':
+            try:
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': True,
+                        **telemetry_report(s3_client, bucket_name)
+                    })
+                }
+                
+            except StorageError as e:
+                return {
+                    'statusCode': 500,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to load upload telemetry: {str(e)}'
+                    })
+                }
+        
         # List uploads (for debugging)
         if path == '/upload/list' and method == 'GET':
             try:
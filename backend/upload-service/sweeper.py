@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import time
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.exceptions import StorageError
+from shared.multipart import UploadNotFoundError, iter_multipart_uploads, list_uploaded_parts
+
+# Buckets where upload-service, videos.py and VideoService start multipart uploads
+DEFAULT_BUCKETS = 'video-streaming-v2-bdc2040d,video-streaming-sstech-eaddf6a1'
+
+MAX_UPLOAD_AGE_HOURS = float(os.environ.get('MAX_UPLOAD_AGE_HOURS', '48'))
+SWEEP_CONCURRENCY = int(os.environ.get('SWEEP_CONCURRENCY', '8'))
+SWEEP_DRY_RUN = os.environ.get('SWEEP_DRY_RUN', 'false').lower() == 'true'
+METRIC_NAMESPACE = os.environ.get('METRIC_NAMESPACE', 'VideoStreaming/Uploads')
+
+# Stop starting new pages and part listings when the invocation is about to
+# time out, so the summary and EMF metrics are still written
+TIME_RESERVE_MS = 15000
+MAX_REPORTED_UPLOADS = 100
+
+
+def lambda_handler(event, context):
+    """Multipart upload sweeper
+
+    Run from an EventBridge schedule (e.g. rate(6 hours)). Pages through the
+    in-progress multipart uploads of each bucket, adds up the bytes their
+    parts hold and aborts the ones older than MAX_UPLOAD_AGE_HOURS. Uploads
+    younger than that stay resumable through /upload/resume.
+    The event may override {"buckets": [...], "max_age_hours": N, "dry_run": true}.
+    """
+
+    s3_client = boto3.client('s3')
+    event = event or {}
+
+    buckets = event.get('buckets') or os.environ.get('SWEEP_BUCKETS', DEFAULT_BUCKETS).split(',')
+    max_age_hours = float(event.get('max_age_hours', MAX_UPLOAD_AGE_HOURS))
+    dry_run = bool(event.get('dry_run', SWEEP_DRY_RUN))
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+
+    summaries = []
+    try:
+        for bucket_name in buckets:
+            summary = sweep_bucket(s3_client, bucket_name.strip(), cutoff, dry_run, context)
+            emit_metrics(summary)
+            summaries.append(summary)
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'success': True,
+                'maxAgeHours': max_age_hours,
+                'dryRun': dry_run,
+                'buckets': summaries
+            }, default=str)
+        }
+
+    except Exception as e:
+        print(f"Sweeper error: {str(e)}")
+        raise
+
+
+def sweep_bucket(s3_client, bucket_name, cutoff, dry_run, context=None):
+    """Account and abort stale uploads of one bucket, SWEEP_CONCURRENCY uploads at a time"""
+    summary = {
+        'bucket': bucket_name,
+        'uploads': 0,
+        'bytes': 0,
+        'stale': 0,
+        'aborted': 0,
+        'abortedBytes': 0,
+        'errors': 0,
+        'complete': True,
+        'staleUploads': []
+    }
+
+    def out_of_time():
+        return bool(context) and context.get_remaining_time_in_millis() < TIME_RESERVE_MS
+
+    def inspect(upload):
+        # A page holds up to 1000 uploads: check before each list_parts, not only per page
+        if out_of_time():
+            return {'skipped': True}
+        try:
+            parts = list_uploaded_parts(s3_client, bucket_name, upload['Key'], upload['UploadId'])
+        except UploadNotFoundError:
+            # Completed or aborted since the listing
+            return None
+        size = sum(part['Size'] for part in parts)
+
+        stale = upload['Initiated'] < cutoff
+        aborted = False
+        if stale and not dry_run:
+            s3_client.abort_multipart_upload(
+                Bucket=bucket_name,
+                Key=upload['Key'],
+                UploadId=upload['UploadId']
+            )
+            aborted = True
+        return {**upload, 'parts': len(parts), 'bytes': size, 'stale': stale, 'aborted': aborted}
+
+    def safe_inspect(upload):
+        try:
+            return inspect(upload)
+        except Exception as e:
+            print(f"Sweeper error on {bucket_name}/{upload['Key']}: {str(e)}")
+            return {'error': True}
+
+    with ThreadPoolExecutor(max_workers=max(1, SWEEP_CONCURRENCY)) as executor:
+        try:
+            for page in iter_multipart_uploads(s3_client, bucket_name):
+                if out_of_time():
+                    summary['complete'] = False
+                    break
+
+                for result in executor.map(safe_inspect, page):
+                    if result is None:
+                        continue
+                    if result.get('skipped'):
+                        summary['complete'] = False
+                        continue
+                    if result.get('error'):
+                        summary['errors'] += 1
+                        continue
+
+                    summary['uploads'] += 1
+                    summary['bytes'] += result['bytes']
+                    if result['stale']:
+                        summary['stale'] += 1
+                        if len(summary['staleUploads']) < MAX_REPORTED_UPLOADS:
+                            summary['staleUploads'].append({
+                                'key': result['Key'],
+                                'uploadId': result['UploadId'],
+                                'initiated': result['Initiated'].isoformat(),
+                                'parts': result['parts'],
+                                'bytes': result['bytes']
+                            })
+                    if result['aborted']:
+                        summary['aborted'] += 1
+                        summary['abortedBytes'] += result['bytes']
+        except StorageError as e:
+            print(f"Sweeper error on {bucket_name}: {str(e)}")
+            summary['errors'] += 1
+            summary['complete'] = False
+
+    print(f"Multipart sweep {bucket_name}: {summary['uploads']} in progress, "
+          f"{summary['bytes']} bytes, {summary['aborted']} aborted ({summary['abortedBytes']} bytes)")
+    return summary
+
+
+def emit_metrics(summary):
+    """CloudWatch Embedded Metric Format: the log line becomes the metric, no PutMetricData call"""
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRIC_NAMESPACE,
+                'Dimensions': [['Bucket']],
+                'Metrics': [
+                    {'Name': 'InProgressUploads', 'Unit': 'Count'},
+                    {'Name': 'InProgressBytes', 'Unit': 'Bytes'},
+                    {'Name': 'AbortedUploads', 'Unit': 'Count'},
+                    {'Name': 'AbortedBytes', 'Unit': 'Bytes'},
+                    {'Name': 'SweepErrors', 'Unit': 'Count'}
+                ]
+            }]
+        },
+        'Bucket': summary['bucket'],
+        'InProgressUploads': summary['uploads'],
+        'InProgressBytes': summary['bytes'],
+        'AbortedUploads': summary['aborted'],
+        'AbortedBytes': summary['abortedBytes'],
+        'SweepErrors': summary['errors']
+    }))
@@ -1,22 +1,91 @@
 import json
 import sys
 import os
+import time
 import boto3
-from datetime import datetime
+from botocore.exceptions import ClientError
+from datetime import datetime, timezone
 from urllib.parse import unquote
 
 # Add shared layer to path
 sys.path.append('/opt/python/lib/python3.12/site-packages')
 
+from shared.catalog_index import load_catalog_index
+from shared.change_journal import append_changes, parse_change_limit, read_changes
+from shared.compression import compress_response
+from shared.exceptions import StorageError, ValidationError
+from shared.folder_tree import load_folder_tree
+from shared.http_cache import apply_etag, get_request_header
+from shared.id_index import delete_video_id, get_video_key, video_id_for_key
+from shared.metadata import METADATA_CLIENT_CONFIG, fetch_metadata_batch, metadata_key_for, timings_key_for
+from shared.pagination import list_objects_page
+from shared.projection import parse_fields, parse_shape, project, to_columns
+from shared.search_index import get_search_index
+from shared.streaming import NDJSON_CONTENT_TYPE, build_ndjson_body, iter_objects
+
+# Dedicated client for metadata fan-out (short per-call deadlines)
+metadata_s3_client = boto3.client('s3', config=METADATA_CLIENT_CONFIG)
+
+# /videos/<name> routes that are not video ids
+RESERVED_VIDEO_PATHS = {'list', 'folders', 'search', 'changes'}
+
+CLOUDFRONT_URL = 'https://d2we88koy23cl4.cloudfront.net'
+
+# Fields accepted by /videos/list?fields= (column order for shape=columnar)
+VIDEO_FIELDS = ('id', 'key', 'name', 'size', 'last_modified', 'url', 'metadata')
+
+def to_video_record(obj, metadata=None):
+    """Listing entry for one S3 object"""
+    record = {
+        'id': video_id_for_key(obj['Key']),
+        'key': obj['Key'],
+        'name': obj['Key'].split('/')[-1],
+        'size': obj['Size'],
+        'last_modified': obj['LastModified'].isoformat(),
+        # Generate CloudFront URL (assuming CloudFront is configured)
+        'url': f"{CLOUDFRONT_URL}/{obj['Key']}"
+    }
+    if metadata is not None:
+        record['metadata'] = metadata
+    return record
+
+def find_video(s3_client, bucket_name, video_id):
+    """Resolve a video id through the id index (one GET) plus a HEAD for its details"""
+    video_key = get_video_key(s3_client, bucket_name, video_id)
+    if not video_key:
+        return None
+    
+    try:
+        head = s3_client.head_object(Bucket=bucket_name, Key=video_key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+            return None  # Stale index entry
+        raise  # AccessDenied, throttling: not a missing video
+    
+    return {
+        'Key': video_key,
+        'Size': head['ContentLength'],
+        'LastModified': head['LastModified']
+    }
+
 def lambda_handler(event, context):
-    """Video Service Lambda handler"""
+    """Video Service Lambda handler
+
+    Bodies (JSON and NDJSON) are compressed when the client's Accept-Encoding allows.
+    """
+    response = handle_request(event, context)
+    return compress_response(response, get_request_header(event.get('headers'), 'Accept-Encoding'))
+
+def handle_request(event, context):
+    """Route one request"""
     
     # CORS headers
     headers = {
         'Content-Type': 'application/json',
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-        'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,If-None-Match',
+        'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+        'Access-Control-Expose-Headers': 'X-Next-Cursor,X-Video-Count,ETag'
     }
     
     try:
@@ -51,57 +120,91 @@ def lambda_handler(event, context):
         # List videos endpoint
         if path == '/videos/list' and method == 'GET':
             try:
+                started = time.perf_counter()
+                
                 # Get query parameters
                 query_params = event.get('queryStringParameters', {}) or {}
+                request_headers = event.get('headers') or {}
                 folder = query_params.get('folder', '')
                 limit = int(query_params.get('limit', 50))
+                cursor = query_params.get('cursor')
+                fields = parse_fields(query_params.get('fields'), VIDEO_FIELDS)
+                shape = parse_shape(query_params.get('shape'))
                 
                 # List objects in videos folder
                 prefix = f"videos/{folder}" if folder else "videos/"
                 
-                response = s3_client.list_objects_v2(
-                    Bucket=bucket_name,
-                    Prefix=prefix,
-                    MaxKeys=limit
-                )
+                # Catalog index: a HEAD per request, reloaded only when it changed; scan S3 until it is built
+                index = load_catalog_index(s3_client, bucket_name)
                 
-                videos = []
-                for obj in response.get('Contents', []):
-                    if obj['Key'].endswith('/'):  # Skip folder markers
-                        continue
-                    
-                    # Generate CloudFront URL (assuming CloudFront is configured)
-                    video_url = f"https://d2we88koy23cl4.cloudfront.net/{obj['Key']}"
-                    
-                    # Try to get metadata
-                    metadata_key = f"metadata/{obj['Key'].replace('videos/', '').replace('/', '_')}.json"
-                    metadata = {}
-                    try:
-                        metadata_obj = s3_client.get_object(Bucket=bucket_name, Key=metadata_key)
-                        metadata = json.loads(metadata_obj['Body'].read().decode('utf-8'))
-                    except:
-                        pass  # Metadata not found, use defaults
-                    
-                    videos.append({
-                        'id': obj['Key'].split('/')[-1].split('.')[0],
-                        'key': obj['Key'],
-                        'name': obj['Key'].split('/')[-1],
-                        'size': obj['Size'],
-                        'last_modified': obj['LastModified'].isoformat(),
-                        'url': video_url,
-                        'metadata': metadata
-                    })
+                # NDJSON mode: one line per video, produced while pages are walked
+                if query_params.get('format') == 'ndjson':
+                    body, next_cursor, count = build_ndjson_body(
+                        iter_objects(s3_client, bucket_name, prefix, cursor=cursor, index=index),
+                        to_video_record
+                    )
+                    ndjson_headers = {**headers, 'Content-Type': NDJSON_CONTENT_TYPE, 'X-Video-Count': str(count)}
+                    if next_cursor:
+                        ndjson_headers['X-Next-Cursor'] = next_cursor
+                    return {
+                        'statusCode': 200,
+                        'headers': ndjson_headers,
+                        'body': body
+                    }
                 
-                return {
+                if index:
+                    page = index.list_page(prefix, page_size=limit, cursor=cursor)
+                else:
+                    page = list_objects_page(s3_client, bucket_name, prefix, page_size=limit, cursor=cursor)
+                
+                objects = [obj for obj in page['contents'] if not obj['Key'].endswith('/')]  # Skip folder markers
+                listed = time.perf_counter()
+                
+                # Fetch all metadata in one bounded fan-out (misses are negatively cached);
+                # skipped entirely when the projection leaves metadata out
+                if fields is None or 'metadata' in fields:
+                    metadata_by_key = fetch_metadata_batch(
+                        metadata_s3_client,
+                        bucket_name,
+                        [obj['Key'] for obj in objects]
+                    )
+                else:
+                    metadata_by_key = {}
+                fetched = time.perf_counter()
+                
+                videos = [to_video_record(obj, metadata_by_key.get(obj['Key'], {})) for obj in objects]
+                
+                timings = {
+                    'list_ms': round((listed - started) * 1000, 1),
+                    'metadata_ms': round((fetched - listed) * 1000, 1),
+                    'total_ms': round((time.perf_counter() - started) * 1000, 1)
+                }
+                print(f"/videos/list timings: {json.dumps(timings)} ({len(videos)} videos)")
+                
+                # ETag covers the listing, not the per-request timings
+                if shape == 'columnar':
+                    payload = {
+                        **to_columns(videos, fields or VIDEO_FIELDS, CLOUDFRONT_URL),
+                        'folder': folder,
+                        'next_cursor': page['next_cursor']
+                    }
+                    return apply_etag({
+                        'statusCode': 200,
+                        'headers': headers,
+                        'body': json.dumps({'success': True, **payload}, separators=(',', ':'))
+                    }, request_headers, payload)
+                
+                payload = {
+                    'videos': project(videos, fields),
+                    'count': len(videos),
+                    'folder': folder,
+                    'next_cursor': page['next_cursor']
+                }
+                return apply_etag({
                     'statusCode': 200,
                     'headers': headers,
-                    'body': json.dumps({
-                        'success': True,
-                        'videos': videos,
-                        'count': len(videos),
-                        'folder': folder
-                    })
-                }
+                    'body': json.dumps({'success': True, **payload, 'timings': timings})
+                }, request_headers, payload)
                 
             except Exception as e:
                 return {
@@ -114,21 +217,12 @@ def lambda_handler(event, context):
                 }
         
         # Get video details endpoint
-        if path.startswith('/videos/') and method == 'GET' and len(path.split('/')) == 3:
+        if path.startswith('/videos/') and method == 'GET' and len(path.split('/')) == 3 and path.split('/')[-1] not in RESERVED_VIDEO_PATHS:
             try:
                 video_id = path.split('/')[-1]
                 
-                # Find video by ID (search in videos folder)
-                response = s3_client.list_objects_v2(
-                    Bucket=bucket_name,
-                    Prefix="videos/"
-                )
-                
-                video_obj = None
-                for obj in response.get('Contents', []):
-                    if video_id in obj['Key']:
-                        video_obj = obj
-                        break
+                # Find video by ID (id index, no bucket scan)
+                video_obj = find_video(s3_client, bucket_name, video_id)
                 
                 if not video_obj:
                     return {
@@ -144,7 +238,7 @@ def lambda_handler(event, context):
                 video_url = f"https://d2we88koy23cl4.cloudfront.net/{video_obj['Key']}"
                 
                 # Get metadata
-                metadata_key = f"metadata/{video_obj['Key'].replace('videos/', '').replace('/', '_')}.json"
+                metadata_key = metadata_key_for(video_obj['Key'])
                 metadata = {}
                 try:
                     metadata_obj = s3_client.get_object(Bucket=bucket_name, Key=metadata_key)
@@ -169,6 +263,16 @@ def lambda_handler(event, context):
                     })
                 }
                 
+            except ClientError as e:
+                # Storage failure while resolving the id: not a missing video
+                return {
+                    'statusCode': 500,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to get video: storage error ({e.response.get("Error", {}).get("Code")})'
+                    })
+                }
             except Exception as e:
                 return {
                     'statusCode': 400,
@@ -184,17 +288,8 @@ def lambda_handler(event, context):
             try:
                 video_id = path.split('/')[-1]
                 
-                # Find video by ID
-                response = s3_client.list_objects_v2(
-                    Bucket=bucket_name,
-                    Prefix="videos/"
-                )
-                
-                video_obj = None
-                for obj in response.get('Contents', []):
-                    if video_id in obj['Key']:
-                        video_obj = obj
-                        break
+                # Find video by ID (id index, no bucket scan)
+                video_obj = find_video(s3_client, bucket_name, video_id)
                 
                 if not video_obj:
                     return {
@@ -209,13 +304,22 @@ def lambda_handler(event, context):
                 # Delete video file
                 s3_client.delete_object(Bucket=bucket_name, Key=video_obj['Key'])
                 
-                # Delete metadata if exists
-                metadata_key = f"metadata/{video_obj['Key'].replace('videos/', '').replace('/', '_')}.json"
+                # Delete metadata (and upload timings) if exists
+                metadata_key = metadata_key_for(video_obj['Key'])
                 try:
                     s3_client.delete_object(Bucket=bucket_name, Key=metadata_key)
+                    s3_client.delete_object(Bucket=bucket_name, Key=timings_key_for(video_obj['Key']))
                 except:
                     pass  # Metadata might not exist
                 
+                delete_video_id(s3_client, bucket_name, video_id)
+                
+                # Delta feed for polling clients; the delete already happened either way
+                try:
+                    append_changes(s3_client, bucket_name, [{'type': 'remove', 'key': video_obj['Key'], 'id': video_id}])
+                except StorageError as e:
+                    print(f"Change journal error: {str(e)}")
+                
                 return {
                     'statusCode': 200,
                     'headers': headers,
@@ -226,6 +330,16 @@ def lambda_handler(event, context):
                     })
                 }
                 
+            except ClientError as e:
+                # Storage failure while resolving the id: not a missing video
+                return {
+                    'statusCode': 500,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to delete video: storage error ({e.response.get("Error", {}).get("Code")})'
+                    })
+                }
             except Exception as e:
                 return {
                     'statusCode': 400,
@@ -241,17 +355,8 @@ def lambda_handler(event, context):
             try:
                 video_id = path.split('/')[-2]
                 
-                # Find video by ID
-                response = s3_client.list_objects_v2(
-                    Bucket=bucket_name,
-                    Prefix="videos/"
-                )
-                
-                video_obj = None
-                for obj in response.get('Contents', []):
-                    if video_id in obj['Key']:
-                        video_obj = obj
-                        break
+                # Find video by ID (id index, no bucket scan)
+                video_obj = find_video(s3_client, bucket_name, video_id)
                 
                 if not video_obj:
                     return {
@@ -277,6 +382,16 @@ def lambda_handler(event, context):
                     })
                 }
                 
+            except ClientError as e:
+                # Storage failure while resolving the id: not a missing video
+                return {
+                    'statusCode': 500,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to get video URL: storage error ({e.response.get("Error", {}).get("Code")})'
+                    })
+                }
             except Exception as e:
                 return {
                     'statusCode': 400,
@@ -290,29 +405,148 @@ def lambda_handler(event, context):
         # Get folders/directories endpoint
         if path == '/videos/folders' and method == 'GET':
             try:
-                # List all objects to find folder structure
+                query_params = event.get('queryStringParameters', {}) or {}
+                request_headers = event.get('headers') or {}
+                folder_path = query_params.get('path', '')
+                
+                # Materialized folder tree: counts, sizes and conversion state in one GET
+                tree = load_folder_tree(s3_client, bucket_name)
+                if tree:
+                    summary = tree.summary(folder_path)
+                    if summary is None:
+                        return {
+                            'statusCode': 404,
+                            'headers': headers,
+                            'body': json.dumps({
+                                'success': False,
+                                'message': 'Folder not found'
+                            })
+                        }
+                    
+                    folders = summary.pop('folders')
+                    payload = {
+                        'folders': folders,
+                        'count': len(folders),
+                        'totals': summary
+                    }
+                    return apply_etag({
+                        'statusCode': 200,
+                        'headers': headers,
+                        'body': json.dumps({'success': True, **payload})
+                    }, request_headers, payload)
+                
+                # No tree yet: fall back to listing folder names
+                prefix = f"videos/{folder_path.strip('/')}/" if folder_path.strip('/') else "videos/"
                 response = s3_client.list_objects_v2(
                     Bucket=bucket_name,
-                    Prefix="videos/",
+                    Prefix=prefix,
                     Delimiter="/"
                 )
                 
                 folders = []
-                for prefix in response.get('CommonPrefixes', []):
-                    folder_name = prefix['Prefix'].replace('videos/', '').rstrip('/')
+                for prefix_info in response.get('CommonPrefixes', []):
+                    folder_name = prefix_info['Prefix'][len(prefix):].rstrip('/')
                     if folder_name:  # Skip empty folder names
                         folders.append({
                             'name': folder_name,
-                            'path': prefix['Prefix']
+                            'path': prefix_info['Prefix']
                         })
                 
+                payload = {
+                    'folders': folders,
+                    'count': len(folders)
+                }
+                return apply_etag({
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({'success': True, **payload})
+                }, request_headers, payload)
+                
+            except Exception as e:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to get folders: {str(e)}'
+                    })
+                }
+        
+        # Delta sync: only the changes since the client's token
+        if path == '/videos/changes' and method == 'GET':
+            try:
+                query_params = event.get('queryStringParameters', {}) or {}
+                limit = parse_change_limit(query_params.get('limit'))
+                changes = read_changes(s3_client, bucket_name, query_params.get('since'), limit)
+                
                 return {
                     'statusCode': 200,
                     'headers': headers,
                     'body': json.dumps({
                         'success': True,
-                        'folders': folders,
-                        'count': len(folders)
+                        **changes,
+                        'count': len(changes['changes'])
+                    })
+                }
+                
+            except ValidationError as e:
+                # Bad limit or token
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Invalid changes request: {str(e)}'
+                    })
+                }
+            except Exception as e:
+                return {
+                    'statusCode': 500,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'message': f'Failed to read changes: {str(e)}'
+                    })
+                }
+        
+        # Search endpoint: token AND match, last token completes as a prefix
+        if path == '/videos/search' and method == 'GET':
+            try:
+                query_params = event.get('queryStringParameters', {}) or {}
+                query = query_params.get('q', '')
+                limit = int(query_params.get('limit', 20))
+                started = time.perf_counter()
+                
+                # Loaded lazily on first use, then reused while the stored index is unchanged
+                search = get_search_index(s3_client, bucket_name)
+                if search is None:
+                    return {
+                        'statusCode': 503,
+                        'headers': headers,
+                        'body': json.dumps({
+                            'success': False,
+                            'message': 'Search index not built yet'
+                        })
+                    }
+                
+                found = search.search(query, limit)
+                videos = [to_video_record({
+                    'Key': key,
+                    'Size': size,
+                    'LastModified': datetime.fromtimestamp(modified, timezone.utc)
+                }) for key, size, modified in found['results']]
+                
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': True,
+                        'query': query,
+                        'videos': videos,
+                        'count': len(videos),
+                        'total': found['total'],
+                        'suggestions': found['suggestions'],
+                        'took_ms': round((time.perf_counter() - started) * 1000, 1)
                     })
                 }
                 
@@ -322,7 +556,7 @@ def lambda_handler(event, context):
                     'headers': headers,
                     'body': json.dumps({
                         'success': False,
-                        'message': f'Failed to get folders: {str(e)}'
+                        'message': f'Search failed: {str(e)}'
                     })
                 }
         
@@ -0,0 +1,109 @@
+"""Local streaming server for the NDJSON video listing
+
+Lambda's Python runtime buffers the whole response, so /videos/list?format=ndjson
+on Lambda returns at most NDJSON_BODY_LIMIT bytes plus an X-Next-Cursor header.
+This server streams the same records with chunked transfer encoding, writing each
+line as soon as its S3 page arrives, so memory and time-to-first-byte do not grow
+with the size of the library.
+
+    python stream_server.py --port 8081 --bucket video-streaming-v2-bdc2040d
+    curl -N "http://localhost:8081/videos/list?format=ndjson"
+"""
+import argparse
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.catalog_index import load_catalog_index
+from shared.exceptions import StorageError, ValidationError
+from shared.pagination import encode_cursor
+from shared.streaming import NDJSON_CONTENT_TYPE, iter_ndjson, iter_objects
+
+from handler import to_video_record
+
+class NDJSONListingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    s3_client = None
+    bucket_name = 'video-streaming-v2-bdc2040d'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/videos/list':
+            self.send_error(404, 'Not found')
+            return
+
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        prefix = params.get('prefix', 'videos/')
+
+        # Last key written, so a listing cut short by S3 can be resumed
+        position = {'key': None}
+
+        def records(index):
+            for obj in iter_objects(self.s3_client, self.bucket_name, prefix, cursor=params.get('cursor'), index=index):
+                position['key'] = obj['Key']
+                yield to_video_record(obj)
+
+        try:
+            index = load_catalog_index(self.s3_client, self.bucket_name)
+            lines = iter_ndjson(records(index))
+            # Pull the first line before committing to a 200 so bad cursors still get a 400
+            # and storage failures a 502
+            first = next(lines, None)
+        except ValidationError as e:
+            self.send_error(400, str(e))
+            return
+        except (StorageError, ClientError) as e:
+            self.send_error(502, f"Storage error: {str(e)}")
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', NDJSON_CONTENT_TYPE)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        try:
+            try:
+                if first is not None:
+                    self._write_chunk(first)
+                    for line in lines:
+                        self._write_chunk(line)
+            except (StorageError, ClientError) as e:
+                # The 200 is already out: report the failure as the last line, with
+                # the cursor to resume from, and still terminate the chunked body
+                resume = encode_cursor(start_after=position['key']) if position['key'] else params.get('cursor')
+                self._write_chunk(json.dumps({'error': f"Storage error: {str(e)}", 'next_cursor': resume}) + '\n')
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away; stop walking S3
+            pass
+
+    def _write_chunk(self, line):
+        data = line.encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream the video listing as NDJSON')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--bucket', default=NDJSONListingHandler.bucket_name)
+    args = parser.parse_args()
+
+    NDJSONListingHandler.s3_client = boto3.client('s3')
+    NDJSONListingHandler.bucket_name = args.bucket
+
+    server = ThreadingHTTPServer((args.host, args.port), NDJSONListingHandler)
+    print(f"Streaming /videos/list?format=ndjson on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
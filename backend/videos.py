@@ -1,24 +1,56 @@
 import json
+import os
+import sys
 import boto3
 import jwt
 from datetime import datetime
 
+# Add shared layer to path
+sys.path.append('/opt/python/lib/python3.12/site-packages')
+
+from shared.cache import TTLCache
+from shared.catalog_index import catalog_etag
+from shared.change_journal import append_changes
+from shared.compression import compress_response
+from shared.exceptions import StorageError, ValidationError
+from shared.http_cache import apply_etag, get_request_header
+from shared.multipart import (
+    PART_URL_EXPIRES, UploadNotFoundError, build_completion_parts, parse_part_numbers, presign_part_urls
+)
+from shared.name_index import get_name_index
+from shared.pagination import list_objects_page
+from shared.streaming import NDJSON_CONTENT_TYPE, build_ndjson_body, iter_objects
+from shared.upload_batch import initiate_batch, parse_manifest, sanitize_relative_path
+from shared.upload_telemetry import (
+    parse_part_timings, record_upload_telemetry, stats_from_summary, summarize_timings, telemetry_report
+)
+from shared.upload_tuning import get_profile, load_tuning, parse_upload_stats, plan_upload, record_upload_stats
+
+# Cache de listagens do container quente (chave inclui o ETag do índice do catálogo;
+# invalidado ao completar upload e no delete)
+listing_cache = TTLCache(ttl=float(os.environ.get('LISTING_CACHE_TTL', '30')))
+
 # CORS headers para todas as respostas
 def get_cors_headers(origin=None):
     return {
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Requested-With',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Requested-With,If-None-Match',
         'Access-Control-Allow-Methods': 'POST,GET,OPTIONS,DELETE,PUT',
         'Access-Control-Max-Age': '86400',
+        'Access-Control-Expose-Headers': 'X-Next-Cursor,X-Video-Count,ETag',
         'Content-Type': 'application/json'
     }
 
-def success_response(data, origin=None, status_code=200):
-    return {
+def success_response(data, origin=None, status_code=200, request_headers=None):
+    """Resposta de sucesso; com os headers da requisição leva ETag e responde 304 ao If-None-Match"""
+    response = {
         'statusCode': status_code,
         'headers': get_cors_headers(origin),
         'body': json.dumps({'success': True, **data})
     }
+    if request_headers is not None:
+        response = apply_etag(response, request_headers, data)
+    return response
 
 def error_response(message, origin=None, status_code=400):
     return {
@@ -65,11 +97,16 @@ def handler(event, context):
         
         # Roteamento por método HTTP
         if event['httpMethod'] == 'POST':
-            return handle_post_request(event, origin)
+            response = handle_post_request(event, origin)
         elif event['httpMethod'] == 'GET':
-            return handle_get_request(event, origin)
+            response = handle_get_request(event, origin)
         elif event['httpMethod'] == 'DELETE':
-            return delete_item(event, origin)
+            response = delete_item(event, origin)
+        else:
+            response = error_response('Método não permitido', origin, 405)
+        
+        # Corpo comprimido (gzip/br) quando o cliente aceita; 304 e corpos pequenos seguem como estão
+        return compress_response(response, get_request_header(event.get('headers'), 'Accept-Encoding'))
             
     except Exception as e:
         print(f"Videos error: {e}")
@@ -85,8 +122,16 @@ def handle_get_request(event, origin):
             return generate_upload_url_from_params(params, origin)
         elif action == 'get-part-url':
             return get_multipart_url_from_params(params, origin)
+        elif action == 'get-part-urls':
+            return get_multipart_urls(params, origin)
         elif action == 'complete-multipart':
             return complete_multipart_from_params(params, origin)
+        elif action == 'cache-stats':
+            return success_response({'cache': listing_cache.stats()}, origin)
+        elif action == 'upload-telemetry':
+            return get_upload_telemetry(origin)
+        elif params.get('format') == 'ndjson':
+            return stream_videos(params, origin)
         else:
             return list_videos(event, origin)
             
@@ -102,10 +147,14 @@ def handle_post_request(event, origin):
         
         if action == 'get-part-url':
             return get_multipart_url(body, origin)
+        elif action == 'get-part-urls':
+            return get_multipart_urls(body, origin)
         elif action == 'complete-multipart':
             return complete_multipart_upload(body, origin)
         elif action == 'check-existing':
             return check_existing_files(body, origin)
+        elif action == 'batch-upload':
+            return generate_batch_upload_urls(body, origin)
         else:
             return generate_upload_url(body, origin)
             
@@ -169,10 +218,15 @@ def complete_multipart_from_params(params, origin):
         else:
             parts = []
         
+        # Sem parts, a lista é montada no servidor (só uploadId e key na URL)
         body = {
             'uploadId': upload_id,
             'key': key,
-            'parts': parts
+            'parts': parts,
+            'totalParts': params.get('totalParts'),
+            'fileSize': params.get('fileSize'),
+            'uploadStats': params.get('uploadStats'),
+            'partTimings': params.get('partTimings')
         }
         
         return complete_multipart_upload(body, origin)
@@ -198,26 +252,14 @@ def generate_upload_url(body, origin):
         else:
             key = f'videos/{timestamp}-{file_name}'
             
-        # Determina Content-Type correto
-        content_type = file_type
-        if file_name.lower().endswith(('.ts', '.m2ts', '.mts')):
-            content_type = 'video/mp2t'  # Tipo correto para .ts
-        elif not content_type or content_type == 'application/octet-stream':
-            # Fallback baseado na extensão
-            ext = file_name.lower().split('.')[-1]
-            content_type_map = {
-                'mp4': 'video/mp4',
-                'webm': 'video/webm',
-                'avi': 'video/x-msvideo',
-                'mov': 'video/quicktime',
-                'mkv': 'video/x-matroska'
-            }
-            content_type = content_type_map.get(ext, 'video/mp4')
+        content_type = resolve_content_type(file_name, file_type)
         
         s3_client = boto3.client('s3')
         
-        # Verifica se precisa de multipart (>50MB)
-        if file_size > 50 * 1024 * 1024:
+        # Tamanho de parte e concorrência pelo tamanho do arquivo, limites do S3 e vazão observada
+        plan = plan_upload(file_size, get_profile(load_tuning(s3_client, 'video-streaming-sstech-eaddf6a1')))
+        
+        if plan['multipart']:
             # Inicia multipart upload
             response = s3_client.create_multipart_upload(
                 Bucket='video-streaming-sstech-eaddf6a1',
@@ -229,6 +271,9 @@ def generate_upload_url(body, origin):
                 'multipart': True,
                 'uploadId': response['UploadId'],
                 'key': key,
+                'partSize': plan['part_size'],
+                'totalParts': plan['total_parts'],
+                'concurrency': plan['concurrency'],
                 'message': 'Multipart upload iniciado'
             }, origin)
         else:
@@ -258,6 +303,99 @@ def generate_upload_url(body, origin):
         print(f"Upload URL error: {e}")
         return error_response('Erro ao gerar URL de upload', origin)
 
+def resolve_content_type(file_name, file_type):
+    """Determina Content-Type correto"""
+    content_type = file_type
+    if file_name.lower().endswith(('.ts', '.m2ts', '.mts')):
+        content_type = 'video/mp2t'  # Tipo correto para .ts
+    elif not content_type or content_type == 'application/octet-stream':
+        # Fallback baseado na extensão
+        ext = file_name.lower().split('.')[-1]
+        content_type_map = {
+            'mp4': 'video/mp4',
+            'webm': 'video/webm',
+            'avi': 'video/x-msvideo',
+            'mov': 'video/quicktime',
+            'mkv': 'video/x-matroska'
+        }
+        content_type = content_type_map.get(ext, 'video/mp4')
+    return content_type
+
+def generate_batch_upload_urls(body, origin):
+    """Inicia todos os arquivos de uma pasta numa só chamada (paginado por offset)"""
+    try:
+        manifest = parse_manifest(body.get('files'))
+        offset = int(body.get('offset', 0))
+        folder_path = sanitize_relative_path(body.get('folderPath', ''))
+        bucket = 'video-streaming-sstech-eaddf6a1'
+        
+        # Um cliente, um tuning e um timestamp para a página inteira
+        s3_client = boto3.client('s3')
+        tuning = get_profile(load_tuning(s3_client, bucket))
+        timestamp = int(datetime.now().timestamp())
+        
+        def initiate_file(entry):
+            folder = '/'.join(p for p in (folder_path, entry['path']) if p)
+            key = f"videos/{folder}/{timestamp}-{entry['name']}" if folder else f"videos/{timestamp}-{entry['name']}"
+            content_type = resolve_content_type(entry['name'], entry['type'])
+            # Mesmos metadados no PUT simples e no multipart
+            metadata = {
+                'original-type': entry['type'],
+                'original-name': entry['name']
+            }
+            plan = plan_upload(entry['size'], tuning)
+            
+            if plan['multipart']:
+                response = s3_client.create_multipart_upload(
+                    Bucket=bucket,
+                    Key=key,
+                    ContentType=content_type,
+                    CacheControl='max-age=31536000',
+                    Metadata=metadata
+                )
+                return {
+                    'fileName': entry['name'],
+                    'multipart': True,
+                    'uploadId': response['UploadId'],
+                    'key': key,
+                    'partSize': plan['part_size'],
+                    'totalParts': plan['total_parts'],
+                    'concurrency': plan['concurrency']
+                }
+            
+            upload_url = s3_client.generate_presigned_url(
+                'put_object',
+                Params={
+                    'Bucket': bucket,
+                    'Key': key,
+                    'ContentType': content_type,
+                    'CacheControl': 'max-age=31536000',
+                    'Metadata': metadata
+                },
+                ExpiresIn=3600
+            )
+            return {
+                'fileName': entry['name'],
+                'multipart': False,
+                'uploadUrl': upload_url,
+                'key': key
+            }
+        
+        result = initiate_batch(manifest, offset, initiate_file)
+        
+        return success_response({
+            'uploads': result['uploads'],
+            'total': result['total'],
+            'offset': offset,
+            'nextOffset': result['next_offset']
+        }, origin)
+        
+    except ValidationError as e:
+        return error_response(str(e), origin)
+    except Exception as e:
+        print(f"Batch upload error: {e}")
+        return error_response('Erro ao iniciar uploads em lote', origin)
+
 def get_multipart_url(body, origin):
     """Gera URL para parte do multipart upload"""
     try:
@@ -286,6 +424,33 @@ def get_multipart_url(body, origin):
         print(f"Multipart URL error: {e}")
         return error_response('Erro ao gerar URL multipart', origin)
 
+def get_multipart_urls(body, origin):
+    """Gera URLs de várias partes (intervalo startPart..endPart ou lista partNumbers) numa só chamada"""
+    try:
+        part_numbers = body.get('partNumbers')
+        if isinstance(part_numbers, str):
+            part_numbers = part_numbers.split(',')
+        
+        s3_client = boto3.client('s3')
+        urls = presign_part_urls(
+            s3_client,
+            'video-streaming-sstech-eaddf6a1',
+            body.get('key'),
+            body.get('uploadId'),
+            parse_part_numbers(body.get('startPart'), body.get('endPart'), part_numbers)
+        )
+        
+        return success_response({
+            'urls': [{'partNumber': u['part_number'], 'uploadUrl': u['url']} for u in urls],
+            'expiresIn': PART_URL_EXPIRES
+        }, origin)
+        
+    except ValidationError as e:
+        return error_response(str(e), origin)
+    except Exception as e:
+        print(f"Multipart URLs error: {e}")
+        return error_response('Erro ao gerar URLs multipart', origin)
+
 def complete_multipart_upload(body, origin):
     """Completa multipart upload"""
     try:
@@ -295,18 +460,36 @@ def complete_multipart_upload(body, origin):
         
         s3_client = boto3.client('s3')
         
+        # Partes lidas do S3 (ListParts paginado) quando o cliente não as envia
+        if not parts:
+            parts = build_completion_parts(
+                s3_client,
+                'video-streaming-sstech-eaddf6a1',
+                key,
+                upload_id,
+                body.get('totalParts'),
+                body.get('fileSize')
+            )
+        
         response = s3_client.complete_multipart_upload(
             Bucket='video-streaming-sstech-eaddf6a1',
             Key=key,
             UploadId=upload_id,
             MultipartUpload={'Parts': parts}
         )
+        listing_cache.invalidate()
+        record_changes(s3_client, [{'type': 'add', 'key': key}])
+        record_upload_throughput(s3_client, body.get('uploadStats'), body.get('partTimings'))
         
         return success_response({
             'location': response['Location'],
             'message': 'Upload concluído'
         }, origin)
         
+    except UploadNotFoundError as e:
+        return error_response(str(e), origin, 404)
+    except ValidationError as e:
+        return error_response(str(e), origin)
     except Exception as e:
         print(f"Complete multipart error: {e}")
         return error_response('Erro ao completar upload', origin)
@@ -314,13 +497,31 @@ def complete_multipart_upload(body, origin):
 def list_videos(event, origin):
     """Lista vídeos com suporte a hierarquia"""
     try:
+        params = event.get('queryStringParameters') or {}
+        show_hierarchy = params.get('hierarchy') == 'true'
+        # ETag em toda listagem: polling com If-None-Match recebe 304 sem corpo
+        request_headers = event.get('headers') or {}
+        
         s3_client = boto3.client('s3')
-        show_hierarchy = event.get('queryStringParameters', {}).get('hierarchy') == 'true' if event.get('queryStringParameters') else False
         
-        response = s3_client.list_objects_v2(
-            Bucket='video-streaming-sstech-eaddf6a1',
-            Prefix='videos/'
+        # Containers quentes respondem do cache com um HEAD no índice do catálogo:
+        # uploads simples (PUT direto no S3) mudam o ETag do índice e a entrada.
+        # Sem índice construído a frescura fica limitada ao TTL.
+        catalog_version = catalog_etag(s3_client, 'video-streaming-sstech-eaddf6a1')
+        cache_key = (catalog_version, 'hierarchy' if show_hierarchy else 'items', params.get('pageSize') or '', params.get('cursor') or '')
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            return success_response(cached, origin, request_headers=request_headers)
+        
+        # Uma única página do S3 por requisição; o cliente segue nextCursor
+        page = list_objects_page(
+            s3_client,
+            'video-streaming-sstech-eaddf6a1',
+            'videos/',
+            page_size=params.get('pageSize'),
+            cursor=params.get('cursor')
         )
+        response = {'Contents': page['contents']}
         
         if show_hierarchy:
             hierarchy = {'root': {'files': []}}
@@ -355,7 +556,9 @@ def list_videos(event, origin):
                             'url': f'https://d2we88koy23cl4.cloudfront.net/{obj["Key"]}'
                         })
             
-            return success_response({'hierarchy': hierarchy}, origin)
+            data = {'hierarchy': hierarchy, 'nextCursor': page['next_cursor']}
+            listing_cache.set(cache_key, data)
+            return success_response(data, origin, request_headers=request_headers)
         else:
             # Lista simples
             items = []
@@ -389,12 +592,45 @@ def list_videos(event, origin):
                     'type': 'folder'
                 })
             
-            return success_response({'items': items}, origin)
+            data = {'items': items, 'nextCursor': page['next_cursor']}
+            listing_cache.set(cache_key, data)
+            return success_response(data, origin, request_headers=request_headers)
         
+    except ValidationError as e:
+        return error_response(str(e), origin)
     except Exception as e:
         print(f"List videos error: {e}")
         return error_response('Erro ao listar vídeos', origin)
 
+def stream_videos(params, origin):
+    """Lista vídeos em NDJSON (uma linha por vídeo) sem montar a lista inteira"""
+    try:
+        s3_client = boto3.client('s3')
+        
+        body, next_cursor, count = build_ndjson_body(
+            iter_objects(s3_client, 'video-streaming-sstech-eaddf6a1', 'videos/', cursor=params.get('cursor')),
+            lambda obj: {
+                'key': obj['Key'],
+                'name': obj['Key'].split('/')[-1],
+                'size': obj['Size'],
+                'lastModified': obj['LastModified'].isoformat(),
+                'url': f'https://d2we88koy23cl4.cloudfront.net/{obj["Key"]}',
+                'type': 'file'
+            }
+        )
+        
+        headers = {**get_cors_headers(origin), 'Content-Type': NDJSON_CONTENT_TYPE, 'X-Video-Count': str(count)}
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        
+        return {'statusCode': 200, 'headers': headers, 'body': body}
+        
+    except ValidationError as e:
+        return error_response(str(e), origin)
+    except Exception as e:
+        print(f"Stream videos error: {e}")
+        return error_response('Erro ao listar vídeos', origin)
+
 def delete_item(event, origin):
     """Deleta vídeo ou pasta"""
     try:
@@ -411,8 +647,10 @@ def delete_item(event, origin):
                 Prefix=key
             )
             
+            deleted_keys = []
             if 'Contents' in response:
                 objects_to_delete = [{'Key': obj['Key']} for obj in response['Contents']]
+                deleted_keys = [obj['Key'] for obj in objects_to_delete]
                 
                 s3_client.delete_objects(
                     Bucket='video-streaming-sstech-eaddf6a1',
@@ -424,13 +662,54 @@ def delete_item(event, origin):
                 Bucket='video-streaming-sstech-eaddf6a1',
                 Key=key
             )
+            deleted_keys = [key]
         
+        listing_cache.invalidate()
+        record_changes(s3_client, [{'type': 'remove', 'key': k} for k in deleted_keys])
         return success_response({'message': 'Item deletado com sucesso'}, origin)
         
     except Exception as e:
         print(f"Delete error: {e}")
         return error_response('Erro ao deletar item', origin)
 
+def record_changes(s3_client, changes):
+    """Registra mudanças no journal (falha não desfaz a operação)"""
+    try:
+        append_changes(s3_client, 'video-streaming-sstech-eaddf6a1', changes)
+    except StorageError as e:
+        print(f"Change journal error: {e}")
+
+def record_upload_throughput(s3_client, upload_stats, part_timings=None):
+    """Registra a vazão informada pelo cliente (falha não afeta o upload concluído)
+
+    Com tempos por parte, o resumo entra na telemetria por faixa de tamanho
+    e, se houver horário de início das partes, também alimenta o ajuste.
+    """
+    telemetry = None
+    try:
+        timings = parse_part_timings(part_timings)
+        if timings:
+            telemetry = summarize_timings(timings)
+            record_upload_telemetry(s3_client, 'video-streaming-sstech-eaddf6a1', telemetry)
+    except (StorageError, ValidationError) as e:
+        print(f"Upload telemetry error: {e}")
+    
+    try:
+        stats = parse_upload_stats(upload_stats) or stats_from_summary(telemetry)
+        if stats:
+            record_upload_stats(s3_client, 'video-streaming-sstech-eaddf6a1', stats)
+    except (StorageError, ValidationError) as e:
+        print(f"Upload stats error: {e}")
+
+def get_upload_telemetry(origin):
+    """Percentis de vazão dos uploads por faixa de tamanho de arquivo"""
+    try:
+        s3_client = boto3.client('s3')
+        return success_response(telemetry_report(s3_client, 'video-streaming-sstech-eaddf6a1'), origin)
+    except StorageError as e:
+        print(f"Upload telemetry error: {e}")
+        return error_response('Erro ao carregar telemetria de upload', origin, 500)
+
 def check_existing_files(body, origin):
     """Verifica quais arquivos já existem no S3"""
     try:
@@ -438,26 +717,14 @@ def check_existing_files(body, origin):
         folder_path = body.get('folderPath', '')
         
         s3_client = boto3.client('s3')
-        existing_files = []
         
-        # Lista objetos na pasta
-        prefix = f'videos/{folder_path}/' if folder_path else 'videos/'
-        response = s3_client.list_objects_v2(
-            Bucket='video-streaming-sstech-eaddf6a1',
-            Prefix=prefix
+        # Índice de nomes (sem timestamp): uma consulta por arquivo, sem varrer as chaves
+        name_index = get_name_index(s3_client, 'video-streaming-sstech-eaddf6a1', folder_path)
+        existing_files = name_index.find_existing(
+            [file_info['name'] for file_info in files_to_check],
+            folder_path
         )
         
-        if 'Contents' in response:
-            existing_keys = [obj['Key'] for obj in response['Contents']]
-            
-            for file_info in files_to_check:
-                file_name = file_info['name']
-                # Verifica se existe arquivo com mesmo nome (ignora timestamp)
-                for key in existing_keys:
-                    if key.endswith(file_name):
-                        existing_files.append(file_name)
-                        break
-        
         return success_response({
             'existingFiles': existing_files
         }, origin)
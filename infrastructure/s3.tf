@@ -37,6 +37,32 @@ resource "aws_s3_bucket_public_access_block" "video_streaming_v2" {
   restrict_public_buckets = true
 }
 
+# Change journal entries (index/changes/) are only served for 7 days; readers
+# behind that window reload the full listing, so older entries can go
+resource "aws_s3_bucket_lifecycle_configuration" "video_streaming_v2" {
+  bucket = aws_s3_bucket.video_streaming_v2.id
+  
+  # Expiration on a versioned bucket needs versioning configured first
+  depends_on = [aws_s3_bucket_versioning.video_streaming_v2]
+  
+  rule {
+    id     = "expire-change-journal"
+    status = "Enabled"
+    
+    filter {
+      prefix = "index/changes/"
+    }
+    
+    expiration {
+      days = 7
+    }
+    
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+}
+
 output "s3_bucket_name" {
   value = aws_s3_bucket.video_streaming_v2.bucket
 }